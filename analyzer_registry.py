@@ -0,0 +1,160 @@
+"""
+Registre des méthodes d'analyse (intégrées et plugins)
+1. Chaque analyseur déclare ses entrées, ses sorties, un coût estimé et les
+   formats auxquels il s'applique (AnalyzerSpec)
+2. Les plugins sont découverts par points d'entrée Python (groupe
+   `decodeur.analyzers`) : un détecteur maison s'installe sans modifier le code
+3. Le planificateur en déduit l'ordre (niveaux de dépendances, coût croissant),
+   les analyseurs à ignorer (format, option, coût max) et ceux exécutables en parallèle
+"""
+
+from importlib.metadata import entry_points
+from typing import Dict, List, Any, Optional, Callable, Iterable, Union
+
+from colorama import Fore
+
+
+ENTRY_POINT_GROUP = 'decodeur.analyzers'
+
+# Entrées toujours disponibles (fournies par le chargement de l'image)
+BASE_INPUTS = {'file', 'raw_bytes', 'pixels'}
+
+# Formats PIL équivalents pour le filtrage par format
+FORMAT_ALIASES = {'MPO': 'JPEG'}
+
+
+class AnalyzerSpec:
+    """
+    Description d'un analyseur.
+    - func : nom d'une méthode de ForensicAnalyzer (intégré) ou fonction
+      func(analyzer) -> résultat (plugin, rangé dans results['plugins'][name])
+    - inputs / outputs : données consommées / produites; un analyseur s'exécute
+      après ceux qui produisent ses entrées
+    - cost : coût relatif estimé (1 = une passe NumPy sur l'image)
+    - formats : formats PIL acceptés (None = tous)
+    - parallel : peut s'exécuter en même temps que les autres analyseurs du niveau
+    - enabled : enabled(options) -> bool, pour les analyseurs activés par option
+    - finding / summary : (plugins) résultat positif et résumé d'une ligne pour
+      la corrélation et les rapports; label : nom de méthode dans les rapports
+    """
+
+    def __init__(self, name: str, func: Union[str, Callable[[Any], Any]],
+                 inputs: Iterable[str] = (), outputs: Iterable[str] = (),
+                 cost: float = 1.0, formats: Optional[Iterable[str]] = None,
+                 parallel: bool = False, enabled: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 finding: Optional[Callable[[Any], bool]] = None,
+                 summary: Optional[Callable[[Any], str]] = None,
+                 label: Optional[str] = None):
+        self.name = name
+        self.func = func
+        self.inputs = set(inputs)
+        self.outputs = set(outputs) or {name}
+        self.cost = cost
+        self.formats = {fmt.upper() for fmt in formats} if formats else None
+        self.parallel = parallel
+        self.enabled = enabled
+        self.finding = finding
+        self.summary = summary
+        self.label = label or name.upper()
+        self.builtin = isinstance(func, str)
+        self.source = 'intégré' if self.builtin else 'plugin'
+
+    def applies_to(self, image_format: Optional[str]) -> bool:
+        if self.formats is None:
+            return True
+        fmt = (image_format or '').upper()
+        return FORMAT_ALIASES.get(fmt, fmt) in self.formats
+
+    def __repr__(self):
+        return f"AnalyzerSpec({self.name!r}, cost={self.cost}, source={self.source!r})"
+
+
+class AnalyzerRegistry:
+    """Analyseurs enregistrés, plugins chargés à la première planification."""
+
+    def __init__(self):
+        self._specs: Dict[str, AnalyzerSpec] = {}
+        self._plugins_loaded = False
+        self.plugin_errors: Dict[str, str] = {}
+
+    def register(self, spec: AnalyzerSpec) -> AnalyzerSpec:
+        """Ajoute (ou remplace, même nom) un analyseur."""
+        self._specs[spec.name] = spec
+        return spec
+
+    def specs(self) -> List[AnalyzerSpec]:
+        self.load_plugins()
+        return list(self._specs.values())
+
+    def load_plugins(self):
+        """
+        Charge les points d'entrée du groupe `decodeur.analyzers`. Chacun désigne
+        un AnalyzerSpec, une liste de specs, ou une fonction qui en retourne.
+        Un plugin défaillant est signalé et ignoré.
+        """
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+        found = entry_points()
+        group = found.select(group=ENTRY_POINT_GROUP) if hasattr(found, 'select') else found.get(ENTRY_POINT_GROUP, [])
+        for entry_point in group:
+            try:
+                loaded = entry_point.load()
+                if callable(loaded) and not isinstance(loaded, AnalyzerSpec):
+                    loaded = loaded()
+                for spec in (loaded if isinstance(loaded, (list, tuple)) else [loaded]):
+                    if not isinstance(spec, AnalyzerSpec):
+                        raise TypeError(f"{type(spec).__name__} n'est pas un AnalyzerSpec")
+                    if spec.name in self._specs and self._specs[spec.name].builtin:
+                        raise ValueError(f"nom réservé par un analyseur intégré : {spec.name}")
+                    self.register(spec)
+            except Exception as e:
+                self.plugin_errors[entry_point.name] = str(e)
+                print(f"{Fore.YELLOW}[PLUGINS] Plugin '{entry_point.name}' ignoré : {e}")
+
+    def plan(self, image_format: Optional[str], options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Planifie l'exécution pour un format et des options :
+        {levels: [[spec, ...], ...], skipped: {nom: raison}}. Un niveau ne dépend
+        que des niveaux précédents; dans un niveau, coût croissant.
+        """
+        skip = set(options.get('skip_analyzers') or [])
+        max_cost = options.get('max_cost')
+        produced = set(BASE_INPUTS)
+        for spec in self.specs():
+            produced |= spec.outputs
+
+        skipped: Dict[str, str] = {}
+        selected = []
+        for spec in self.specs():
+            if spec.name in skip:
+                skipped[spec.name] = 'désactivé'
+            elif not spec.applies_to(image_format):
+                skipped[spec.name] = f"format {image_format}"
+            elif spec.enabled and not spec.enabled(options):
+                skipped[spec.name] = 'option désactivée'
+            elif max_cost is not None and spec.cost > max_cost:
+                skipped[spec.name] = f"coût estimé {spec.cost} > {max_cost}"
+            elif spec.inputs - produced:
+                skipped[spec.name] = f"entrée inconnue : {', '.join(sorted(spec.inputs - produced))}"
+            else:
+                selected.append(spec)
+
+        # Les producteurs ignorés ne bloquent pas : leurs consommateurs gèrent l'absence
+        levels: List[List[AnalyzerSpec]] = []
+        remaining = selected
+        while remaining:
+            pending_outputs = set().union(*(spec.outputs for spec in remaining))
+            ready = [spec for spec in remaining if not (spec.inputs & (pending_outputs - spec.outputs))]
+            if not ready:
+                for spec in remaining:
+                    skipped[spec.name] = 'dépendance circulaire'
+                break
+            levels.append(sorted(ready, key=lambda spec: spec.cost))
+            remaining = [spec for spec in remaining if spec not in ready]
+
+        return {'levels': levels, 'skipped': skipped}
+
+
+# Registre global : analyseurs intégrés enregistrés par decodeur.py
+REGISTRY = AnalyzerRegistry()
@@ -0,0 +1,124 @@
+"""
+Carte d'entropie des octets bruts du fichier (fenêtre glissante)
+1. Le fichier est découpé en blocs de `step` octets (vue NumPy, sans copie) ;
+   un histogramme par bloc est calculé par bincount, par lots de blocs
+2. L'histogramme de chaque fenêtre (window = k blocs) est la somme de k blocs
+   consécutifs, obtenue par une vue glissante (sliding_window_view) : aucune
+   boucle Python par fenêtre
+3. Entropie de Shannon par table de c·log2(c), régions à haute entropie hors
+   des flux de données image (IDAT, scans JPEG) signalées avec leurs offsets
+"""
+
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import (
+    ENTROPY_WINDOW, ENTROPY_STEP, ENTROPY_MAX_BLOCKS, ENTROPY_THRESHOLD, ENTROPY_PROFILE_POINTS
+)
+
+
+# Blocs traités par appel à bincount (borne la mémoire temporaire)
+_BINCOUNT_BLOCKS = 4096
+
+
+def _block_histograms(data: np.ndarray, step: int) -> np.ndarray:
+    """Histogramme des 256 valeurs d'octet pour chaque bloc complet de `step` octets."""
+    blocks = data[:len(data) // step * step].reshape(-1, step)
+    counts = np.empty((len(blocks), 256), dtype=np.int32)
+    for start in range(0, len(blocks), _BINCOUNT_BLOCKS):
+        batch = blocks[start:start + _BINCOUNT_BLOCKS]
+        keys = batch.astype(np.int32) + (np.arange(len(batch), dtype=np.int32) * 256)[:, None]
+        counts[start:start + len(batch)] = np.bincount(keys.ravel(), minlength=len(batch) * 256).reshape(-1, 256)
+    return counts
+
+
+def window_entropy(raw_bytes: bytes, window: int = ENTROPY_WINDOW, step: int = ENTROPY_STEP) -> Dict[str, Any]:
+    """
+    Entropie (bits/octet) de chaque fenêtre de `window` octets, décalée de `step`.
+    Le pas est agrandi (fenêtre proportionnelle) pour rester sous ENTROPY_MAX_BLOCKS
+    blocs. Retourne {entropy (ndarray), window, step}.
+    """
+    blocks_per_window = max(1, window // step)
+    step = max(step, -(-len(raw_bytes) // ENTROPY_MAX_BLOCKS))
+    window = step * blocks_per_window
+    data = np.frombuffer(raw_bytes, dtype=np.uint8)
+    if len(data) < window:
+        return {'entropy': np.zeros(0, dtype=np.float32), 'window': window, 'step': step}
+
+    counts = _block_histograms(data, step)
+    # Histogramme de chaque fenêtre : somme de k blocs consécutifs (vue glissante)
+    window_counts = sliding_window_view(counts, blocks_per_window, axis=0).sum(axis=-1)
+
+    # H = log2(W) - Σ c·log2(c) / W
+    values = np.arange(window + 1, dtype=np.float64)
+    c_log_c = np.zeros_like(values)
+    c_log_c[1:] = values[1:] * np.log2(values[1:])
+    entropy = np.log2(window) - c_log_c[window_counts].sum(axis=1) / window
+    return {'entropy': entropy.astype(np.float32), 'window': window, 'step': step}
+
+
+def _overlap_mask(ranges: List[List[int]], windows: int, window: int, step: int) -> np.ndarray:
+    """Fenêtres qui chevauchent au moins une des plages [début, fin)."""
+    starts = np.arange(windows, dtype=np.int64) * step
+    mask = np.zeros(windows, dtype=bool)
+    for range_start, range_end in ranges:
+        mask |= (starts < range_end) & (starts + window > range_start)
+    return mask
+
+
+def scan_entropy(raw_bytes: bytes, expected_ranges: Optional[List[List[int]]]) -> Dict[str, Any]:
+    """
+    Carte d'entropie du fichier : profil compact (max par segment), statistiques
+    et régions au-dessus d'ENTROPY_THRESHOLD hors des plages attendues
+    (`expected_ranges`, données image compressées). Sans plages connues
+    (format non parcouru), aucune région n'est signalée.
+    """
+    scan = window_entropy(raw_bytes)
+    entropy = scan['entropy']
+    window, step = scan['window'], scan['step']
+    report: Dict[str, Any] = {
+        'window': window,
+        'step': step,
+        'windows': int(len(entropy)),
+        'max': round(float(entropy.max()), 4) if len(entropy) else 0.0,
+        'mean': round(float(entropy.mean()), 4) if len(entropy) else 0.0,
+        'profile': [],
+        'regions': [],
+        'image_data_known': expected_ranges is not None
+    }
+    if not len(entropy):
+        return report
+
+    # Profil compact : maximum de chaque segment (les pics restent visibles)
+    points = min(ENTROPY_PROFILE_POINTS, len(entropy))
+    edges = np.linspace(0, len(entropy), points + 1).astype(np.int64)
+    report['profile'] = [round(float(value), 2) for value in np.maximum.reduceat(entropy, edges[:-1])]
+
+    if expected_ranges is None:
+        return report
+
+    flagged = (entropy >= ENTROPY_THRESHOLD) & ~_overlap_mask(expected_ranges, len(entropy), window, step)
+    if not flagged.any():
+        return report
+
+    # Fenêtres signalées consécutives fusionnées en régions
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], flagged.astype(np.int8), [0]))))
+    for first, last in zip(edges[::2], edges[1::2]):
+        start = int(first) * step
+        end = min(int(last - 1) * step + window, len(raw_bytes))
+        report['regions'].append({
+            'offset': start,
+            'hex_offset': hex(start),
+            'length': end - start,
+            'max_entropy': round(float(entropy[first:last].max()), 4),
+            'mean_entropy': round(float(entropy[first:last].mean()), 4)
+        })
+    return report
+
+
+def sparkline(profile: List[float]) -> str:
+    """Profil d'entropie (0-8 bits) en caractères bloc pour le terminal."""
+    levels = '▁▂▃▄▅▆▇█'
+    return ''.join(levels[min(7, int(value))] for value in profile)
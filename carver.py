@@ -0,0 +1,414 @@
+"""
+Extraction (carving) des fichiers incrustés détectés par leurs signatures
+1. Chaque signature est validée et son étendue déterminée par la structure du
+   format : EOCD (ZIP), %%EOF (PDF), IEND (PNG), EOI (JPEG), fin du flux
+   deflate (GZIP), en-tête de signature (7Z), blocs jusqu'à la fin d'archive (RAR)
+2. La charge utile est écrite par tranches de memoryview (aucune copie du fichier)
+   et hachée au fil de l'écriture (SHA-256, MD5)
+3. Limites : taille max par charge utile, espace disque libre
+4. Extraction des membres d'archives (ZIP, GZIP) pour l'analyse récursive,
+   protégée contre les bombes de décompression (ratio, nombre de membres,
+   octets réellement décompressés)
+"""
+
+import gzip
+import hashlib
+import re
+import shutil
+import threading
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import png_parser
+import jpeg_parser
+from config import (
+    CARVE_MAX_SIZE, CARVE_CHUNK_SIZE, CARVE_MAX_INFLATE, CARVE_MIN_FREE_SPACE,
+    ARCHIVE_MAX_MEMBERS, ARCHIVE_MAX_RATIO
+)
+
+
+# Extensions des fichiers extraits
+CARVE_EXTENSIONS = {
+    'ZIP': '.zip',
+    'PDF': '.pdf',
+    'PNG': '.png',
+    'JPEG': '.jpg',
+    'GZIP': '.gz',
+    '7Z': '.7z',
+    'RAR': '.rar',
+}
+
+ZIP_EOCD = b'PK\x05\x06'
+PDF_EOF = b'%%EOF'
+RAR4_SIGNATURE = b'Rar!\x1a\x07\x00'
+RAR5_SIGNATURE = b'Rar!\x1a\x07\x01\x00'
+
+
+# ============================================================================
+# ÉTENDUE DES CHARGES UTILES (une fonction par format)
+# ============================================================================
+
+def _zip_end(raw: bytes, view: memoryview, start: int) -> Optional[int]:
+    """
+    Fin d'une archive ZIP : premier EOCD dont le répertoire central se termine
+    juste avant lui (offsets relatifs à l'archive ou absolus dans le fichier).
+    """
+    pos = raw.find(ZIP_EOCD, start)
+    while pos != -1 and pos + 22 <= len(raw):
+        cd_size = int.from_bytes(view[pos + 12:pos + 16], 'little')
+        cd_offset = int.from_bytes(view[pos + 16:pos + 20], 'little')
+        comment_length = int.from_bytes(view[pos + 20:pos + 22], 'little')
+        # 0xFFFFFFFF : ZIP64, offsets réels dans l'enregistrement ZIP64
+        if cd_offset == 0xFFFFFFFF or pos in (start + cd_offset + cd_size, cd_offset + cd_size):
+            return min(pos + 22 + comment_length, len(raw))
+        pos = raw.find(ZIP_EOCD, pos + 1)
+    return None
+
+
+def _pdf_end(raw: bytes, view: memoryview, start: int) -> Optional[int]:
+    """Fin d'un PDF : dernier %%EOF (mises à jour incrémentales), fin de ligne comprise."""
+    if bytes(view[start + 4:start + 5]) != b'-':
+        return None
+    pos = raw.rfind(PDF_EOF, start)
+    if pos == -1:
+        return None
+    end = pos + len(PDF_EOF)
+    while end < len(raw) and raw[end] in (0x0D, 0x0A) and end < pos + len(PDF_EOF) + 2:
+        end += 1
+    return end
+
+
+def _png_end(raw: bytes, view: memoryview, start: int) -> Optional[int]:
+    """Fin d'un PNG : chunk IEND atteint par le parcours des chunks."""
+    for index, chunk in enumerate(png_parser.iter_chunks(view[start:])):
+        if chunk.get('truncated') or (index == 0 and chunk['type'] != 'IHDR'):
+            return None
+        if chunk['type'] == 'IEND':
+            return start + chunk['offset'] + 12 + chunk['length']
+    return None
+
+
+def _jpeg_end(raw: bytes, view: memoryview, start: int) -> Optional[int]:
+    """Fin d'un JPEG : marqueur EOI atteint par le parcours des segments."""
+    for segment in jpeg_parser.iter_segments(raw, start):
+        if 'error' in segment:
+            return None
+        if segment['marker'] == jpeg_parser.EOI:
+            return segment['offset'] + 2
+    return None
+
+
+def _gzip_end(raw: bytes, view: memoryview, start: int) -> Optional[int]:
+    """
+    Fin d'un membre GZIP : fin du flux deflate (+ CRC32 et ISIZE). La sortie
+    décompressée est jetée au fur et à mesure, bornée à CARVE_MAX_INFLATE.
+    """
+    if view[start + 3] & 0xE0:
+        return None
+    inflater = zlib.decompressobj(wbits=31)
+    consumed = start
+    inflated = 0
+    try:
+        while consumed < len(raw) and not inflater.eof:
+            chunk = view[consumed:consumed + CARVE_CHUNK_SIZE]
+            consumed += len(chunk)
+            inflated += len(inflater.decompress(chunk, CARVE_CHUNK_SIZE))
+            while inflater.unconsumed_tail and inflated <= CARVE_MAX_INFLATE:
+                inflated += len(inflater.decompress(inflater.unconsumed_tail, CARVE_CHUNK_SIZE))
+            if inflated > CARVE_MAX_INFLATE:
+                return None
+    except zlib.error:
+        return None
+    if not inflater.eof:
+        return None
+    return consumed - len(inflater.unused_data)
+
+
+def _7z_end(raw: bytes, view: memoryview, start: int) -> Optional[int]:
+    """Fin d'une archive 7z : en-tête de signature (CRC vérifié) + en-tête suivant."""
+    header = view[start:start + 32]
+    if len(header) < 32 or zlib.crc32(header[12:32]) != int.from_bytes(header[8:12], 'little'):
+        return None
+    next_offset = int.from_bytes(header[12:20], 'little')
+    next_size = int.from_bytes(header[20:28], 'little')
+    end = start + 32 + next_offset + next_size
+    return end if end <= len(raw) else None
+
+
+def _read_vint(view: memoryview, pos: int):
+    """Entier de longueur variable RAR5 : (valeur, position suivante)."""
+    value = 0
+    shift = 0
+    while pos < len(view):
+        byte = view[pos]
+        value |= (byte & 0x7F) << shift
+        pos += 1
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift > 63:
+            break
+    return None, pos
+
+
+def _rar_end(raw: bytes, view: memoryview, start: int) -> Optional[int]:
+    """Fin d'une archive RAR : parcours des blocs jusqu'au bloc de fin d'archive."""
+    end = len(raw)
+    if bytes(view[start:start + 8]) == RAR5_SIGNATURE:
+        pos = start + 8
+        while pos + 4 < end:
+            header_size, data_pos = _read_vint(view, pos + 4)
+            if not header_size or data_pos + header_size > end:
+                return None
+            if zlib.crc32(view[pos + 4:data_pos + header_size]) != int.from_bytes(view[pos:pos + 4], 'little'):
+                return None
+            header_type, field = _read_vint(view, data_pos)
+            flags, field = _read_vint(view, field)
+            data_size = 0
+            if flags & 0x01:
+                _, field = _read_vint(view, field)
+            if flags & 0x02:
+                data_size, field = _read_vint(view, field)
+            pos = data_pos + header_size + (data_size or 0)
+            if header_type == 5:
+                return pos if pos <= end else None
+        return None
+
+    if bytes(view[start:start + 7]) != RAR4_SIGNATURE:
+        return None
+    pos = start
+    while pos + 7 <= end:
+        header_type = view[pos + 2]
+        flags = int.from_bytes(view[pos + 3:pos + 5], 'little')
+        header_size = int.from_bytes(view[pos + 5:pos + 7], 'little')
+        if header_size < 7:
+            return None
+        added = int.from_bytes(view[pos + 7:pos + 11], 'little') if flags & 0x8000 else 0
+        pos += header_size + added
+        if header_type == 0x7B:
+            return pos if pos <= end else None
+    # Anciennes archives sans bloc de fin : jusqu'à la fin du fichier
+    return end if pos == end else None
+
+
+PAYLOAD_END = {
+    'ZIP': _zip_end,
+    'PDF': _pdf_end,
+    'PNG': _png_end,
+    'JPEG': _jpeg_end,
+    'GZIP': _gzip_end,
+    '7Z': _7z_end,
+    'RAR': _rar_end,
+}
+
+
+def payload_extent(raw: bytes, kind: str, start: int) -> Optional[int]:
+    """Offset de fin (exclu) de la charge utile de type `kind` à `start`, None si non validée."""
+    finder = PAYLOAD_END.get(kind)
+    if finder is None:
+        return None
+    try:
+        return finder(raw, memoryview(raw), start)
+    except IndexError:
+        return None
+
+
+# ============================================================================
+# EXTRACTION
+# ============================================================================
+
+def _stream_payload(view: memoryview, destination: Optional[Path]) -> Dict[str, str]:
+    """Écrit (si `destination`) et hache la tranche par blocs de CARVE_CHUNK_SIZE."""
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    handle = open(destination, 'wb') if destination else None
+    try:
+        for offset in range(0, len(view), CARVE_CHUNK_SIZE):
+            piece = view[offset:offset + CARVE_CHUNK_SIZE]
+            sha256.update(piece)
+            md5.update(piece)
+            if handle:
+                handle.write(piece)
+    finally:
+        if handle:
+            handle.close()
+    return {'sha256': sha256.hexdigest(), 'md5': md5.hexdigest()}
+
+
+def carve_payloads(raw_bytes: bytes, signatures: List[Dict[str, Any]],
+                   output_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Détermine l'étendue de chaque signature extractible et la hache; l'écrit
+    dans `output_dir` si fourni. Les signatures situées dans une charge utile
+    déjà extraite (entrées d'une archive, miniatures) sont ignorées.
+    Retourne [{type, offset, length, sha256, md5, path?, skipped?}].
+    """
+    view = memoryview(raw_bytes)
+    out = Path(output_dir) if output_dir else None
+    carved = []
+    covered_until = 0
+
+    hits = sorted((sig for sig in signatures if sig['type'] in PAYLOAD_END), key=lambda sig: sig['offset'])
+    for sig in hits:
+        start = sig['offset']
+        # Offset 0 : le fichier analysé lui-même
+        if start == 0 or start < covered_until:
+            continue
+        end = payload_extent(raw_bytes, sig['type'], start)
+        if end is None:
+            continue
+
+        entry: Dict[str, Any] = {'type': sig['type'], 'offset': start, 'length': end - start}
+        if entry['length'] > CARVE_MAX_SIZE:
+            entry['skipped'] = f"taille supérieure à {CARVE_MAX_SIZE} octets"
+            carved.append(entry)
+            continue
+        covered_until = end
+
+        destination = None
+        if out:
+            out.mkdir(parents=True, exist_ok=True)
+            if shutil.disk_usage(out).free - entry['length'] < CARVE_MIN_FREE_SPACE:
+                entry['skipped'] = "espace disque insuffisant"
+            else:
+                destination = out / f"{start:08x}_{sig['type'].lower()}{CARVE_EXTENSIONS[sig['type']]}"
+                entry['path'] = str(destination)
+        entry.update(_stream_payload(view[start:end], destination))
+        carved.append(entry)
+
+    return carved
+
+
+# ============================================================================
+# MEMBRES D'ARCHIVES (analyse récursive)
+# ============================================================================
+
+# Formats dont les membres sont extraits (7Z/RAR : bibliothèques non disponibles)
+ARCHIVE_KINDS = {'ZIP', 'GZIP'}
+
+# Signatures de tête utilisées pour classer un fichier extrait
+HEAD_SIGNATURES = {
+    b'PK\x03\x04': 'ZIP',
+    b'\x1f\x8b\x08': 'GZIP',
+    b'\x89PNG\r\n\x1a\n': 'PNG',
+    b'\xff\xd8\xff': 'JPEG',
+    b'GIF87a': 'GIF',
+    b'GIF89a': 'GIF',
+    b'%PDF': 'PDF',
+    b'7z\xbc\xaf\x27\x1c': '7Z',
+    b'Rar!\x1a\x07': 'RAR',
+}
+
+
+def detect_kind(path: Path) -> Optional[str]:
+    """Type d'un fichier d'après ses premiers octets (None si inconnu)."""
+    with open(path, 'rb') as f:
+        head = f.read(16)
+    for signature, kind in HEAD_SIGNATURES.items():
+        if head.startswith(signature):
+            return kind
+    return None
+
+
+def _safe_member_name(index: int, name: str) -> str:
+    """Nom de fichier local sûr (pas de chemin, pas de traversée) pour un membre."""
+    base = re.sub(r'[^\w.-]', '_', Path(name.replace('\\', '/')).name)[:100] or 'membre'
+    return f"{index:04d}_{base}"
+
+
+def _copy_bounded(source, destination: Path, limit: int) -> Optional[int]:
+    """
+    Copie un flux décompressé par blocs; None (fichier supprimé) si plus de
+    `limit` octets sortent (taille annoncée mensongère, bombe).
+    """
+    written = 0
+    with open(destination, 'wb') as out:
+        while True:
+            chunk = source.read(CARVE_CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > limit:
+                break
+            out.write(chunk)
+    if written > limit:
+        destination.unlink()
+        return None
+    return written
+
+
+class ByteBudget:
+    """Budget d'octets partagé entre threads : réservation avant écriture ou analyse."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size: int) -> bool:
+        """Réserve `size` octets; False si le budget serait dépassé."""
+        with self._lock:
+            if self.used + size > self.total:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size: int):
+        """Rend des octets réservés mais non utilisés."""
+        with self._lock:
+            self.used -= size
+
+
+def extract_members(path: Path, kind: str, output_dir: Path, budget: ByteBudget) -> Dict[str, Any]:
+    """
+    Extrait les membres d'une archive ZIP ou GZIP dans `output_dir`. La taille
+    annoncée de chaque membre est réservée sur `budget` avant décompression.
+    Retourne {members: [{name, path, size}], skipped: [{name, reason}], bytes}.
+    """
+    report: Dict[str, Any] = {'members': [], 'skipped': [], 'bytes': 0}
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    def extract(index: int, name: str, declared: int, compressed: int, opener):
+        if declared > ARCHIVE_MAX_RATIO * max(compressed, 1):
+            report['skipped'].append({'name': name, 'reason': f"ratio de compression > {ARCHIVE_MAX_RATIO}"})
+            return
+        if not budget.reserve(declared):
+            report['skipped'].append({'name': name, 'reason': "budget d'octets épuisé"})
+            return
+        # Sortie bornée par la taille annoncée (réservée) : une annonce mensongère est rejetée
+        destination = output_dir / _safe_member_name(index, name)
+        with opener() as source:
+            size = _copy_bounded(source, destination, max(declared, 1))
+        if size is None:
+            budget.release(declared)
+            report['skipped'].append({'name': name, 'reason': "taille décompressée supérieure à l'annonce"})
+            return
+        budget.release(declared - size)
+        report['bytes'] += size
+        report['members'].append({'name': name, 'path': str(destination), 'size': size})
+
+    try:
+        if kind == 'ZIP':
+            with zipfile.ZipFile(path) as archive:
+                members = [info for info in archive.infolist() if not info.is_dir()]
+                if len(members) > ARCHIVE_MAX_MEMBERS:
+                    report['skipped'].append({'name': '*', 'reason': f"{len(members)} membres, "
+                                                                     f"{ARCHIVE_MAX_MEMBERS} extraits au plus"})
+                for index, info in enumerate(members[:ARCHIVE_MAX_MEMBERS]):
+                    if info.flag_bits & 0x1:
+                        report['skipped'].append({'name': info.filename, 'reason': 'membre chiffré'})
+                        continue
+                    extract(index, info.filename, info.file_size, info.compress_size,
+                            lambda info=info: archive.open(info))
+        elif kind == 'GZIP':
+            # Taille annoncée : champ ISIZE (modulo 2^32) en fin de membre
+            compressed = path.stat().st_size
+            with open(path, 'rb') as f:
+                f.seek(-4, 2)
+                declared = int.from_bytes(f.read(4), 'little')
+            extract(0, path.stem, declared, compressed, lambda: gzip.open(path, 'rb'))
+    except (zipfile.BadZipFile, OSError, EOFError, zlib.error, RuntimeError) as e:
+        report['error'] = str(e)
+    return report
@@ -1,4 +1,6 @@
-"""Configuration pour l'analyseur LLM"""
+"""Configuration du Décodeur (analyse forensique + analyseur LLM)"""
+
+import os
 
 # Patterns de détection
 SUSPICIOUS_KEYWORDS = [
@@ -17,4 +19,214 @@ LLM_MODELS = {
 NLP_LANGUAGES = {
     'fr': 'fr_core_news_sm',
     'en': 'en_core_web_sm'
-}
\ No newline at end of file
+}
+
+# ============================================================================
+# ANALYSE FORENSIQUE
+# ============================================================================
+
+# Extensions d'images prises en charge en mode batch
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp']
+
+# Images multi-frames (GIF animé, APNG, TIFF multi-pages)
+MAX_FRAMES = 256               # Frames supplémentaires analysées au plus par image
+
+# Vidéos (frames décodées en flux, échantillonnées)
+VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v']
+VIDEO_SAMPLING = 'stride'      # 'stride' (une frame sur N) ou 'scene' (changements de scène)
+VIDEO_FRAME_STRIDE = 30        # Pas d'échantillonnage en mode 'stride'
+VIDEO_SCENE_THRESHOLD = 0.15   # Différence moyenne (0-1) avec la dernière frame retenue
+VIDEO_WORKERS = 0              # Threads d'analyse des frames (0 = nombre de cœurs)
+
+# Structure PNG (parcours des chunks)
+PNG_MAX_ANCILLARY_CHUNK = 1_048_576      # Chunk auxiliaire signalé au-delà de 1 Mo
+PNG_TEXT_MAX_DECOMPRESSED = 1_048_576    # Décompression zTXt/iTXt bornée à 1 Mo
+
+# Structure et statistiques DCT des JPEG
+JPEG_JSTEG_THRESHOLD = 0.6          # Probabilité chi² (paires de valeurs) au-delà de laquelle JSteg est suspecté
+JPEG_F5_THRESHOLD = 0.1             # Proportion estimée de coefficients modifiés (F5)
+JPEG_F5_CALIBRATION_BLUR = 0.05     # Poids e du passe-bas de calibration F5 (noyau en croix 1-4e / e)
+JPEG_F5_MIN_QUANT_STEP = 3          # Pas de quantification min des modes F5 (q ≳ 90 : calibration non fiable)
+JPEG_F5_MAX_FLAT_BLOCKS = 0.5       # Part max de blocs sans AC (documents, aplats : calibration non fiable)
+JPEG_DCT_MIN_COEFFICIENTS = 4096    # Coefficients AC minimum pour des statistiques fiables
+
+# Extraction des fichiers incrustés (carving)
+CARVE_MAX_SIZE = 512 * 1024 * 1024       # Charge utile non extraite au-delà de 512 Mo
+CARVE_CHUNK_SIZE = 1024 * 1024           # Écriture / hachage par blocs de 1 Mo
+CARVE_MAX_INFLATE = 1024 * 1024 * 1024   # Décompression GZIP max pour trouver la fin du flux
+CARVE_MIN_FREE_SPACE = 100 * 1024 * 1024  # Espace disque laissé libre après extraction
+
+# Analyse récursive des charges utiles extraites et des membres d'archives
+RECURSION_MAX_DEPTH = 3                     # Niveaux d'imbrication analysés sous l'image
+RECURSION_MAX_BYTES = 1024 * 1024 * 1024    # Octets analysés/décompressés au total par image
+RECURSION_MAX_NODES = 500                   # Fichiers analysés au plus par image
+RECURSION_WORKERS = 0                       # Threads de la file de travail (0 = nombre de cœurs)
+ARCHIVE_MAX_MEMBERS = 1000                  # Membres extraits au plus par archive
+ARCHIVE_MAX_RATIO = 100                     # Ratio décompressé/compressé max d'un membre (bombes)
+
+# Carte d'entropie des octets bruts (fenêtre glissante)
+ENTROPY_WINDOW = 2048          # Taille de fenêtre (octets)
+ENTROPY_STEP = 512             # Décalage entre fenêtres (octets)
+ENTROPY_MAX_BLOCKS = 65536     # Au-delà, pas et fenêtre agrandis proportionnellement
+ENTROPY_THRESHOLD = 7.5        # Bits/octet : contenu chiffré ou compressé
+ENTROPY_PROFILE_POINTS = 64    # Points du profil compact stocké dans les résultats
+
+# Décodage des charges utiles (base64, hex, zlib, gzip, XOR)
+DECODE_MAX_DEPTH = 3               # Transformations enchaînées au plus (ex. base64 → zlib)
+DECODE_MIN_TOKEN = 16              # Longueur min d'un jeton base64/hex candidat
+DECODE_MAX_TOKENS = 16             # Jetons essayés au plus par flux
+DECODE_PRINTABLE_RATIO = 0.9       # Proportion d'imprimables pour qu'un résultat soit du texte
+DECODE_MAX_INPUT = 1024 * 1024     # Octets décodés au plus par flux candidat
+DECODE_MAX_OUTPUT = 16 * 1024 * 1024  # Sortie de décompression bornée
+DECODE_XOR_SAMPLE = 4096           # Échantillon noté pour les 256 clés XOR
+DECODE_PLAINTEXT_CHARS = 2000      # Caractères de texte décodé conservés dans les résultats
+
+# Index des quasi-doublons (empreintes perceptuelles pHash/dHash sur 64 bits)
+DUPLICATE_INDEX_PATH = os.getenv('DUPLICATE_INDEX_PATH') or None  # Fichier JSON de l'index (None = désactivé)
+PHASH_MAX_DISTANCE = 10        # Bits différents au plus pour un quasi-doublon
+DUPLICATE_MAX_MATCHES = 5      # Analyses précédentes rapportées au plus
+DUPLICATE_REUSE_DISTANCE = 4   # Réutilisation : pHash et dHash à moins de 4 bits
+DUPLICATE_REUSE_STAGES = ['ocr']  # Étapes dont le résultat ne dépend que du contenu visuel
+
+# Hachages connus (porteurs malveillants) : filtre de Bloom + index trié
+KNOWN_HASH_DB = os.getenv('KNOWN_HASH_DB') or None  # Base <chemin>.bloom / <chemin>.idx (None = désactivé)
+KNOWN_HASH_FP_RATE = 0.001     # Taux de faux positifs du filtre (confirmés ensuite dans l'index)
+
+# Index plein texte (SQLite FTS5) des textes extraits
+TEXT_INDEX_PATH = os.getenv('TEXT_INDEX_PATH') or None  # Base SQLite (None = désactivé)
+TEXT_INDEX_BATCH_SIZE = 100    # Analyses écrites par transaction
+TEXT_INDEX_MAX_CHARS = 100_000  # Caractères indexés au plus par texte
+TEXT_SEARCH_LIMIT = 20         # Résultats affichés au plus par recherche
+
+# Mode démon : surveillance de dossiers de dépôt (--watch)
+WATCH_POLL_INTERVAL = 2.0      # Secondes entre deux parcours sans inotify
+WATCH_SETTLE_SECONDS = 3.0     # Taille et mtime stables depuis N s avant analyse (écriture terminée)
+WATCH_RESCAN_INTERVAL = 300    # Parcours de rattrapage avec inotify (événements perdus)
+WATCH_SAVE_INTERVAL = 30       # Sauvegarde du manifeste au plus tard toutes les N s
+WATCH_MANIFEST_NAME = '.decodeur_manifest.json'  # Manifeste par défaut (dossier de sortie)
+
+# Reprise du mode batch (checkpoint)
+CHECKPOINT_NAME = '.decodeur_checkpoint.jsonl'  # Journal par défaut (dossier de sortie)
+CHECKPOINT_FSYNC_INTERVAL = 100  # fsync du journal toutes les N images terminées
+
+# File de travaux multi-machines (--queue / --worker)
+QUEUE_LEASE_SECONDS = 300      # Bail d'un travail pris, prolongé toutes les LEASE/3 s tant que le worker vit
+QUEUE_MAX_ATTEMPTS = 3         # Prises max avant quarantaine (échecs ou plantages du décodeur)
+QUEUE_RETRY_DELAY = 30         # Délai avant un nouvel essai, doublé à chaque tentative
+QUEUE_POLL_INTERVAL = 2.0      # Attente d'un worker quand la file est vide
+QUEUE_JOB_TIMEOUT = 3600       # Durée max d'un travail (s) avant arrêt du worker pour relance; 0 = aucune
+
+# Garde-fous contre les fichiers hostiles
+MAX_IMAGE_PIXELS = 250_000_000  # Pixels déclarés max (largeur × hauteur), lus dans l'en-tête avant décodage
+MAX_FILE_SIZE_MB = 512         # Taille max d'une image (les vidéos sont lues en flux)
+DECODE_MAX_RSS_MB = 2048       # --isolate-decode : mémoire résidente max du processus de décodage
+DECODE_TIMEOUT = 60            # --isolate-decode : durée max du décodage (s)
+STAGE_TIMEOUT = 300            # Durée max d'une étape (s), None = illimitée
+STAGE_TIMEOUTS = {             # Délais propres à certaines étapes (s)
+    'frames': 900,
+    'recursion': 900,
+}
+
+# Export colonnaire (Parquet / Arrow IPC)
+EXPORT_ROW_GROUP_SIZE = 10000  # Lignes par row group
+
+# Rapport PDF
+PDF_THUMBNAIL_MAX_SIDE = 512   # Côté max (px) de la miniature JPEG embarquée
+PDF_THUMBNAIL_QUALITY = 80     # Qualité JPEG de la miniature
+PDF_WORKERS = 1                # Threads de rendu PDF en arrière-plan
+
+# Rapport de cas consolidé (mode batch)
+CASE_REPORT_FLAG_LEVELS = ['medium', 'high']  # Niveaux ayant une page de détail
+CASE_REPORT_TABLE_CHUNK = 200                  # Lignes par tableau récapitulatif
+CASE_REPORT_LOOKAHEAD = 16                     # Flowables lus d'avance au rendu (groupes keepWithNext)
+
+# ============================================================================
+# OCR
+# ============================================================================
+
+# Tesseract : exécutable pour pytesseract (appliqué seulement s'il existe)
+TESSERACT_CMD = os.getenv('TESSERACT_CMD', r'C:\Program Files\Tesseract-OCR\tesseract.exe')
+OCR_TESSERACT_BACKEND = os.getenv('OCR_TESSERACT_BACKEND', 'auto')  # 'auto', 'tesserocr' ou 'pytesseract'
+OCR_TESSERACT_POOL_SIZE = 0     # Moteurs tesserocr initialisés par langue (0 = nombre de cœurs)
+
+# Langues OCR (codes EasyOCR), surchargées par --ocr-lang
+OCR_LANGUAGES = os.getenv('OCR_LANGUAGES', 'en,fr').split(',')
+
+# Code EasyOCR -> (code Tesseract, écriture rapportée par l'OSD Tesseract)
+OCR_LANGUAGE_CODES = {
+    'en': ('eng', 'Latin'),
+    'fr': ('fra', 'Latin'),
+    'de': ('deu', 'Latin'),
+    'es': ('spa', 'Latin'),
+    'it': ('ita', 'Latin'),
+    'pt': ('por', 'Latin'),
+    'nl': ('nld', 'Latin'),
+    'ru': ('rus', 'Cyrillic'),
+    'uk': ('ukr', 'Cyrillic'),
+    'ar': ('ara', 'Arabic'),
+    'fa': ('fas', 'Arabic'),
+    'ch_sim': ('chi_sim', 'Han'),
+    'ch_tra': ('chi_tra', 'Han'),
+    'ja': ('jpn', 'Japanese'),
+    'ko': ('kor', 'Hangul'),
+}
+
+# Détection d'écriture (OSD) avant l'OCR : seuls les modèles utiles sont chargés
+OCR_SCRIPT_MIN_CONF = 2.0       # Confiance OSD minimale pour restreindre les langues
+OCR_SCRIPT_MAX_SIDE = 2000      # Côté max de l'image réduite passée à l'OSD
+
+# Mode tuilé pour les très grandes images
+OCR_TILE_SIZE = 1024                     # Côté d'une tuile (px)
+OCR_TILE_OVERLAP = 128                   # Recouvrement entre tuiles (px), > hauteur d'une ligne
+OCR_TILE_THRESHOLD_PIXELS = 16_000_000   # Mode 'auto' : tuilage au-delà de 16 MP
+OCR_TILE_WORKERS = 0                     # Threads du pool OCR partagé (0 = nombre de cœurs)
+
+# Pré-passe de proposition de régions de texte
+OCR_REGION_MAX_SIDE = 1600      # Côté max de l'image réduite analysée par le détecteur
+OCR_REGION_MAX_COUNT = 200      # Au-delà : document dense, OCR sur l'image entière
+OCR_REGION_MAX_COVERAGE = 0.5   # Au-delà de cette couverture, OCR sur l'image entière
+OCR_REGION_PADDING = 8          # Marge (px) autour de chaque région
+
+# Variantes de pré-traitement OCR (texte peu contrasté / caché)
+OCR_VARIANTS = ['clahe', 'adaptive', 'inverted', 'channels', 'lsb']
+OCR_VARIANT_TOP_K = 3           # Variantes reconnues en plus de l'image normalisée
+OCR_VARIANT_MIN_GAIN = 0.25     # Part min. de contours de texte invisibles sur la référence
+OCR_VARIANT_MIN_DIFF = 2.0      # Écart moyen min. (niveaux de gris) à la référence et aux variantes retenues
+
+# Micro-batching EasyOCR (mode batch)
+OCR_BATCH_SIZE = 8              # Entrées max par appel readtext_batched
+OCR_BATCH_MAX_WAIT = 0.05       # Attente max (s) avant d'envoyer un lot incomplet
+OCR_BATCH_CANVASES = [          # Toiles (hauteur, largeur) : entrée complétée jusqu'à la plus petite qui la contient
+    (64, 512), (64, 1024), (64, 2048),      # Lignes de texte (régions candidates)
+    (128, 1024), (128, 2048),               # Grandes lignes, blocs de deux lignes
+    (512, 512), (1024, 1024)                # Blocs, tuiles du mode tuilé
+]
+OCR_RECOGNIZER_BATCH_SIZE = 8   # batch_size du reconnaisseur EasyOCR (lignes de texte par passe du réseau)
+
+# Mode batch
+BATCH_WORKERS = 1               # Images analysées en parallèle
+
+# Options par défaut de ForensicAnalyzer (surchargées par la CLI)
+ANALYSIS_OPTIONS = {
+    'ocr_tiling': 'auto',   # 'auto', 'on' ou 'off'
+    'ocr_regions': True,    # Pré-passe de détection de régions de texte
+    'ocr_variants': False,  # Variantes de pré-traitement reconnues en parallèle
+    'ocr_languages': OCR_LANGUAGES,   # Langues OCR (codes EasyOCR)
+    'ocr_script_detection': False,    # Détection d'écriture avant de charger les modèles
+    'max_frames': MAX_FRAMES,         # Frames supplémentaires analysées (0 = première seule)
+    'video_sampling': VIDEO_SAMPLING,     # Échantillonnage des frames vidéo
+    'video_stride': VIDEO_FRAME_STRIDE,   # Pas en mode 'stride'
+    'carve_dir': None,      # Dossier d'extraction des fichiers incrustés (None = étendue et hachage seuls)
+    'recursive': False,     # Analyse récursive des fichiers extraits (nécessite carve_dir)
+    'recursion_depth': RECURSION_MAX_DEPTH,   # Profondeur d'imbrication max
+    'recursion_budget': RECURSION_MAX_BYTES,  # Octets analysés au total
+    'skip_analyzers': [],   # Analyseurs désactivés (noms du registre, cf. --list-analyzers)
+    'max_cost': None,       # Coût estimé max d'un analyseur (None = tous)
+    'reuse_duplicates': False,  # Reprendre l'OCR d'un quasi-doublon déjà analysé au lieu de le refaire
+    'known_hash_short_circuit': True,  # Porteur connu : étapes d'analyse et LLM non exécutés
+    'max_image_pixels': MAX_IMAGE_PIXELS,   # Pixels déclarés max (None = illimité)
+    'max_file_size_mb': MAX_FILE_SIZE_MB,   # Taille max d'une image (None = illimitée)
+    'isolate_decode': False,    # Décodage dans un processus séparé à mémoire surveillée
+    'decode_max_rss_mb': DECODE_MAX_RSS_MB,
+    'stage_timeout': STAGE_TIMEOUT,         # Délai par défaut d'une étape (None = illimité)
+}
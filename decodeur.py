@@ -11,14 +11,23 @@ Version: 1.0.0
 """
 
 import argparse
+import copy
+import hashlib
+import html
 import os
 import sys
 import json
 import re
+import signal
 import struct
+import tempfile
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterator, Iterable, Callable
 
 import cv2
 import numpy as np
@@ -27,26 +36,47 @@ from PIL.ExifTags import TAGS
 import piexif
 from colorama import init, Fore, Style
 from stegano import lsb
-import pytesseract
-import easyocr
 
 from llm_analyzer import IntelligentForensicAnalyzer
 LLM_AVAILABLE = True
 
+import ocr_engine
+import png_parser
+import jpeg_parser
+import carver
+import byte_entropy
+import payload_decoder
+import perceptual_hash
+import known_hashes
+import text_index
+import job_queue
+import resource_guard
+from manifest import Manifest, Checkpoint
+from watcher import FolderWatcher
+from analyzer_registry import AnalyzerSpec, REGISTRY
+from config import (
+    ANALYSIS_OPTIONS, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, VIDEO_SAMPLING, VIDEO_FRAME_STRIDE,
+    VIDEO_SCENE_THRESHOLD, VIDEO_WORKERS, PDF_THUMBNAIL_MAX_SIDE, PDF_THUMBNAIL_QUALITY, PDF_WORKERS,
+    CASE_REPORT_FLAG_LEVELS, CASE_REPORT_TABLE_CHUNK, CASE_REPORT_LOOKAHEAD,
+    BATCH_WORKERS, OCR_BATCH_SIZE, OCR_BATCH_MAX_WAIT, OCR_RECOGNIZER_BATCH_SIZE, OCR_LANGUAGES, MAX_FRAMES,
+    RECURSION_MAX_DEPTH, RECURSION_MAX_BYTES, RECURSION_MAX_NODES, RECURSION_WORKERS,
+    ENTROPY_THRESHOLD, KNOWN_HASH_DB, STAGE_TIMEOUTS, STAGE_TIMEOUT, MAX_IMAGE_PIXELS, MAX_FILE_SIZE_MB,
+    DECODE_MAX_RSS_MB, QUEUE_JOB_TIMEOUT, TEXT_INDEX_PATH, WATCH_MANIFEST_NAME, CHECKPOINT_NAME, DUPLICATE_INDEX_PATH, DUPLICATE_REUSE_DISTANCE, DUPLICATE_REUSE_STAGES
+)
+from exporters import ColumnarFindingsWriter
+
 # ReportLab pour PDF
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm, mm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as RLImage
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image as RLImage
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.graphics.shapes import Drawing, PolyLine, Line, String
 
 # Initialiser colorama pour Windows
 init(autoreset=True)
 
-# Configuration Tesseract (adapter le chemin selon l'installation)
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
 # ============================================================================
 # CONSTANTES
 # ============================================================================
@@ -69,6 +99,9 @@ BINARY_SIGNATURES = {
     'TAR': b'ustar',
 }
 
+# Ordre des niveaux de suspicion (tri des rapports de cas)
+SUSPICION_ORDER = {'none': 0, 'low': 1, 'medium': 2, 'high': 3}
+
 # Patterns pour la recherche de chaînes
 STRING_PATTERNS = [
     r'FLAG\{[^}]+\}',
@@ -81,6 +114,33 @@ STRING_PATTERNS = [
     r'key[:\s=]+[a-fA-F0-9]{16,}',
 ]
 
+# Analyseurs intégrés : méthode de ForensicAnalyzer, entrées/sorties, coût
+# estimé (1 = une passe NumPy sur l'image). Les plugins s'ajoutent au registre.
+BUILTIN_ANALYZERS = [
+    AnalyzerSpec('ocr', 'analyze_ocr', inputs=['pixels'], cost=10),
+    AnalyzerSpec('lsb', 'analyze_lsb', inputs=['file'], cost=2),
+    AnalyzerSpec('png', 'analyze_png_structure', inputs=['raw_bytes'], cost=0.1, formats=['PNG']),
+    AnalyzerSpec('jpeg', 'analyze_jpeg_structure', inputs=['raw_bytes'], cost=0.1, formats=['JPEG']),
+    AnalyzerSpec('exif', 'analyze_exif', inputs=['raw_bytes', 'png', 'jpeg'], cost=0.2),
+    AnalyzerSpec('strings', 'analyze_strings', inputs=['raw_bytes', 'png', 'jpeg'],
+                 outputs=['ascii_strings'], cost=0.5),
+    AnalyzerSpec('signatures', 'detect_signatures', inputs=['raw_bytes'],
+                 outputs=['binary_signatures'], cost=0.2),
+    AnalyzerSpec('carving', 'carve_payloads', inputs=['raw_bytes', 'binary_signatures'],
+                 outputs=['carved'], cost=0.5),
+    AnalyzerSpec('bitplanes', 'analyze_bitplanes', inputs=['pixels'], cost=1, parallel=True),
+    AnalyzerSpec('histogram', 'analyze_histogram', inputs=['pixels'], cost=1, parallel=True),
+    AnalyzerSpec('dct', 'analyze_dct', inputs=['pixels', 'jpeg'], cost=3, formats=['JPEG'], parallel=True),
+    AnalyzerSpec('entropy', 'analyze_byte_entropy', inputs=['raw_bytes', 'png', 'jpeg'], cost=1, parallel=True),
+    AnalyzerSpec('frames', 'analyze_frames', inputs=['file'], cost=5),
+    AnalyzerSpec('decoding', 'decode_payloads', inputs=['lsb', 'exif', 'frames', 'png', 'jpeg'],
+                 outputs=['decoded'], cost=0.5),
+    AnalyzerSpec('recursion', 'analyze_nested', inputs=['carved'], cost=20,
+                 enabled=lambda options: bool(options.get('recursive'))),
+]
+for _spec in BUILTIN_ANALYZERS:
+    REGISTRY.register(_spec)
+
 # ============================================================================
 # CLASSES D'ANALYSE
 # ============================================================================
@@ -88,19 +148,30 @@ STRING_PATTERNS = [
 class ForensicAnalyzer:
     """Classe principale pour l'analyse forensique d'images."""
     
-    def __init__(self, image_path: str, verbose: bool = False):
+    def __init__(self, image_path: str, verbose: bool = False,
+                 options: Optional[Dict[str, Any]] = None,
+                 ocr_batcher: Optional[ocr_engine.EasyOCRBatcher] = None,
+                 duplicate_index: Optional[perceptual_hash.DuplicateIndex] = None,
+                 hash_database: Optional[known_hashes.KnownHashDatabase] = None):
         self.image_path = Path(image_path)
         self.verbose = verbose
+        self.options: Dict[str, Any] = {**ANALYSIS_OPTIONS, **(options or {})}
+        self.ocr_batcher = ocr_batcher
+        self.duplicate_index = duplicate_index
+        self.hash_database = hash_database
         self.results: Dict[str, Any] = {
             'image': str(self.image_path.name),
             'image_path': str(self.image_path.absolute()),
             'analysis_date': datetime.now().isoformat(),
+            'file_info': {},
+            'timings': {},
             'ocr': {},
             'steganography': {
                 'lsb': None,
                 'exif': {},
                 'ascii_strings': [],
                 'binary_signatures': [],
+                'carved': [],
                 'bit_plane_anomaly': False,
                 'histogram_anomaly': False
             },
@@ -116,6 +187,12 @@ class ForensicAnalyzer:
         self.cv_image = None
         self.pil_image = None
         self.raw_bytes = None
+        self.channel_histograms: Dict[str, np.ndarray] = {}
+        self._png_structure: Optional[Dict[str, Any]] = None
+        self._jpeg_structure: Optional[Dict[str, Any]] = None
+        self._closest_duplicate: Optional[Dict[str, Any]] = None
+        # Fusion des étapes à délai dans self.results (étapes parallèles)
+        self._results_lock = threading.Lock()
         self._load_image()
     
     def _load_image(self):
@@ -123,31 +200,55 @@ class ForensicAnalyzer:
         if not self.image_path.exists():
             raise FileNotFoundError(f"Image non trouvée: {self.image_path}")
         
-        # Charger avec OpenCV
-        self.cv_image = cv2.imread(str(self.image_path))
-        if self.cv_image is None:
-            raise ValueError(f"Impossible de charger l'image: {self.image_path}")
+        # Garde-fous : taille et dimensions déclarées vérifiées avant tout décodage
+        resource_guard.check_header(self.image_path, self.options['max_image_pixels'],
+                                    self.options['max_file_size_mb'])
+        
+        # Charger avec OpenCV (première frame uniquement pour GIF/APNG/TIFF)
+        if self.options['isolate_decode']:
+            self.cv_image = resource_guard.decode_isolated(self.image_path, self.options['decode_max_rss_mb'],
+                                                           max_pixels=self.options['max_image_pixels'])
+        else:
+            self.cv_image = cv2.imread(str(self.image_path))
         
         # Charger avec PIL
         self.pil_image = Image.open(self.image_path)
+        if self.cv_image is None:
+            # Formats non lus par OpenCV : première frame décodée par PIL
+            try:
+                self.cv_image = cv2.cvtColor(np.asarray(self.pil_image.convert('RGB')), cv2.COLOR_RGB2BGR)
+            except Exception:
+                raise ValueError(f"Impossible de charger l'image: {self.image_path}")
         
         # Lire les bytes bruts
         with open(self.image_path, 'rb') as f:
             self.raw_bytes = f.read()
         
+        # Identité du fichier (hash, taille, dimensions)
+        height, width = self.cv_image.shape[:2]
+        self.results['file_info'] = {
+            'sha256': hashlib.sha256(self.raw_bytes).hexdigest(),
+            'size_bytes': len(self.raw_bytes),
+            'width': int(width),
+            'height': int(height),
+            'channels': int(self.cv_image.shape[2]) if self.cv_image.ndim == 3 else 1,
+            'format': self.pil_image.format,
+            'frames': self.frame_count()
+        }
+        
         if self.verbose:
             print(f"{Fore.CYAN}[INFO] Image chargée: {self.image_path.name}")
             print(f"{Fore.CYAN}[INFO] Dimensions: {self.cv_image.shape}")
             print(f"{Fore.CYAN}[INFO] Taille: {len(self.raw_bytes)} bytes")
     
-    def preprocess_image(self) -> np.ndarray:
-        """Pré-traitement de l'image pour l'analyse."""
-        gray = cv2.cvtColor(self.cv_image, cv2.COLOR_BGR2GRAY)
+    def preprocess_image(self, image: Optional[np.ndarray] = None) -> np.ndarray:
+        """Pré-traitement de l'image (ou d'une frame) pour l'analyse."""
+        gray = cv2.cvtColor(self.cv_image if image is None else image, cv2.COLOR_BGR2GRAY)
         
         # Normalisation
         normalized = cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
         
-        if self.verbose:
+        if self.verbose and image is None:
             print(f"{Fore.CYAN}[INFO] Pré-traitement effectué (grayscale + normalisation)")
         
         return normalized
@@ -160,43 +261,80 @@ class ForensicAnalyzer:
         """Extrait le texte visible avec OCR."""
         print(f"\n{Fore.YELLOW}[ANALYSE] OCR - Détection de texte visible...")
         
-        gray = self.preprocess_image()
+        ocr_results = self._recognize_text(self.cv_image, self.preprocess_image())
+        self.results['ocr'] = ocr_results
+        return ocr_results
+    
+    def _recognize_text(self, bgr: np.ndarray, gray: np.ndarray, quiet: bool = False) -> Dict[str, Any]:
+        """OCR d'une image (ou d'une frame) : plan, langues puis moteurs."""
+        verbose = self.verbose and not quiet
         ocr_results = {
             'tesseract': {'text': '', 'success': False},
-            'easyocr': {'text': '', 'success': False}
+            'easyocr': {'text': '', 'success': False},
+            'mode': 'full'
         }
         
-        # Tesseract OCR
-        try:
-            # Try English only first (French may not be installed)
-            text_tesseract = pytesseract.image_to_string(gray, lang='eng')
-            text_tesseract = text_tesseract.strip()
-            ocr_results['tesseract'] = {
-                'text': text_tesseract,
-                'success': bool(text_tesseract)
-            }
-            if self.verbose:
-                print(f"{Fore.CYAN}[TESSERACT] Texte détecté: {len(text_tesseract)} caractères")
-        except Exception as e:
-            if self.verbose:
-                print(f"{Fore.RED}[TESSERACT] Erreur: {e}")
+        # Pré-passe : l'OCR ne tourne que là où du texte est probable
+        # (régions candidates, tuiles pour les très grandes images)
+        use_regions = self.options['ocr_regions']
+        tiling_mode = self.options['ocr_tiling']
+        if self.options['ocr_variants']:
+            # Variantes (CLAHE, seuil adaptatif, ...) classées par leur gain sur la référence
+            selected = ocr_engine.select_variants(bgr, gray, use_regions, tiling_mode)
+            ocr_results['variants'] = {name: round(plan['score'], 2) for name, _, plan in selected[1:]}
+        else:
+            selected = [('normalized', gray, ocr_engine.plan_recognition(gray, use_regions, tiling_mode))]
+        
+        baseline_plan = selected[0][2]
+        ocr_results['mode'] = baseline_plan['mode']
+        if use_regions:
+            ocr_results['regions'] = len(baseline_plan['regions'] or [])
+        if 'tiles' in baseline_plan:
+            ocr_results['tiles'] = baseline_plan['tiles']
+        
+        selected = [item for item in selected if item[2]['mode'] != 'skipped']
+        if not selected:
+            ocr_results['mode'] = 'skipped'
+            if verbose:
+                print(f"{Fore.CYAN}[OCR] Aucune région de texte candidate, OCR ignoré")
+            return ocr_results
+        
+        # Langues : seules celles de l'écriture détectée chargent un modèle
+        langs = list(self.options['ocr_languages'])
+        if self.options['ocr_script_detection']:
+            script = ocr_engine.detect_script(gray)
+            ocr_results['script'] = script
+            langs = ocr_engine.languages_for_script(langs, script)
+        ocr_results['languages'] = langs
+        tess_lang = ocr_engine.tesseract_lang(langs)
+        
+        if verbose:
+            print(f"{Fore.CYAN}[OCR] Mode: {ocr_results['mode']} | "
+                  f"Variantes: {', '.join(name for name, _, _ in selected)} | "
+                  f"Langues: {', '.join(langs)}")
+        
+        engines = {
+            'tesseract': (lambda img: ocr_engine.tesseract_text(img, tess_lang),
+                          lambda img: ocr_engine.tesseract_boxes(img, tess_lang)),
+            'easyocr': (lambda img: ocr_engine.easyocr_text(img, langs, self.ocr_batcher),
+                        lambda img: ocr_engine.easyocr_boxes(img, langs, self.ocr_batcher)),
+        }
         
-        # EasyOCR
-        try:
-            reader = easyocr.Reader(['en', 'fr'], gpu=False, verbose=False)
-            results = reader.readtext(gray, detail=0)
-            text_easyocr = ' '.join(results).strip()
-            ocr_results['easyocr'] = {
-                'text': text_easyocr,
-                'success': bool(text_easyocr)
-            }
-            if self.verbose:
-                print(f"{Fore.CYAN}[EASYOCR] Texte détecté: {len(text_easyocr)} caractères")
-        except Exception as e:
-            if self.verbose:
-                print(f"{Fore.RED}[EASYOCR] Erreur: {e}")
+        for name, (recognize_text, recognize_boxes) in engines.items():
+            try:
+                text, productive = ocr_engine.recognize_variants(selected, recognize_text, recognize_boxes)
+                ocr_results[name] = {
+                    'text': text,
+                    'success': bool(text)
+                }
+                if self.options['ocr_variants']:
+                    ocr_results[name]['variants'] = productive
+                if verbose:
+                    print(f"{Fore.CYAN}[{name.upper()}] Texte détecté: {len(text)} caractères")
+            except Exception as e:
+                if verbose:
+                    print(f"{Fore.RED}[{name.upper()}] Erreur: {e}")
         
-        self.results['ocr'] = ocr_results
         return ocr_results
     
     # ========================================================================
@@ -213,7 +351,7 @@ class ForensicAnalyzer:
                 print(f"{Fore.CYAN}[LSB] Format non optimal ({self.image_path.suffix}), tentative quand même...")
         
         try:
-            hidden_message = lsb.reveal(str(self.image_path))
+            hidden_message = self._reveal_lsb(str(self.image_path))
             if hidden_message:
                 self.results['steganography']['lsb'] = hidden_message
                 self.results['summary']['extraction_success'] = True
@@ -229,6 +367,11 @@ class ForensicAnalyzer:
         
         return None
     
+    @staticmethod
+    def _reveal_lsb(source) -> Optional[str]:
+        """Message LSB (stegano) d'un fichier ou d'une image PIL."""
+        return lsb.reveal(source)
+    
     # ========================================================================
     # MÉTHODE 3: Analyse EXIF
     # ========================================================================
@@ -273,9 +416,16 @@ class ForensicAnalyzer:
                 print(f"{Fore.CYAN}[EXIF/PIL] {e}")
         
         # Extraction avec piexif pour plus de détails
+        # (JPEG : segment APP1 déjà localisé par le parcours des segments, pas de relecture)
         try:
-            if self.image_path.suffix.lower() in ['.jpg', '.jpeg', '.tiff']:
-                piexif_dict = piexif.load(str(self.image_path))
+            jpeg = self.jpeg_structure()
+            exif_source = None
+            if jpeg:
+                exif_source = jpeg_parser.exif_payload(self.raw_bytes, jpeg)
+            elif self.image_path.suffix.lower() in ['.tif', '.tiff']:
+                exif_source = self.raw_bytes
+            if exif_source:
+                piexif_dict = piexif.load(exif_source)
                 for ifd in ['0th', '1st', 'Exif', 'GPS', 'Interop']:
                     if ifd in piexif_dict and piexif_dict[ifd]:
                         for tag, value in piexif_dict[ifd].items():
@@ -290,18 +440,28 @@ class ForensicAnalyzer:
             if self.verbose:
                 print(f"{Fore.CYAN}[EXIF/piexif] {e}")
         
-        # Vérifier les commentaires PNG
-        if self.image_path.suffix.lower() == '.png':
-            try:
-                if hasattr(self.pil_image, 'info') and self.pil_image.info:
-                    for key, value in self.pil_image.info.items():
-                        if key not in ['dpi', 'gamma']:
-                            exif_data['comments'].append({
-                                'field': f'PNG:{key}',
-                                'value': str(value)
-                            })
-            except:
-                pass
+        # Commentaires JPEG (segments COM)
+        jpeg = self.jpeg_structure()
+        if jpeg:
+            for comment in jpeg['comments']:
+                if comment['value'].strip():
+                    exif_data['comments'].append({
+                        'field': 'JPEG:COM',
+                        'value': comment['value']
+                    })
+        
+        # Commentaires PNG : chunks tEXt/zTXt/iTXt repérés par le parcours des chunks
+        png = self.png_structure()
+        if png:
+            for entry in png['text']:
+                text = png_parser.read_text(self.raw_bytes, entry)
+                if text.get('value'):
+                    exif_data['comments'].append({
+                        'field': f"PNG:{entry['keyword']}",
+                        'value': text['value']
+                    })
+                if text.get('capped') and self.verbose:
+                    print(f"{Fore.YELLOW}[EXIF/PNG] Texte {entry['chunk']} tronqué à la décompression")
         
         self.results['steganography']['exif'] = exif_data
         
@@ -332,30 +492,20 @@ class ForensicAnalyzer:
             matches = re.findall(pattern, text_content, re.IGNORECASE)
             found_strings.extend(matches)
         
-        # Chercher après la fin normale de l'image
-        image_end_markers = {
-            'jpeg': b'\xff\xd9',
-            'png': b'IEND',
-        }
-        
-        suffix = self.image_path.suffix.lower()
-        if suffix in ['.jpg', '.jpeg']:
-            marker = image_end_markers['jpeg']
-        elif suffix == '.png':
-            marker = image_end_markers['png']
-        else:
-            marker = None
+        # Chercher après la fin normale de l'image (IEND / EOI exacts, donnés
+        # par le parcours des chunks PNG ou des segments JPEG)
+        trailing_data = None
+        structure = self.png_structure() or self.jpeg_structure()
+        if structure and structure['trailing']:
+            trailing_data = self.raw_bytes[structure['trailing']['offset']:]
         
-        if marker:
-            marker_pos = self.raw_bytes.rfind(marker)
-            if marker_pos != -1 and marker_pos < len(self.raw_bytes) - len(marker) - 10:
-                trailing_data = self.raw_bytes[marker_pos + len(marker):]
-                try:
-                    trailing_text = trailing_data.decode('utf-8', errors='ignore').strip()
-                    if trailing_text and len(trailing_text) > 3:
-                        found_strings.append(f"[TRAILING DATA] {trailing_text[:200]}")
-                except:
-                    pass
+        if trailing_data:
+            try:
+                trailing_text = trailing_data.decode('utf-8', errors='ignore').strip()
+                if trailing_text and len(trailing_text) > 3:
+                    found_strings.append(f"[TRAILING DATA] {trailing_text[:200]}")
+            except:
+                pass
         
         # Dédupliquer
         found_strings = list(set(found_strings))
@@ -367,6 +517,128 @@ class ForensicAnalyzer:
         
         return found_strings
     
+    # ========================================================================
+    # MÉTHODE 9: Structure PNG (chunks)
+    # ========================================================================
+    
+    def png_structure(self) -> Optional[Dict[str, Any]]:
+        """Parcours des chunks PNG, effectué une seule fois (None si pas un PNG)."""
+        if self._png_structure is None and self.raw_bytes and png_parser.is_png(self.raw_bytes):
+            self._png_structure = png_parser.parse_png(self.raw_bytes)
+        return self._png_structure
+    
+    def analyze_png_structure(self) -> Optional[Dict[str, Any]]:
+        """Vérifie la structure PNG : CRC, chunks inconnus, données après IEND."""
+        png = self.png_structure()
+        if png is None:
+            return None
+        
+        print(f"\n{Fore.YELLOW}[ANALYSE] PNG - Structure des chunks...")
+        self.results['steganography']['png'] = png
+        
+        if self.verbose:
+            counts = ', '.join(f"{name}×{count}" for name, count in png['chunk_counts'].items())
+            print(f"{Fore.CYAN}[PNG] Chunks: {counts}")
+            for anomaly in png['anomalies']:
+                print(f"{Fore.RED}[PNG] {anomaly}")
+            if not png['anomalies']:
+                print(f"{Fore.CYAN}[PNG] Structure conforme")
+        
+        return png
+    
+    # ========================================================================
+    # MÉTHODE 10: Structure JPEG (segments) et statistiques DCT
+    # ========================================================================
+    
+    def jpeg_structure(self) -> Optional[Dict[str, Any]]:
+        """Parcours des segments JPEG, effectué une seule fois (None si pas un JPEG)."""
+        if self._jpeg_structure is None and self.raw_bytes and jpeg_parser.is_jpeg(self.raw_bytes):
+            self._jpeg_structure = jpeg_parser.parse_jpeg(self.raw_bytes)
+        return self._jpeg_structure
+    
+    def analyze_jpeg_structure(self) -> Optional[Dict[str, Any]]:
+        """Vérifie la structure JPEG : segments APPn/COM, tables, données après EOI."""
+        jpeg = self.jpeg_structure()
+        if jpeg is None:
+            return None
+        
+        print(f"\n{Fore.YELLOW}[ANALYSE] JPEG - Structure des segments...")
+        self.results['steganography']['jpeg'] = jpeg
+        
+        if self.verbose:
+            apps = ', '.join(f"{app['marker']}:{app['identifier'] or '?'}" for app in jpeg['app']) or 'aucun'
+            print(f"{Fore.CYAN}[JPEG] Segments: {len(jpeg['segments'])} | APPn: {apps} | Scans: {jpeg['scans']}")
+            for anomaly in jpeg['anomalies']:
+                print(f"{Fore.RED}[JPEG] {anomaly}")
+        
+        return jpeg
+    
+    def analyze_dct(self) -> Optional[Dict[str, Any]]:
+        """
+        Statistiques des coefficients DCT de luminance : test du chi² (JSteg) et
+        estimation de rétrécissement calibrée (F5). Pertinent là où le LSB des
+        pixels décodés ne l'est pas.
+        """
+        jpeg = self.jpeg_structure()
+        if jpeg is None or not jpeg['quantization']:
+            return None
+        
+        print(f"\n{Fore.YELLOW}[ANALYSE] DCT - Coefficients JPEG (JSteg / F5)...")
+        dct = jpeg_parser.dct_statistics(self.cv_image, jpeg, str(self.image_path))
+        if dct is None:
+            return None
+        self.results['steganography']['dct'] = dct
+        
+        if self.verbose:
+            print(f"{Fore.CYAN}[DCT] Source: {dct['source']} | Blocs: {dct['blocks']} | "
+                  f"Zéros AC: {dct['zero_ratio']:.1%}")
+            print(f"{Fore.CYAN}[DCT] JSteg (chi²): {dct['jsteg']['probability']:.3f} | "
+                  f"F5 (β): {jpeg_parser.format_f5_beta(dct, 3)}")
+        
+        return dct
+    
+    # ========================================================================
+    # MÉTHODE 12: Carte d'entropie des octets bruts
+    # ========================================================================
+    
+    def _expected_entropy_ranges(self) -> Optional[List[List[int]]]:
+        """
+        Plages [début, fin) où une entropie élevée est normale : flux de données
+        image (IDAT/fdAT, scans JPEG), profils ICC et textes compressés PNG,
+        segment APP1 Exif JPEG (miniature). None si le format n'est pas parcouru.
+        """
+        png = self.png_structure()
+        if png:
+            ranges = [list(r) for r in png['image_data_ranges']]
+            ranges += [[chunk['offset'], chunk['offset'] + 12 + chunk['length']]
+                       for chunk in png['chunks'] if chunk['type'] in ('iCCP', 'zTXt', 'iTXt')]
+            return ranges
+        jpeg = self.jpeg_structure()
+        if jpeg:
+            ranges = [list(r) for r in jpeg['image_data_ranges']]
+            ranges += [[app['offset'], app['offset'] + 2 + app['length']]
+                       for app in jpeg['app'] if app['identifier'] == 'Exif']
+            return ranges
+        return None
+    
+    def analyze_byte_entropy(self) -> Dict[str, Any]:
+        """
+        Entropie des octets bruts par fenêtre glissante : localise les charges
+        chiffrées ou compressées hors du flux de données image.
+        """
+        print(f"\n{Fore.YELLOW}[ANALYSE] ENTROPIE - Carte d'entropie des octets...")
+        entropy = byte_entropy.scan_entropy(self.raw_bytes, self._expected_entropy_ranges())
+        self.results['steganography']['entropy'] = entropy
+        
+        if self.verbose:
+            print(f"{Fore.CYAN}[ENTROPIE] Fenêtre: {entropy['window']} o (pas {entropy['step']}) | "
+                  f"Max: {entropy['max']:.3f} | Moyenne: {entropy['mean']:.3f}")
+            for region in entropy['regions']:
+                print(f"{Fore.RED}[ENTROPIE] Région {region['hex_offset']} ({region['length']} octets) : "
+                      f"{region['max_entropy']:.3f} bits/octet")
+        
+        return entropy
+    
     # ========================================================================
     # MÉTHODE 5: Détection de signatures binaires
     # ========================================================================
@@ -406,6 +678,28 @@ class ForensicAnalyzer:
         
         return found_signatures
     
+    def carve_payloads(self) -> List[Dict[str, Any]]:
+        """
+        Extrait les fichiers incrustés : étendue validée par la structure du format
+        (EOCD, %%EOF, IEND, EOI, fin du flux GZIP, en-têtes 7Z/RAR), écriture par
+        tranches dans `carve_dir` si fourni, SHA-256/MD5 de chaque charge utile.
+        """
+        signatures = self.results['steganography']['binary_signatures']
+        if not signatures:
+            return []
+        
+        print(f"\n{Fore.YELLOW}[ANALYSE] CARVING - Extraction des fichiers incrustés...")
+        carved = carver.carve_payloads(self.raw_bytes, signatures, self.options['carve_dir'])
+        self.results['steganography']['carved'] = carved
+        
+        if self.verbose:
+            for entry in carved:
+                where = entry.get('path') or entry.get('skipped') or 'non écrit'
+                print(f"{Fore.CYAN}[CARVING] {entry['type']} @ {hex(entry['offset'])} "
+                      f"({entry['length']} octets) -> {where}")
+        
+        return carved
+    
     # ========================================================================
     # MÉTHODE 6: Analyse des bit-planes
     # ========================================================================
@@ -414,7 +708,23 @@ class ForensicAnalyzer:
         """Analyse les plans de bits pour détecter des anomalies."""
         print(f"\n{Fore.YELLOW}[ANALYSE] BIT-PLANES - Analyse des bits faibles...")
         
-        gray = cv2.cvtColor(self.cv_image, cv2.COLOR_BGR2GRAY)
+        anomaly, details, lsb_plane = self._bitplane_stats(self.cv_image)
+        entropy, lsb_ratio = details['lsb_entropy'], details['lsb_ratio']
+        
+        self.results['steganography']['bit_plane_anomaly'] = anomaly
+        self.results['steganography']['bit_plane_details'] = details
+        
+        if self.verbose:
+            print(f"{Fore.CYAN}[BIT-PLANES] Entropie LSB: {entropy:.4f}")
+            print(f"{Fore.CYAN}[BIT-PLANES] Ratio LSB: {lsb_ratio:.4f}")
+            print(f"{Fore.CYAN}[BIT-PLANES] Anomalie: {'OUI' if anomaly else 'NON'}")
+        
+        return anomaly, lsb_plane
+    
+    @staticmethod
+    def _bitplane_stats(image: np.ndarray) -> Tuple[bool, Dict[str, Any], np.ndarray]:
+        """Entropie et ratio du plan LSB d'une image BGR : (anomalie, détails, plan LSB)."""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Extraire le LSB plane
         lsb_plane = gray & 1
@@ -435,20 +745,13 @@ class ForensicAnalyzer:
         # Si le ratio est très proche de 0.5, c'est suspect (données aléatoires)
         ratio_suspicious = 0.48 < lsb_ratio < 0.52
         
-        self.results['steganography']['bit_plane_anomaly'] = anomaly_detected or ratio_suspicious
-        self.results['steganography']['bit_plane_details'] = {
+        details = {
             'lsb_entropy': float(entropy),
             'lsb_ratio': float(lsb_ratio),
-            'anomaly_entropy': anomaly_detected,
-            'anomaly_ratio': ratio_suspicious
+            'anomaly_entropy': bool(anomaly_detected),
+            'anomaly_ratio': bool(ratio_suspicious)
         }
-        
-        if self.verbose:
-            print(f"{Fore.CYAN}[BIT-PLANES] Entropie LSB: {entropy:.4f}")
-            print(f"{Fore.CYAN}[BIT-PLANES] Ratio LSB: {lsb_ratio:.4f}")
-            print(f"{Fore.CYAN}[BIT-PLANES] Anomalie: {'OUI' if anomaly_detected or ratio_suspicious else 'NON'}")
-        
-        return anomaly_detected or ratio_suspicious, lsb_plane
+        return bool(anomaly_detected or ratio_suspicious), details, lsb_plane
     
     # ========================================================================
     # MÉTHODE 7: Analyse statistique (histogrammes)
@@ -458,15 +761,34 @@ class ForensicAnalyzer:
         """Analyse statistique des histogrammes."""
         print(f"\n{Fore.YELLOW}[ANALYSE] HISTOGRAMME - Analyse statistique...")
         
-        # Histogramme par canal
-        channels = cv2.split(self.cv_image)
+        stats, anomalies, self.channel_histograms = self._histogram_stats(self.cv_image)
+        histogram_anomaly = len(anomalies) > 0
+        
+        self.results['steganography']['histogram_anomaly'] = histogram_anomaly
+        self.results['steganography']['histogram_details'] = {
+            'channel_stats': stats,
+            'anomalous_channels': anomalies
+        }
+        
+        if self.verbose:
+            print(f"{Fore.CYAN}[HISTOGRAM] Canaux analysés: {len(stats)}")
+            print(f"{Fore.CYAN}[HISTOGRAM] Anomalies: {anomalies if anomalies else 'Aucune'}")
+        
+        return histogram_anomaly, stats
+    
+    @staticmethod
+    def _histogram_stats(image: np.ndarray) -> Tuple[Dict[str, Any], List[str], Dict[str, np.ndarray]]:
+        """Statistiques par canal d'une image BGR : (stats, canaux anormaux, histogrammes)."""
+        channels = cv2.split(image)
         channel_names = ['Blue', 'Green', 'Red']
         
         stats = {}
         anomalies = []
+        histograms = {}
         
-        for i, (channel, name) in enumerate(zip(channels, channel_names)):
+        for channel, name in zip(channels, channel_names):
             hist = cv2.calcHist([channel], [0], None, [256], [0, 256]).flatten()
+            histograms[name] = hist
             
             # Statistiques
             mean = np.mean(channel)
@@ -497,19 +819,112 @@ class ForensicAnalyzer:
             if len(peaks) > 20 or len(zero_runs) > 10:
                 anomalies.append(name)
         
-        histogram_anomaly = len(anomalies) > 0
-        
-        self.results['steganography']['histogram_anomaly'] = histogram_anomaly
-        self.results['steganography']['histogram_details'] = {
-            'channel_stats': stats,
-            'anomalous_channels': anomalies
+        return stats, anomalies, histograms
+    
+    # ========================================================================
+    # MÉTHODE 8: Images multi-frames (GIF animé, APNG, TIFF multi-pages)
+    # ========================================================================
+    
+    def frame_count(self) -> int:
+        """Nombre de frames (pages) du fichier."""
+        return int(getattr(self.pil_image, 'n_frames', 1))
+    
+    def iter_frames(self, start: int = 1, limit: Optional[int] = None) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        Génère paresseusement (index, frame RGB) à partir de `start`.
+        Une seule frame est décodée à la fois ; le fichier est rouvert pour ne pas
+        déplacer la position de self.pil_image (utilisée par l'analyse EXIF).
+        """
+        count = self.frame_count()
+        stop = count if limit is None else min(count, start + limit)
+        with Image.open(self.image_path) as image:
+            for index in range(start, stop):
+                image.seek(index)
+                # Chaque page TIFF déclare ses propres dimensions
+                try:
+                    resource_guard.check_pixels(*image.size, self.options['max_image_pixels'])
+                except resource_guard.ResourceLimitError as e:
+                    print(f"{Fore.RED}[GARDE-FOU] Frame {index} ignorée : {e}")
+                    continue
+                yield index, image.convert('RGB')
+    
+    def analyze_frames(self) -> Optional[Dict[str, Any]]:
+        """
+        Applique les étapes pixel (LSB, bit-planes, histogramme, OCR) aux frames
+        suivant la première ; seules les frames avec résultats sont conservées.
+        """
+        count = self.frame_count()
+        if count <= 1:
+            return None
+        
+        print(f"\n{Fore.YELLOW}[ANALYSE] FRAMES - {count} frames/pages...")
+        
+        max_frames = max(0, self.options['max_frames'])
+        seen = {hashlib.sha1(np.ascontiguousarray(self.cv_image)).digest()}
+        frames = {
+            'count': count,
+            'analyzed': 0,
+            'duplicates': 0,
+            'truncated': count - 1 > max_frames,
+            'with_findings': []
         }
         
+        for index, rgb in self.iter_frames(1, max_frames):
+            bgr = cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR)
+            # Frames identiques (fréquent dans les GIF animés) : analysées une fois
+            digest = hashlib.sha1(bgr).digest()
+            if digest in seen:
+                frames['duplicates'] += 1
+                continue
+            seen.add(digest)
+            
+            frames['analyzed'] += 1
+            entry = self._analyze_frame(index, rgb, bgr)
+            if entry['methods']:
+                frames['with_findings'].append(entry)
+                if self.verbose:
+                    print(f"{Fore.CYAN}[FRAMES] Frame {index}: {', '.join(entry['methods'])}")
+        
+        self.results['frames'] = frames
+        
         if self.verbose:
-            print(f"{Fore.CYAN}[HISTOGRAM] Canaux analysés: {len(channel_names)}")
-            print(f"{Fore.CYAN}[HISTOGRAM] Anomalies: {anomalies if anomalies else 'Aucune'}")
+            print(f"{Fore.CYAN}[FRAMES] Analysées: {frames['analyzed']} | "
+                  f"Doublons: {frames['duplicates']} | "
+                  f"Avec résultats: {len(frames['with_findings'])}")
+            if frames['truncated']:
+                print(f"{Fore.YELLOW}[FRAMES] Limite atteinte ({max_frames} frames)")
         
-        return histogram_anomaly, stats
+        return frames
+    
+    def _analyze_frame(self, index: int, rgb: Image.Image, bgr: np.ndarray) -> Dict[str, Any]:
+        """Étapes pixel sur une frame; retourne ses résultats et les méthodes positives."""
+        entry: Dict[str, Any] = {'index': index, 'methods': []}
+        
+        try:
+            message = self._reveal_lsb(rgb)
+        except Exception:
+            message = None
+        if message:
+            entry['lsb'] = message
+            entry['methods'].append('LSB')
+        
+        bit_plane_anomaly, bit_plane_details, _ = self._bitplane_stats(bgr)
+        if bit_plane_anomaly:
+            entry['bit_plane_details'] = bit_plane_details
+            entry['methods'].append('BIT-PLANES')
+        
+        _, anomalies, _ = self._histogram_stats(bgr)
+        if anomalies:
+            entry['anomalous_channels'] = anomalies
+            entry['methods'].append('HISTOGRAM')
+        
+        ocr = self._recognize_text(bgr, self.preprocess_image(bgr), quiet=True)
+        text = ocr['easyocr']['text'] or ocr['tesseract']['text']
+        if text:
+            entry['ocr_text'] = text
+            entry['methods'].append('OCR')
+        
+        return entry
     
     # ========================================================================
     # COMPARAISON & CORRÉLATION
@@ -551,6 +966,47 @@ class ForensicAnalyzer:
         if self.results['steganography']['histogram_anomaly']:
             findings.append('HISTOGRAM')
         
+        # Structure PNG / JPEG
+        if self.results['steganography'].get('png', {}).get('anomalies'):
+            findings.append('PNG')
+        if self.results['steganography'].get('jpeg', {}).get('anomalies'):
+            findings.append('JPEG')
+        
+        # Coefficients DCT (JSteg / F5)
+        dct = self.results['steganography'].get('dct', {})
+        if dct.get('jsteg_suspected') or dct.get('f5_suspected'):
+            findings.append('DCT')
+        
+        # Charges utiles décodées (base64, hex, zlib, XOR)
+        decoded = self.results['steganography'].get('decoded', [])
+        if decoded:
+            findings.append('DECODED')
+        
+        # Régions à haute entropie hors des données image
+        if self.results['steganography'].get('entropy', {}).get('regions'):
+            findings.append('ENTROPY')
+        
+        # Fichiers extraits analysés récursivement
+        if self.results.get('recursion', {}).get('flagged'):
+            findings.append('NESTED')
+        
+        # Hachages connus (porteur ou charge utile extraite)
+        known = self.results.get('known_hashes', {})
+        if known.get('carrier') or known.get('carved'):
+            findings.append('KNOWN-BAD')
+        
+        # Analyseurs externes (plugins)
+        for plugin in self.results.get('plugins', {}).values():
+            if plugin.get('finding'):
+                findings.append(plugin['label'])
+        
+        # Frames suivantes (GIF animé, APNG, TIFF multi-pages)
+        frames_with_findings = self.results.get('frames', {}).get('with_findings', [])
+        for frame in frames_with_findings:
+            for method in frame['methods']:
+                if method not in findings:
+                    findings.append(method)
+        
         # Calculer le niveau de suspicion
         total = len(findings)
         if total == 0:
@@ -561,18 +1017,74 @@ class ForensicAnalyzer:
             level = 'medium'
         else:
             level = 'high'
+        # Un hachage connu suffit à lui seul
+        if 'KNOWN-BAD' in findings:
+            level = 'high'
         
         self.results['summary']['methods_with_findings'] = findings
         self.results['summary']['total_findings'] = total
         self.results['summary']['suspicion_level'] = level
         
-        # Extraction réussie si LSB a trouvé quelque chose
-        self.results['summary']['extraction_success'] = bool(self.results['steganography']['lsb'])
+        # Extraction réussie si LSB a trouvé quelque chose (image ou frame)
+        # ou si un fichier incrusté a été extrait
+        self.results['summary']['extraction_success'] = (
+            bool(self.results['steganography']['lsb'])
+            or any(frame.get('lsb') for frame in frames_with_findings)
+            or any(entry.get('path') for entry in self.results['steganography']['carved'])
+            or any(entry['plaintext'] for entry in decoded)
+        )
+    
+    # ========================================================================
+    # RESSOURCES POUR LE RAPPORT PDF
+    # ========================================================================
+    
+    def build_report_assets(self, cache_dir: Path) -> Dict[str, Any]:
+        """
+        Prépare les visuels légers du rapport PDF : miniature JPEG et plan LSB
+        réduits (mis en cache par SHA-256) + histogrammes par canal.
+        """
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        sha256 = self.results['file_info']['sha256']
+        thumb_path = cache_dir / f"{sha256}_thumb.jpg"
+        lsb_path = cache_dir / f"{sha256}_lsb.png"
+        
+        height, width = self.cv_image.shape[:2]
+        scale = min(1.0, PDF_THUMBNAIL_MAX_SIDE / max(height, width))
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        
+        if not thumb_path.exists():
+            thumb = cv2.resize(self.cv_image, size, interpolation=cv2.INTER_AREA)
+            cv2.imwrite(str(thumb_path), thumb, [cv2.IMWRITE_JPEG_QUALITY, PDF_THUMBNAIL_QUALITY])
+        
+        if not lsb_path.exists():
+            # INTER_NEAREST conserve des bits réels (pas d'interpolation du plan LSB)
+            gray = cv2.cvtColor(self.cv_image, cv2.COLOR_BGR2GRAY)
+            plane = cv2.resize((gray & 1) * 255, size, interpolation=cv2.INTER_NEAREST)
+            cv2.imwrite(str(lsb_path), plane)
+        
+        if not self.channel_histograms:
+            for channel, name in zip(cv2.split(self.cv_image), ['Blue', 'Green', 'Red']):
+                self.channel_histograms[name] = cv2.calcHist([channel], [0], None, [256], [0, 256]).flatten()
+        
+        return {
+            'thumbnail': thumb_path,
+            'lsb_plane': lsb_path,
+            'histograms': {name: hist.tolist() for name, hist in self.channel_histograms.items()}
+        }
     
     # ========================================================================
     # EXÉCUTION COMPLÈTE
     # ========================================================================
     
+    def _run_timed(self, stage: str, func, *args, **kwargs):
+        """Exécute une étape et enregistre sa durée (secondes) dans results['timings']."""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._results_lock:
+                self.results['timings'][stage] = round(time.perf_counter() - start, 4)
+    
     def run_all_analyses(self):
         """Exécute toutes les analyses."""
         print(f"\n{Fore.WHITE}{Style.BRIGHT}{'='*60}")
@@ -581,46 +1093,592 @@ class ForensicAnalyzer:
         print(f"{Fore.CYAN}[+] Image analysée : {self.image_path.name}")
         print(f"{Fore.CYAN}[+] Date : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
+        total_start = time.perf_counter()
+        
+        # Porteur connu (filtre de Bloom + index trié) : le reste du pipeline est évité
+        known = self._run_timed('known_hashes', self.check_known_hashes)
+        if known and self.options['known_hash_short_circuit']:
+            self.results['skipped_stages'] = {spec.name: 'hachage connu' for spec in REGISTRY.specs()}
+            self._run_timed('correlation', self.correlate_results)
+            self.results['timings']['total'] = round(time.perf_counter() - total_start, 4)
+            return self.results
+        
+        # Empreintes perceptuelles et quasi-doublons déjà analysés
+        reused = self._run_timed('phash', self.match_duplicates) or []
+        
         # Exécuter chaque analyse
-        self.analyze_ocr()
-        self.analyze_lsb()
-        self.analyze_exif()
-        self.analyze_strings()
-        self.detect_signatures()
-        self.analyze_bitplanes()
-        self.analyze_histogram()
+        self._run_stages()
+        for stage in reused:
+            self.results['skipped_stages'][stage] = f"réutilisé ({self.results['near_duplicates']['matches'][0]['image']})"
+        self.check_carved_hashes()
         
         # Corréler les résultats
-        self.correlate_results()
-
+        self._run_timed('correlation', self.correlate_results)
+        self.record_duplicate()
+        
         # Analyse intelligente (LLM + NLP)
         if LLM_AVAILABLE:
-            try:
-                print(f"\n{Fore.WHITE}{Style.BRIGHT}{'='*60}")
-                print(f"{Fore.WHITE}{Style.BRIGHT} PHASE 2 : ANALYSE INTELLIGENTE (LLM + NLP)")
-                print(f"{Fore.WHITE}{Style.BRIGHT}{'='*60}")
-                
-                llm_analyzer = IntelligentForensicAnalyzer()
-                intelligent_results = llm_analyzer.analyze_forensic_data(self.results)
-                
-                # Ajouter les résultats au dictionnaire principal
-                self.results['intelligent_analysis'] = intelligent_results
-                
-                # Afficher un résumé dans le terminal
-                if intelligent_results.get('status') == 'success':
-                    print(f"\n{Fore.GREEN}[+] Analyse intelligente complétée :")
-                    print(f"  📊 Score de suspicion : {intelligent_results['suspicion_score']}/100")
-                    print(f"  ⚠️  Niveau de danger : {intelligent_results['danger_level'].upper()}")
-                    print(f"  📝 Nature : {intelligent_results['nature']}")
-                
-            except Exception as e:
-                print(f"\n{Fore.YELLOW}[WARNING] Analyse intelligente échouée : {e}")
-                if self.verbose:
-                    import traceback
-                    traceback.print_exc()
-                print(f"{Fore.CYAN}[INFO] Les résultats de base restent disponibles.")
+            self._run_intelligent_analysis()
         
+        self.results['timings']['total'] = round(time.perf_counter() - total_start, 4)
         return self.results
+    
+    def check_known_hashes(self) -> bool:
+        """SHA-256 du fichier dans la base de hachages connus (filtre de Bloom, puis index trié)."""
+        if self.hash_database is None:
+            return False
+        known = self.hash_database.contains(self.results['file_info']['sha256'])
+        self.results['known_hashes'] = {'database': self.hash_database.base, 'carrier': known, 'carved': []}
+        if known:
+            print(f"\n{Fore.RED}[HACHAGES] Porteur connu : {self.results['file_info']['sha256']}")
+        return known
+    
+    def check_carved_hashes(self):
+        """SHA-256 des charges utiles extraites dans la base de hachages connus."""
+        if self.hash_database is None:
+            return
+        for entry in self.results['steganography']['carved']:
+            if entry.get('sha256') and self.hash_database.contains(entry['sha256']):
+                entry['known_bad'] = True
+                self.results['known_hashes']['carved'].append(entry['sha256'])
+                print(f"{Fore.RED}[HACHAGES] Charge utile connue : {entry['type']} @ {hex(entry['offset'])} "
+                      f"({entry['sha256'][:16]}...)")
+    
+    def match_duplicates(self) -> List[str]:
+        """
+        pHash/dHash des pixels décodés, puis recherche des quasi-doublons dans
+        l'index. Avec l'option 'reuse_duplicates', les étapes de
+        DUPLICATE_REUSE_STAGES sont reprises du doublon le plus proche (pHash et
+        dHash à moins de DUPLICATE_REUSE_DISTANCE bits) au lieu d'être exécutées.
+        Retourne les étapes réutilisées.
+        """
+        self.results['perceptual_hash'] = perceptual_hash.image_hashes(self.cv_image)
+        if self.duplicate_index is None:
+            return []
+        
+        print(f"\n{Fore.YELLOW}[ANALYSE] DOUBLONS - Recherche des quasi-doublons déjà analysés...")
+        matches = self.duplicate_index.find(self.results['perceptual_hash'])
+        self.results['near_duplicates'] = {
+            'matches': [{
+                'image': match['entry']['image'],
+                'image_path': match['entry']['image_path'],
+                'sha256': match['entry']['sha256'],
+                'analysis_date': match['entry']['analysis_date'],
+                'distance': match['distance'],
+                'dhash_distance': match['dhash_distance'],
+                'suspicion_level': match['entry']['suspicion_level'],
+                'methods_with_findings': match['entry']['methods_with_findings']
+            } for match in matches],
+            'reused': [],
+            'diff': None
+        }
+        self._closest_duplicate = matches[0]['entry'] if matches else None
+        if not matches:
+            print(f"{Fore.CYAN}[DOUBLONS] Aucun quasi-doublon ({len(self.duplicate_index)} analyses indexées)")
+            return []
+        
+        best = matches[0]
+        print(f"{Fore.GREEN}[DOUBLONS] {len(matches)} quasi-doublon(s), le plus proche : "
+              f"{best['entry']['image']} ({best['distance']} bits, {best['entry']['suspicion_level'].upper()})")
+        if not self.options['reuse_duplicates'] or \
+                max(best['distance'], best['dhash_distance']) > DUPLICATE_REUSE_DISTANCE:
+            return []
+        
+        reused = [stage for stage in DUPLICATE_REUSE_STAGES if stage in best['entry']['reusable']]
+        for stage in reused:
+            self.results[stage] = best['entry']['reusable'][stage]
+        if reused:
+            self.options['skip_analyzers'] = list(self.options['skip_analyzers']) + reused
+            self.results['near_duplicates']['reused'] = reused
+            print(f"{Fore.CYAN}[DOUBLONS] Résultats réutilisés : {', '.join(reused)}")
+        return reused
+    
+    def record_duplicate(self):
+        """Compare l'analyse au quasi-doublon le plus proche et l'ajoute à l'index."""
+        if self.duplicate_index is None or 'perceptual_hash' not in self.results:
+            return
+        entry = perceptual_hash.index_entry(self.results, DUPLICATE_REUSE_STAGES)
+        if self._closest_duplicate:
+            self.results['near_duplicates']['diff'] = perceptual_hash.diff_results(self._closest_duplicate, entry)
+        self.duplicate_index.add(entry)
+    
+    def _run_stages(self, progress: Optional[Callable[[str, int, int], None]] = None):
+        """
+        Étapes d'analyse planifiées par le registre (intégrées et plugins), chacune
+        chronométrée : par niveau de dépendances, les analyseurs parallélisables
+        ensemble, puis les autres par coût croissant. progress(nom, faits, total)
+        est appelé après chaque étape.
+        """
+        plan = REGISTRY.plan(self.results['file_info'].get('format'), self.options)
+        self.results['skipped_stages'] = plan['skipped']
+        self.results.setdefault('plugins', {})
+        total = sum(len(level) for level in plan['levels'])
+        done = 0
+        for level in plan['levels']:
+            parallel = [spec for spec in level if spec.parallel]
+            batches = ([parallel] if len(parallel) > 1 else [[spec] for spec in parallel]) \
+                + [[spec] for spec in level if not spec.parallel]
+            for batch in batches:
+                if len(batch) > 1:
+                    with ThreadPoolExecutor(max_workers=len(batch), thread_name_prefix='stage') as executor:
+                        list(executor.map(self._run_spec, batch))
+                else:
+                    self._run_spec(batch[0])
+                for spec in batch:
+                    done += 1
+                    if progress:
+                        progress(spec.name, done, total)
+    
+    def stage_timeout(self, name: str) -> Optional[float]:
+        """Délai max d'une étape (STAGE_TIMEOUTS, sinon option stage_timeout); None = illimité."""
+        if not self.options['stage_timeout']:
+            return None
+        return STAGE_TIMEOUTS.get(name, self.options['stage_timeout'])
+    
+    def _abandon_stage(self, name: str, error: Exception):
+        """Étape bloquée : signalée dans le rapport, l'analyse continue sans elle."""
+        with self._results_lock:
+            self.results.setdefault('stage_timeouts', []).append(name)
+            self.results['skipped_stages'][name] = str(error)
+        print(f"{Fore.RED}[GARDE-FOU] {error} : étape abandonnée")
+    
+    def _call_stage(self, name: str, func: Callable[['ForensicAnalyzer'], Any]) -> Any:
+        """
+        Exécute func(analyseur) avec le délai de l'étape. Avec un délai, l'étape
+        travaille sur une copie de l'analyseur et de ses résultats, fusionnée
+        seulement si elle se termine à temps : une étape abandonnée, qui continue
+        en arrière-plan, ne modifie plus le rapport ni les caches.
+        """
+        timeout = self.stage_timeout(name)
+        if not timeout:
+            return func(self)
+        with self._results_lock:
+            base = copy.deepcopy(self.results)
+            snapshot = dict(vars(self))
+        private = copy.copy(self)
+        private.results = copy.deepcopy(base)
+        result = resource_guard.call_with_timeout(lambda: func(private), timeout, name)
+        with self._results_lock:
+            resource_guard.merge_changes(self.results, base, private.results)
+            # Caches calculés par l'étape (structures PNG/JPEG, histogrammes...) : comparés à
+            # l'état de départ, pour ne pas écraser ceux d'une étape parallèle terminée avant
+            for attr, value in vars(private).items():
+                if attr != 'results' and value is not snapshot.get(attr):
+                    setattr(self, attr, value)
+        return result
+    
+    def _run_spec(self, spec: AnalyzerSpec):
+        """Exécute un analyseur; le résultat d'un plugin va dans results['plugins']."""
+        if spec.builtin:
+            try:
+                self._run_timed(spec.name, self._call_stage, spec.name,
+                                lambda analyzer: getattr(analyzer, spec.func)())
+            except resource_guard.StageTimeout as e:
+                self._abandon_stage(spec.name, e)
+            return
+        print(f"\n{Fore.YELLOW}[PLUGINS] {spec.label}...")
+        try:
+            result = self._run_timed(spec.name, self._call_stage, spec.name, spec.func)
+            entry = {
+                'label': spec.label,
+                'result': result,
+                'finding': bool(spec.finding(result)) if spec.finding else False,
+                'summary': spec.summary(result) if spec.summary else None
+            }
+        except Exception as e:
+            # Un plugin défaillant n'interrompt pas l'analyse
+            if isinstance(e, resource_guard.StageTimeout):
+                self._abandon_stage(spec.name, e)
+            entry = {'label': spec.label, 'error': str(e), 'finding': False}
+            print(f"{Fore.RED}[PLUGINS] {spec.label} : erreur - {e}")
+        with self._results_lock:
+            self.results['plugins'][spec.name] = entry
+    
+    def decode_payloads(self) -> List[Dict[str, Any]]:
+        """
+        Décode les flux extraits (message LSB, données finales, commentaires,
+        LSB des frames) : base64, hex, zlib, gzip, XOR à octet unique.
+        """
+        steg = self.results['steganography']
+        candidates = []
+        if steg['lsb']:
+            candidates.append(('lsb', steg['lsb'].encode('utf-8')))
+        structure = self.png_structure() or self.jpeg_structure()
+        if structure and structure['trailing']:
+            candidates.append(('trailing', self.raw_bytes[structure['trailing']['offset']:]))
+        for comment in steg['exif'].get('comments', []):
+            candidates.append((f"comment {comment['field']}", str(comment['value']).encode('utf-8')))
+        for frame in self.results.get('frames', {}).get('with_findings', []):
+            if frame.get('lsb'):
+                candidates.append((f"frame {frame['index']} lsb", frame['lsb'].encode('utf-8')))
+        if not candidates:
+            return []
+        
+        print(f"\n{Fore.YELLOW}[ANALYSE] DÉCODAGE - base64 / hex / zlib / XOR des flux extraits...")
+        decoded = payload_decoder.decode_candidates(candidates)
+        steg['decoded'] = decoded
+        
+        if self.verbose:
+            for entry in decoded:
+                preview = entry['plaintext'][:80] if entry['plaintext'] else f"{entry['length']} octets binaires"
+                print(f"{Fore.GREEN}[DÉCODAGE] {entry['source']} ({entry['transforms']}) : {preview}")
+            if not decoded:
+                print(f"{Fore.CYAN}[DÉCODAGE] Aucun encodage reconnu ({len(candidates)} flux)")
+        
+        return decoded
+    
+    def analyze_nested(self) -> Optional[Dict[str, Any]]:
+        """
+        Analyse récursive des fichiers extraits par le carving : images repassées
+        dans ForensicAnalyzer, archives ZIP/GZIP dépliées (voir NestedAnalysis).
+        """
+        carved = [entry for entry in self.results['steganography']['carved'] if entry.get('path')]
+        if not self.options['recursive'] or not carved:
+            return None
+        
+        print(f"\n{Fore.YELLOW}[ANALYSE] RÉCURSION - Fichiers extraits et membres d'archives...")
+        recursion = NestedAnalysis(self).run(carved)
+        self.results['recursion'] = recursion
+        
+        if self.verbose:
+            print(f"{Fore.CYAN}[RÉCURSION] Fichiers: {recursion['nodes']} | Octets: {recursion['bytes']} | "
+                  f"Profondeur: {recursion['depth']} | Avec résultats: {recursion['flagged']}")
+            if recursion['limits']:
+                print(f"{Fore.YELLOW}[RÉCURSION] Limites atteintes : {', '.join(recursion['limits'])}")
+        
+        return recursion
+    
+    def _run_intelligent_analysis(self):
+        """Phase 2 : analyse intelligente (LLM + NLP) des résultats."""
+        try:
+            print(f"\n{Fore.WHITE}{Style.BRIGHT}{'='*60}")
+            print(f"{Fore.WHITE}{Style.BRIGHT} PHASE 2 : ANALYSE INTELLIGENTE (LLM + NLP)")
+            print(f"{Fore.WHITE}{Style.BRIGHT}{'='*60}")
+            
+            llm_analyzer = IntelligentForensicAnalyzer()
+            intelligent_results = self._run_timed(
+                'llm', llm_analyzer.analyze_forensic_data, self.results
+            )
+            
+            # Ajouter les résultats au dictionnaire principal
+            self.results['intelligent_analysis'] = intelligent_results
+            
+            # Afficher un résumé dans le terminal
+            if intelligent_results.get('status') == 'success':
+                print(f"\n{Fore.GREEN}[+] Analyse intelligente complétée :")
+                print(f"  📊 Score de suspicion : {intelligent_results['suspicion_score']}/100")
+                print(f"  ⚠️  Niveau de danger : {intelligent_results['danger_level'].upper()}")
+                print(f"  📝 Nature : {intelligent_results['nature']}")
+            
+        except Exception as e:
+            print(f"\n{Fore.YELLOW}[WARNING] Analyse intelligente échouée : {e}")
+            if self.verbose:
+                import traceback
+                traceback.print_exc()
+            print(f"{Fore.CYAN}[INFO] Les résultats de base restent disponibles.")
+
+
+class VideoForensicAnalyzer(ForensicAnalyzer):
+    """
+    Analyse forensique d'une vidéo. Les frames sont décodées en flux
+    (cv2.VideoCapture), échantillonnées par pas fixe ou par changement de scène,
+    puis passées aux étapes pixel (LSB, bit-planes, histogramme, OCR) dans un
+    pool de threads. La vidéo n'est jamais chargée entièrement en mémoire.
+    """
+    
+    def _load_image(self):
+        """Lit les métadonnées et la première frame de la vidéo."""
+        if not self.image_path.exists():
+            raise FileNotFoundError(f"Vidéo non trouvée: {self.image_path}")
+        
+        capture = cv2.VideoCapture(str(self.image_path))
+        try:
+            # Dimensions déclarées vérifiées avant de décoder la première frame
+            resource_guard.check_pixels(int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                                        int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                                        self.options['max_image_pixels'])
+            ok, first = capture.read() if capture.isOpened() else (False, None)
+            if not ok:
+                raise ValueError(f"Impossible de lire la vidéo: {self.image_path}")
+            self.video_fps = float(capture.get(cv2.CAP_PROP_FPS) or 0.0)
+            self.video_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        finally:
+            capture.release()
+        
+        # Première frame : miniature et plan LSB du rapport PDF
+        self.cv_image = first
+        
+        # Hash par blocs : le fichier n'est pas lu d'un seul tenant
+        sha256 = hashlib.sha256()
+        with open(self.image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha256.update(chunk)
+        
+        height, width = first.shape[:2]
+        self.results['file_info'] = {
+            'sha256': sha256.hexdigest(),
+            'size_bytes': self.image_path.stat().st_size,
+            'width': int(width),
+            'height': int(height),
+            'channels': int(first.shape[2]) if first.ndim == 3 else 1,
+            'format': self.image_path.suffix.lstrip('.').upper(),
+            'frames': self.video_frames,
+            'fps': round(self.video_fps, 3),
+            'duration': round(self.video_frames / self.video_fps, 3) if self.video_fps else None
+        }
+        
+        if self.verbose:
+            print(f"{Fore.CYAN}[INFO] Vidéo chargée: {self.image_path.name}")
+            print(f"{Fore.CYAN}[INFO] Dimensions: {first.shape} | {self.video_frames} frames à {self.video_fps:.2f} fps")
+    
+    def frame_count(self) -> int:
+        return self.video_frames
+    
+    def match_duplicates(self) -> List[str]:
+        # L'empreinte de la première frame ne représente pas la vidéo
+        return []
+    
+    def _run_stages(self, progress: Optional[Callable[[str, int, int], None]] = None):
+        # Seules les étapes pixel s'appliquent : EXIF, chaînes et signatures
+        # liraient le fichier vidéo entier en mémoire
+        self._run_timed('frames', self.analyze_frames)
+        if progress:
+            progress('frames', 1, 1)
+    
+    def iter_sampled_frames(self, limit: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Génère (index, frame BGR) échantillonnées, au plus `limit`.
+        'stride' : une frame sur N, les autres sont seulement avancées (grab).
+        'scene'  : frames dont la vignette diffère assez de la dernière retenue.
+        """
+        sampling = self.options['video_sampling']
+        stride = max(1, self.options['video_stride'])
+        capture = cv2.VideoCapture(str(self.image_path))
+        previous = None
+        yielded = 0
+        index = -1
+        try:
+            while yielded < limit:
+                index += 1
+                if sampling == 'stride' and index % stride:
+                    if not capture.grab():
+                        break
+                    continue
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if sampling == 'scene':
+                    small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 36),
+                                       interpolation=cv2.INTER_AREA)
+                    if previous is not None and \
+                            np.mean(cv2.absdiff(small, previous)) / 255 < VIDEO_SCENE_THRESHOLD:
+                        continue
+                    previous = small
+                yielded += 1
+                yield index, frame
+        finally:
+            capture.release()
+    
+    def analyze_frames(self) -> Dict[str, Any]:
+        """Analyse les frames échantillonnées en parallèle (fenêtre de tâches bornée)."""
+        sampling = self.options['video_sampling']
+        print(f"\n{Fore.YELLOW}[ANALYSE] VIDÉO - Frames échantillonnées ({sampling})...")
+        
+        max_frames = max(1, self.options['max_frames'])
+        workers = VIDEO_WORKERS or os.cpu_count() or 1
+        frames = {
+            'count': self.video_frames,
+            'analyzed': 0,
+            'duplicates': 0,
+            'truncated': False,
+            'sampling': sampling,
+            'with_findings': []
+        }
+        
+        def collect(done):
+            for future in done:
+                entry = future.result()
+                if entry['methods']:
+                    frames['with_findings'].append(entry)
+        
+        seen = set()
+        sampled = 0
+        last_index = -1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='video') as executor:
+            in_flight = set()
+            for index, bgr in self.iter_sampled_frames(max_frames):
+                sampled += 1
+                last_index = index
+                digest = hashlib.sha1(bgr).digest()
+                if digest in seen:
+                    frames['duplicates'] += 1
+                    continue
+                seen.add(digest)
+                frames['analyzed'] += 1
+                in_flight.add(executor.submit(self._analyze_video_frame, index, bgr))
+                # Au plus 2 frames décodées en attente par thread
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(wait(in_flight)[0])
+        
+        frames['truncated'] = sampled >= max_frames and last_index + 1 < self.video_frames
+        frames['with_findings'].sort(key=lambda entry: entry['index'])
+        self.results['frames'] = frames
+        
+        if self.verbose:
+            for entry in frames['with_findings']:
+                print(f"{Fore.CYAN}[VIDÉO] Frame {entry['index']} ({entry['timestamp']}s): "
+                      f"{', '.join(entry['methods'])}")
+            print(f"{Fore.CYAN}[VIDÉO] Analysées: {frames['analyzed']} | "
+                  f"Doublons: {frames['duplicates']} | "
+                  f"Avec résultats: {len(frames['with_findings'])}")
+            if frames['truncated']:
+                print(f"{Fore.YELLOW}[VIDÉO] Limite atteinte ({max_frames} frames)")
+        
+        return frames
+    
+    def _analyze_video_frame(self, index: int, bgr: np.ndarray) -> Dict[str, Any]:
+        """Étapes pixel sur une frame vidéo, horodatée."""
+        rgb = Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+        entry = self._analyze_frame(index, rgb, bgr)
+        entry['timestamp'] = round(index / self.video_fps, 3) if self.video_fps else None
+        return entry
+
+
+# ============================================================================
+# ANALYSE RÉCURSIVE DES FICHIERS EXTRAITS
+# ============================================================================
+
+# Types de fichiers extraits repassés dans ForensicAnalyzer
+NESTED_IMAGE_KINDS = {'PNG', 'JPEG', 'GIF'}
+
+
+class NestedAnalysis:
+    """
+    Arbre des fichiers extraits d'une image. Chaque nœud (charge utile ou membre
+    d'archive) passe dans une file de travail traitée par un pool de threads :
+    les images sont analysées (et extraites à leur tour), les archives dépliées.
+    Bornes : profondeur, nombre de nœuds, octets analysés (ByteBudget partagé).
+    """
+    
+    def __init__(self, root: ForensicAnalyzer):
+        self.root = root
+        self.max_depth = max(1, root.options['recursion_depth'])
+        self.budget = carver.ByteBudget(root.options['recursion_budget'])
+        self.nodes = 0
+        self.depth = 0
+        self.flagged = 0
+        self.limits = set()
+    
+    def run(self, carved: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Traite la file jusqu'à épuisement et retourne l'arbre des résultats."""
+        tree: List[Dict[str, Any]] = []
+        pending = deque()
+        for entry in carved:
+            item = {'origin': f"{entry['type']} @ {hex(entry['offset'])}", 'kind': entry['type'],
+                    'path': entry['path'], 'size': entry['length']}
+            node = self._add_node(item, 1, tree)
+            if node:
+                pending.append(node)
+        
+        workers = RECURSION_WORKERS or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='recursion') as executor:
+            in_flight = {}
+            while pending or in_flight:
+                # Au plus 2 fichiers en attente par thread
+                while pending and len(in_flight) < workers * 2:
+                    node = pending.popleft()
+                    in_flight[executor.submit(self._process, node)] = node
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = in_flight.pop(future)
+                    summary = node.get('summary', {})
+                    if summary.get('extraction_success') or summary.get('suspicion_level') in CASE_REPORT_FLAG_LEVELS:
+                        self.flagged += 1
+                    for item in future.result():
+                        child = self._add_node(item, node['depth'] + 1, node['children'])
+                        if child:
+                            pending.append(child)
+        
+        return {
+            'tree': tree,
+            'nodes': self.nodes,
+            'bytes': self.budget.used,
+            'depth': self.depth,
+            'flagged': self.flagged,
+            'limits': sorted(self.limits)
+        }
+    
+    def _add_node(self, item: Dict[str, Any], depth: int,
+                  siblings: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Crée le nœud d'un fichier (thread coordinateur); None s'il ne sera pas traité."""
+        node = {**item, 'depth': depth, 'children': []}
+        reserved = node.pop('reserved', False)
+        if self.nodes >= RECURSION_MAX_NODES:
+            self.limits.add('nœuds')
+            return None
+        siblings.append(node)
+        if depth > self.max_depth:
+            self.limits.add('profondeur')
+            node['skipped'] = 'profondeur max'
+            return None
+        # Les membres d'archives sont réservés sur le budget dès leur extraction
+        if not reserved and not self.budget.reserve(node['size']):
+            self.limits.add('octets')
+            node['skipped'] = "budget d'octets épuisé"
+            return None
+        self.nodes += 1
+        self.depth = max(self.depth, depth)
+        return node
+    
+    def _process(self, node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Analyse un nœud (thread du pool); retourne les fichiers enfants à traiter."""
+        path = Path(node['path'])
+        try:
+            if node['kind'] in carver.ARCHIVE_KINDS:
+                return self._expand_archive(node, path)
+            if node['kind'] in NESTED_IMAGE_KINDS or path.suffix.lower() in IMAGE_EXTENSIONS:
+                return self._analyze_image(node, path)
+            node['skipped'] = 'format non analysé'
+        except Exception as e:
+            node['error'] = str(e)
+        return []
+    
+    def _expand_archive(self, node: Dict[str, Any], path: Path) -> List[Dict[str, Any]]:
+        """Extrait les membres d'une archive (gardes anti-bombe dans carver)."""
+        report = carver.extract_members(path, node['kind'], path.with_name(f"{path.name}_members"), self.budget)
+        node['members'] = len(report['members'])
+        if report['skipped']:
+            node['skipped_members'] = report['skipped']
+            if any('budget' in skipped['reason'] for skipped in report['skipped']):
+                self.limits.add('octets')
+        if report.get('error'):
+            node['error'] = report['error']
+        return [
+            {'origin': member['name'], 'kind': carver.detect_kind(Path(member['path'])),
+             'path': member['path'], 'size': member['size'], 'reserved': True}
+            for member in report['members']
+        ]
+    
+    def _analyze_image(self, node: Dict[str, Any], path: Path) -> List[Dict[str, Any]]:
+        """Étapes d'analyse et corrélation d'une image extraite (sans phase LLM)."""
+        options = {**self.root.options, 'recursive': False,
+                   'carve_dir': str(path.with_name(f"{path.stem}_carved"))}
+        analyzer = ForensicAnalyzer(str(path), options=options, ocr_batcher=self.root.ocr_batcher)
+        analyzer._run_stages()
+        analyzer.correlate_results()
+        
+        node['sha256'] = analyzer.results['file_info']['sha256']
+        node['summary'] = analyzer.results['summary']
+        if analyzer.results['steganography']['lsb']:
+            node['lsb'] = analyzer.results['steganography']['lsb']
+        
+        return [
+            {'origin': f"{entry['type']} @ {hex(entry['offset'])}", 'kind': entry['type'],
+             'path': entry['path'], 'size': entry['length']}
+            for entry in analyzer.results['steganography']['carved'] if entry.get('path')
+        ]
 
 
 # ============================================================================
@@ -686,6 +1744,12 @@ def print_terminal_report(results: Dict[str, Any]):
             print(f"    {sig['type']} @ offset {sig['hex_offset']}")
     else:
         print(f"  {Fore.WHITE}○ Archive/Fichier caché : NON")
+    carved = results['steganography'].get('carved', [])
+    if carved:
+        print(f"  {Fore.RED}✓ Fichiers extraits : {len(carved)}")
+        for entry in carved[:5]:
+            print(f"    {entry['type']} ({entry['length']} octets) "
+                  f"{entry.get('path') or entry.get('skipped') or entry.get('sha256', '')[:16]}")
     
     # BIT-PLANES
     print(f"\n{Fore.YELLOW}[BIT-PLANES]")
@@ -703,6 +1767,136 @@ def print_terminal_report(results: Dict[str, Any]):
     else:
         print(f"  {Fore.WHITE}○ Anomalies statistiques : NON")
     
+    # PNG
+    png = results['steganography'].get('png')
+    if png:
+        print(f"\n{Fore.YELLOW}[PNG]")
+        if png['anomalies']:
+            print(f"  {Fore.RED}✓ Anomalies de structure : {len(png['anomalies'])}")
+            for anomaly in png['anomalies'][:5]:
+                print(f"    - {anomaly}")
+        else:
+            print(f"  {Fore.WHITE}○ Anomalies de structure : NON")
+    
+    # JPEG
+    jpeg = results['steganography'].get('jpeg')
+    if jpeg:
+        print(f"\n{Fore.YELLOW}[JPEG]")
+        if jpeg['anomalies']:
+            print(f"  {Fore.RED}✓ Anomalies de structure : {len(jpeg['anomalies'])}")
+            for anomaly in jpeg['anomalies'][:5]:
+                print(f"    - {anomaly}")
+        else:
+            print(f"  {Fore.WHITE}○ Anomalies de structure : NON")
+        dct = results['steganography'].get('dct')
+        if dct:
+            suspected = [name for name, flag in [('JSteg', dct['jsteg_suspected']), ('F5', dct['f5_suspected'])] if flag]
+            color = Fore.RED if suspected else Fore.WHITE
+            print(f"  {color}{'✓' if suspected else '○'} Insertion DCT : {', '.join(suspected) or 'NON'} "
+                  f"(chi² {dct['jsteg']['probability']:.2f}, β {jpeg_parser.format_f5_beta(dct)})")
+    
+    # DÉCODAGE des flux extraits
+    decoded = results['steganography'].get('decoded')
+    if decoded:
+        print(f"\n{Fore.YELLOW}[DÉCODAGE]")
+        for entry in decoded[:5]:
+            keys = ', '.join(step['key'] for step in entry['chain'] if 'key' in step)
+            print(f"  {Fore.GREEN}✓ {entry['source']} : {entry['transforms']}{f' (clé {keys})' if keys else ''}")
+            if entry['plaintext']:
+                print(f"    {entry['plaintext'][:100]}")
+            else:
+                print(f"    {entry['length']} octets binaires décompressés")
+    
+    # ENTROPIE des octets bruts
+    entropy = results['steganography'].get('entropy')
+    if entropy and entropy['profile']:
+        print(f"\n{Fore.YELLOW}[ENTROPIE]")
+        print(f"  {byte_entropy.sparkline(entropy['profile'])}  (max {entropy['max']:.2f} bits/octet)")
+        if entropy['regions']:
+            print(f"  {Fore.RED}✓ Régions à haute entropie hors données image : {len(entropy['regions'])}")
+            for region in entropy['regions'][:5]:
+                print(f"    {region['hex_offset']} : {region['length']} octets ({region['max_entropy']:.2f})")
+        elif entropy['image_data_known']:
+            print(f"  {Fore.WHITE}○ Régions à haute entropie hors données image : NON")
+    
+    # FRAMES (GIF animé, APNG, TIFF multi-pages)
+    frames = results.get('frames')
+    if frames:
+        print(f"\n{Fore.YELLOW}[FRAMES]")
+        print(f"  Frames : {frames['count']} (analysées : {frames['analyzed']}, "
+              f"doublons : {frames['duplicates']})")
+        if frames['with_findings']:
+            for frame in frames['with_findings']:
+                when = f" ({frame['timestamp']}s)" if frame.get('timestamp') is not None else ''
+                print(f"  {Fore.RED}✓ Frame {frame['index']}{when} : {', '.join(frame['methods'])}")
+                if frame.get('lsb'):
+                    print(f"    LSB : {frame['lsb'][:100]}")
+        else:
+            print(f"  {Fore.WHITE}○ Aucun résultat dans les frames suivantes")
+    
+    # RÉCURSION (fichiers extraits et membres d'archives)
+    recursion = results.get('recursion')
+    if recursion:
+        print(f"\n{Fore.YELLOW}[RÉCURSION]")
+        print(f"  Fichiers : {recursion['nodes']} (octets : {recursion['bytes']}, "
+              f"profondeur : {recursion['depth']})")
+        for line in nested_tree_lines(recursion['tree'])[:20]:
+            print(f"  {line}")
+        if recursion['limits']:
+            print(f"  {Fore.YELLOW}Limites atteintes : {', '.join(recursion['limits'])}")
+    
+    # HACHAGES CONNUS
+    known = results.get('known_hashes')
+    if known:
+        print(f"\n{Fore.YELLOW}[HACHAGES CONNUS]")
+        if known['carrier']:
+            print(f"  {Fore.RED}✓ Porteur connu : {results['file_info']['sha256']}")
+        else:
+            print(f"  {Fore.WHITE}○ Porteur connu : NON")
+        for sha256 in known['carved']:
+            print(f"  {Fore.RED}✓ Charge utile extraite connue : {sha256}")
+    
+    # QUASI-DOUBLONS déjà analysés
+    duplicates = results.get('near_duplicates')
+    if duplicates and duplicates['matches']:
+        print(f"\n{Fore.YELLOW}[DOUBLONS]")
+        for match in duplicates['matches']:
+            print(f"  {Fore.CYAN}≈ {match['image']} : {match['distance']} bits "
+                  f"({match['suspicion_level'].upper()}, {match['analysis_date'][:10]})")
+        diff = duplicates['diff']
+        if diff:
+            if diff['same_file']:
+                print(f"  {Fore.WHITE}○ Fichier identique (même SHA-256)")
+            changes = [f"+{method}" for method in diff['new_findings']] + \
+                      [f"-{method}" for method in diff['missing_findings']]
+            if changes:
+                print(f"  {Fore.RED}✓ Différences : {', '.join(changes)}")
+            if diff['lsb_changed'] or diff['new_signatures'] or diff['new_decoded']:
+                print(f"  {Fore.RED}✓ Charge utile différente "
+                      f"(LSB : {'OUI' if diff['lsb_changed'] else 'NON'}, "
+                      f"signatures : {', '.join(diff['new_signatures']) or '-'}, "
+                      f"textes décodés : {len(diff['new_decoded'])})")
+        if duplicates['reused']:
+            print(f"  {Fore.WHITE}Réutilisé : {', '.join(duplicates['reused'])}")
+    
+    # PLUGINS (analyseurs externes)
+    plugins = results.get('plugins')
+    if plugins:
+        print(f"\n{Fore.YELLOW}[PLUGINS]")
+        for plugin in plugins.values():
+            if plugin.get('error'):
+                print(f"  {Fore.RED}✗ {plugin['label']} : erreur - {plugin['error']}")
+            else:
+                color = Fore.RED if plugin['finding'] else Fore.WHITE
+                print(f"  {color}{'✓' if plugin['finding'] else '○'} {plugin['label']} : "
+                      f"{plugin['summary'] or ('OUI' if plugin['finding'] else 'NON')}")
+    
+    # GARDE-FOUS (étapes abandonnées)
+    if results.get('stage_timeouts'):
+        print(f"\n{Fore.RED}[GARDE-FOUS]")
+        for name in results['stage_timeouts']:
+            print(f"  {Fore.RED}✗ {results['skipped_stages'][name]}")
+    
     # CONCLUSION
     print(f"\n{Fore.WHITE}{Style.BRIGHT}{'='*60}")
     print(f"{Fore.WHITE}{Style.BRIGHT}[CONCLUSION]")
@@ -779,6 +1973,22 @@ def print_terminal_report(results: Dict[str, Any]):
             print(f"  {Fore.CYAN}Tokens consommés :{Style.RESET_ALL} {meta.get('tokens', 0)}")
 
 
+def nested_tree_lines(tree: List[Dict[str, Any]], indent: int = 0) -> List[str]:
+    """Lignes indentées de l'arbre d'analyse récursive (une par fichier)."""
+    lines = []
+    for node in tree:
+        if node.get('summary'):
+            summary = node['summary']
+            status = f"{summary['suspicion_level'].upper()} ({', '.join(summary['methods_with_findings']) or '-'})"
+        elif 'members' in node:
+            status = f"{node['members']} membre(s)"
+        else:
+            status = node.get('error') or node.get('skipped') or '-'
+        lines.append(f"{'  ' * indent}└ {node['origin']} : {status}")
+        lines.extend(nested_tree_lines(node['children'], indent + 1))
+    return lines
+
+
 def json_serializer(obj):
     """Custom JSON serializer for numpy types."""
     if isinstance(obj, np.integer):
@@ -792,49 +2002,42 @@ def json_serializer(obj):
     raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
 
+def replace_atomically(output_path: Path, write: Callable[[Path], None]):
+    """
+    Écrit via write(fichier temporaire) puis remplace output_path : un rapport
+    présent est toujours complet, une ré-analyse l'écrase à l'identique.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.stem}-", suffix=output_path.suffix)
+    os.close(fd)
+    try:
+        write(Path(tmp_path))
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
 def generate_json_report(results: Dict[str, Any], output_path: Path):
     """Génère le rapport JSON."""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False, default=json_serializer)
+    def write(path: Path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, default=json_serializer)
+    
+    replace_atomically(output_path, write)
     print(f"\n{Fore.GREEN}[+] Rapport JSON généré : {output_path}")
 
 
-def generate_pdf_report(results: Dict[str, Any], output_path: Path, image_path: Path):
-    """Génère le rapport PDF avec ReportLab."""
-    print(f"\n{Fore.CYAN}[INFO] Génération du rapport PDF...")
-    
-    doc = SimpleDocTemplate(
-        str(output_path),
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
-    )
+_PDF_STYLES: Optional[Dict[str, Any]] = None
+
+
+def get_pdf_styles() -> Dict[str, Any]:
+    """Construit une seule fois les styles ReportLab partagés par tous les rapports."""
+    global _PDF_STYLES
+    if _PDF_STYLES is not None:
+        return _PDF_STYLES
     
     styles = getSampleStyleSheet()
-    
-    # Styles personnalisés
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Title'],
-        fontSize=24,
-        spaceAfter=30,
-        textColor=colors.HexColor('#1a1a2e'),
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        spaceBefore=20,
-        textColor=colors.HexColor('#16213e'),
-        borderPadding=5,
-        backColor=colors.HexColor('#e8e8e8')
-    )
-    
     normal_style = ParagraphStyle(
         'CustomNormal',
         parent=styles['Normal'],
@@ -842,12 +2045,131 @@ def generate_pdf_report(results: Dict[str, Any], output_path: Path, image_path:
         spaceAfter=6
     )
     
-    elements = []
+    _PDF_STYLES = {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Title'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.HexColor('#1a1a2e'),
+            alignment=TA_CENTER
+        ),
+        'subtitle': styles['Heading3'],
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=12,
+            spaceBefore=20,
+            textColor=colors.HexColor('#16213e'),
+            borderPadding=5,
+            backColor=colors.HexColor('#e8e8e8'),
+            keepWithNext=1
+        ),
+        'normal': normal_style,
+        'warning': ParagraphStyle(
+            'Warning',
+            parent=normal_style,
+            textColor=colors.HexColor('#856404'),
+            backColor=colors.HexColor('#fff3cd'),
+            borderPadding=10
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=normal_style,
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        ),
+        'info_table': TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+        'results_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#16213e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+        ]),
+        'ia_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#16213e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+        ]),
+        'preview_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTSIZE', (0, 1), (-1, 1), 8),
+            ('TEXTCOLOR', (0, 1), (-1, 1), colors.grey),
+        ]),
+    }
+    return _PDF_STYLES
+
+
+def _scaled_rl_image(path: Path, max_width: float, max_height: float) -> RLImage:
+    """Image ReportLab redimensionnée en conservant le ratio."""
+    with Image.open(path) as img:
+        width, height = img.size
+    ratio = min(max_width / width, max_height / height)
+    return RLImage(str(path), width=width * ratio, height=height * ratio)
+
+
+def _histogram_drawing(histograms: Dict[str, List[float]], width: float, height: float) -> Drawing:
+    """Dessine les histogrammes par canal en vectoriel (sans matplotlib)."""
+    drawing = Drawing(width, height)
+    drawing.add(Line(0, 0, width, 0, strokeColor=colors.grey, strokeWidth=0.5))
+    drawing.add(Line(0, 0, 0, height, strokeColor=colors.grey, strokeWidth=0.5))
+    
+    peak = max((max(h) for h in histograms.values() if len(h)), default=0) or 1
+    channel_colors = {'Blue': colors.blue, 'Green': colors.green, 'Red': colors.red}
+    
+    for name, hist in histograms.items():
+        points = []
+        for value_index, count in enumerate(hist):
+            points.extend([width * value_index / 255, (height - 12) * count / peak])
+        drawing.add(PolyLine(points, strokeColor=channel_colors.get(name, colors.black), strokeWidth=0.6))
+    
+    drawing.add(String(width - 2, height - 10, "B / G / R", fontSize=7,
+                       fillColor=colors.grey, textAnchor='end'))
+    return drawing
+
+
+def _entropy_drawing(profile: List[float], threshold: float, width: float, height: float) -> Drawing:
+    """Dessine le profil d'entropie des octets (0-8 bits) et le seuil de signalement."""
+    drawing = Drawing(width, height)
+    drawing.add(Line(0, 0, width, 0, strokeColor=colors.grey, strokeWidth=0.5))
+    drawing.add(Line(0, 0, 0, height, strokeColor=colors.grey, strokeWidth=0.5))
+    
+    scale = (height - 12) / 8
+    drawing.add(Line(0, threshold * scale, width, threshold * scale,
+                     strokeColor=colors.red, strokeWidth=0.4, strokeDashArray=[2, 2]))
+    points = []
+    for index, value in enumerate(profile):
+        points.extend([width * index / max(1, len(profile) - 1), value * scale])
+    drawing.add(PolyLine(points, strokeColor=colors.black, strokeWidth=0.6))
+    
+    drawing.add(String(width - 2, height - 10, "Entropie des octets (0-8 bits)", fontSize=7,
+                       fillColor=colors.grey, textAnchor='end'))
+    return drawing
+
+
+def build_pdf_elements(results: Dict[str, Any], assets: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """Construit les flowables ReportLab décrivant une image (hors titre et footer)."""
+    styles = get_pdf_styles()
+    heading_style = styles['heading']
+    normal_style = styles['normal']
     
-    # Titre
-    elements.append(Paragraph("LE DÉCODEUR", title_style))
-    elements.append(Paragraph("Rapport d'Analyse Forensique d'Images", styles['Heading3']))
-    elements.append(Spacer(1, 20))
+    elements = []
     
     # Informations générales
     elements.append(Paragraph("Informations Générales", heading_style))
@@ -859,15 +2181,25 @@ def generate_pdf_report(results: Dict[str, Any], output_path: Path, image_path:
     ]
     
     info_table = Table(info_data, colWidths=[4*cm, 12*cm])
-    info_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
+    info_table.setStyle(styles['info_table'])
     elements.append(info_table)
     elements.append(Spacer(1, 20))
     
+    # Aperçu : miniature + plan LSB + histogrammes (jamais l'image originale)
+    if assets:
+        elements.append(Paragraph("Aperçu Visuel", heading_style))
+        preview_table = Table([
+            [_scaled_rl_image(assets['thumbnail'], 7.5*cm, 6*cm),
+             _scaled_rl_image(assets['lsb_plane'], 7.5*cm, 6*cm)],
+            ['Miniature', 'Plan LSB (bit 0, niveaux de gris)'],
+        ], colWidths=[8*cm, 8*cm])
+        preview_table.setStyle(styles['preview_table'])
+        elements.append(preview_table)
+        if assets.get('histograms'):
+            elements.append(Spacer(1, 10))
+            elements.append(_histogram_drawing(assets['histograms'], 16*cm, 4*cm))
+        elements.append(Spacer(1, 20))
+    
     # Résultats d'analyse
     elements.append(Paragraph("Résultats d'Analyse", heading_style))
     
@@ -892,25 +2224,81 @@ def generate_pdf_report(results: Dict[str, Any], output_path: Path, image_path:
          str(len(steg['ascii_strings'])) + ' chaînes trouvées'],
         ['Signatures binaires', get_status(steg['binary_signatures']),
          str(len(steg['binary_signatures'])) + ' signatures'],
+        ['Fichiers incrustés', get_status(steg.get('carved')),
+         f"{len(steg.get('carved', []))} extraits ({sum(e['length'] for e in steg.get('carved', []))} octets)"],
         ['Anomalies bit-planes', get_status(steg['bit_plane_anomaly']),
          f"Entropie: {steg.get('bit_plane_details', {}).get('lsb_entropy', 0):.3f}"],
         ['Anomalies histogramme', get_status(steg['histogram_anomaly']),
          ', '.join(steg.get('histogram_details', {}).get('anomalous_channels', [])) or '-'],
     ]
     
+    png = steg.get('png')
+    if png:
+        results_data.append(['Structure PNG', get_status(png['anomalies']),
+                             (png['anomalies'][0] if png['anomalies'] else
+                              f"{sum(png['chunk_counts'].values())} chunks")[:60]])
+    
+    jpeg = steg.get('jpeg')
+    if jpeg:
+        results_data.append(['Structure JPEG', get_status(jpeg['anomalies']),
+                             (jpeg['anomalies'][0] if jpeg['anomalies'] else
+                              f"{len(jpeg['segments'])} segments, {jpeg['scans']} scan(s)")[:60]])
+    dct = steg.get('dct')
+    if dct:
+        results_data.append(['Coefficients DCT', get_status(dct['jsteg_suspected'] or dct['f5_suspected']),
+                             f"JSteg chi²: {dct['jsteg']['probability']:.2f} | F5 β: {jpeg_parser.format_f5_beta(dct)}"])
+    
+    frames = results.get('frames')
+    if frames:
+        flagged = [f"#{frame['index']} ({', '.join(frame['methods'])})" for frame in frames['with_findings']]
+        results_data.append(['Frames suivantes', get_status(flagged),
+                             (', '.join(flagged) or f"{frames['analyzed']} analysées")[:60]])
+    
+    decoded = steg.get('decoded')
+    if decoded:
+        results_data.append(['Charges décodées', get_status(decoded),
+                             f"{decoded[0]['source']} ({decoded[0]['transforms']}) : "
+                             f"{(decoded[0]['plaintext'] or '-')[:30]}"])
+    
+    entropy = steg.get('entropy')
+    if entropy:
+        regions = entropy['regions']
+        results_data.append(['Entropie des octets', get_status(regions),
+                             (f"{len(regions)} région(s), 1re à {regions[0]['hex_offset']}" if regions
+                              else f"Max {entropy['max']:.2f} bits/octet")])
+    
+    recursion = results.get('recursion')
+    if recursion:
+        results_data.append(['Analyse récursive', get_status(recursion['flagged']),
+                             f"{recursion['nodes']} fichiers, {recursion['flagged']} avec résultats, "
+                             f"profondeur {recursion['depth']}"])
+    
+    known = results.get('known_hashes')
+    if known:
+        results_data.append(['Hachages connus', get_status(known['carrier'] or known['carved']),
+                             'Porteur connu' if known['carrier'] else
+                             f"{len(known['carved'])} charge(s) extraite(s) connue(s)"])
+    
+    duplicates = results.get('near_duplicates')
+    if duplicates and duplicates['matches']:
+        closest = duplicates['matches'][0]
+        diff = duplicates['diff'] or {}
+        changes = [f"+{method}" for method in diff.get('new_findings', [])] + \
+                  [f"-{method}" for method in diff.get('missing_findings', [])]
+        results_data.append(['Quasi-doublons', get_status(changes),
+                             f"{closest['image']} ({closest['distance']} bits)"
+                             f"{' : ' + ', '.join(changes) if changes else ''}"[:60]])
+    
+    for plugin in results.get('plugins', {}).values():
+        results_data.append([plugin['label'], get_status(plugin['finding']),
+                             (plugin.get('error') or plugin.get('summary') or '-')[:60]])
+    
     results_table = Table(results_data, colWidths=[5*cm, 3*cm, 8*cm])
-    results_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#16213e')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-    ]))
+    results_table.setStyle(styles['results_table'])
     elements.append(results_table)
+    if entropy and len(entropy['profile']) > 1:
+        elements.append(Spacer(1, 10))
+        elements.append(_entropy_drawing(entropy['profile'], ENTROPY_THRESHOLD, 16*cm, 3*cm))
     elements.append(Spacer(1, 30))
     
     # Conclusion
@@ -934,17 +2322,10 @@ def generate_pdf_report(results: Dict[str, Any], output_path: Path, image_path:
     elements.append(Paragraph(conclusion_text, normal_style))
     
     if level in ['medium', 'high']:
-        warning_style = ParagraphStyle(
-            'Warning',
-            parent=normal_style,
-            textColor=colors.HexColor('#856404'),
-            backColor=colors.HexColor('#fff3cd'),
-            borderPadding=10
-        )
         elements.append(Spacer(1, 10))
         elements.append(Paragraph(
             "⚠ Plusieurs indices de dissimulation détectés. Une analyse approfondie est recommandée.",
-            warning_style
+            styles['warning']
         ))
 
     # Section Analyse Intelligente
@@ -966,14 +2347,7 @@ def generate_pdf_report(results: Dict[str, Any], output_path: Path, image_path:
             ]
             
             ia_table = Table(ia_data, colWidths=[5*cm, 11*cm])
-            ia_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#16213e')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-            ]))
+            ia_table.setStyle(styles['ia_table'])
             elements.append(ia_table)
             
             # Résumé IA détaillé
@@ -1009,25 +2383,306 @@ def generate_pdf_report(results: Dict[str, Any], output_path: Path, image_path:
                     elements.append(Paragraph(f"<b>{i}.</b> {rec}", normal_style))
                     elements.append(Spacer(1, 5))
     
-    # Footer
+    return elements
+
+
+def generate_pdf_report(results: Dict[str, Any], output_path: Path,
+                        assets: Optional[Dict[str, Any]] = None):
+    """Génère le rapport PDF avec ReportLab."""
+    print(f"\n{Fore.CYAN}[INFO] Génération du rapport PDF...")
+    
+    styles = get_pdf_styles()
+    
+    elements = []
+    
+    # Titre
+    elements.append(Paragraph("LE DÉCODEUR", styles['title']))
+    elements.append(Paragraph("Rapport d'Analyse Forensique d'Images", styles['subtitle']))
+    elements.append(Spacer(1, 20))
+    
+    elements.extend(build_pdf_elements(results, assets))
+    
+    # Footer
     elements.append(Spacer(1, 40))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=normal_style,
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=TA_CENTER
-    )
     elements.append(Paragraph(
         f"Le Décodeur - Analyse Forensique d'Images v1.0 | Généré le {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        footer_style
+        styles['footer']
     ))
     
     # Générer le PDF
-    doc.build(elements)
+    def write(path: Path):
+        doc = SimpleDocTemplate(
+            str(path),
+            pagesize=A4,
+            rightMargin=2*cm,
+            leftMargin=2*cm,
+            topMargin=2*cm,
+            bottomMargin=2*cm
+        )
+        doc.build(elements)
+    
+    replace_atomically(output_path, write)
     print(f"{Fore.GREEN}[+] Rapport PDF généré : {output_path}")
 
 
+class PDFReportWorker:
+    """
+    Rend les rapports PDF en arrière-plan pour que --pdf n'allonge pas
+    la latence d'analyse. `wait()` attend la fin des rendus en cours.
+    """
+    
+    def __init__(self, max_workers: int = PDF_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pdf-report')
+        self.pending = []
+    
+    def submit(self, results: Dict[str, Any], output_path: Path, assets: Optional[Dict[str, Any]] = None):
+        """Planifie le rendu d'un rapport PDF."""
+        future = self.executor.submit(generate_pdf_report, results, output_path, assets)
+        self.pending.append((output_path, future))
+    
+    def wait(self) -> int:
+        """Attend tous les rendus et retourne le nombre d'échecs."""
+        failures = 0
+        for output_path, future in self.pending:
+            try:
+                future.result()
+            except Exception as e:
+                failures += 1
+                print(f"{Fore.RED}[ERREUR] Rapport PDF {output_path.name}: {e}")
+        self.pending = []
+        self.executor.shutdown(wait=True)
+        return failures
+
+
+class _StreamingDocTemplate(SimpleDocTemplate):
+    """
+    SimpleDocTemplate alimenté par un itérable de flowables : la liste de
+    travail de build() est complétée avant chaque flowable traité pour garder
+    `lookahead` éléments d'avance. keepWithNext voit ainsi tout son groupe (un
+    titre reste avec son tableau) sans que le document entier soit en mémoire.
+    """
+    
+    def __init__(self, filename: str, lookahead: int = CASE_REPORT_LOOKAHEAD, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.lookahead = max(2, lookahead)
+        self._source: Optional[Iterator[Any]] = None
+        self._window: List[Any] = []
+    
+    def build_stream(self, flowables: Iterable[Any]):
+        """Construit le document depuis un itérable (générateur) de flowables."""
+        self._source = iter(flowables)
+        self._window = []
+        self._refill()
+        try:
+            self.build(self._window)
+        finally:
+            self._source = None
+            self._window = []
+    
+    def _refill(self):
+        while self._source is not None and len(self._window) < self.lookahead:
+            try:
+                self._window.append(next(self._source))
+            except StopIteration:
+                self._source = None
+    
+    def handle_flowable(self, flowables):
+        # Seule la liste principale est complétée (pas les actions de début de page)
+        if flowables is self._window:
+            self._refill()
+        super().handle_flowable(flowables)
+
+
+class CaseReportBuilder:
+    """
+    Rapport de cas consolidé pour un lot (PDF ou HTML selon l'extension) :
+    tableau récapitulatif trié par suspicion puis une page de détail par
+    image signalée. Les résultats détaillés sont déversés dans un fichier
+    temporaire au fil du lot et relus un à un lors du rendu.
+    """
+    
+    def __init__(self, output_path: Path, flag_levels: List[str] = CASE_REPORT_FLAG_LEVELS):
+        self.output_path = Path(output_path)
+        self.flag_levels = flag_levels
+        self.use_html = self.output_path.suffix.lower() in ['.html', '.htm']
+        self.rows: List[Tuple[Any, ...]] = []
+        self.flagged_count = 0
+        self._spill = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+        self._lock = threading.Lock()
+    
+    def add(self, results: Dict[str, Any], assets: Optional[Dict[str, Any]] = None):
+        """Enregistre une image : ligne récapitulative + détail si elle est signalée."""
+        with self._lock:
+            self._add(results, assets)
+    
+    def _add(self, results: Dict[str, Any], assets: Optional[Dict[str, Any]]):
+        summary = results['summary']
+        level = summary['suspicion_level']
+        self.rows.append((
+            SUSPICION_ORDER.get(level, 0),
+            summary['total_findings'],
+            results['image'],
+            results.get('file_info', {}).get('sha256', '')[:16],
+            level,
+            ', '.join(summary['methods_with_findings']) or '-'
+        ))
+        
+        if level in self.flag_levels:
+            self.flagged_count += 1
+            record = {
+                'results': results,
+                'assets': {key: str(value) if isinstance(value, Path) else value
+                           for key, value in (assets or {}).items()}
+            }
+            self._spill.write(json.dumps(record, ensure_ascii=False, default=json_serializer) + '\n')
+    
+    def _sorted_rows(self) -> List[Tuple[Any, ...]]:
+        return sorted(self.rows, key=lambda row: (-row[0], -row[1], row[2]))
+    
+    def _flagged_records(self):
+        """Relit les images signalées une par une depuis le fichier temporaire."""
+        self._spill.seek(0)
+        for line in self._spill:
+            record = json.loads(line)
+            assets = record['assets']
+            for key in ['thumbnail', 'lsb_plane']:
+                if assets.get(key):
+                    assets[key] = Path(assets[key])
+            yield record['results'], assets
+    
+    def _count_by_level(self) -> Dict[str, int]:
+        counts = {level: 0 for level in SUSPICION_ORDER}
+        for row in self.rows:
+            counts[row[4]] = counts.get(row[4], 0) + 1
+        return counts
+    
+    # ------------------------------------------------------------------ PDF
+    
+    def _pdf_flowables(self):
+        styles = get_pdf_styles()
+        counts = self._count_by_level()
+        
+        yield Paragraph("LE DÉCODEUR", styles['title'])
+        yield Paragraph("Rapport de Cas Consolidé", styles['subtitle'])
+        yield Spacer(1, 20)
+        yield Paragraph("Synthèse du Lot", styles['heading'])
+        yield Paragraph(
+            f"<b>Images analysées:</b> {len(self.rows)}<br/>"
+            f"<b>Images signalées ({', '.join(self.flag_levels).upper()}):</b> {self.flagged_count}<br/>"
+            + '<br/>'.join(f"<b>{level.upper()}:</b> {count}" for level, count in counts.items()),
+            styles['normal']
+        )
+        yield Spacer(1, 20)
+        yield Paragraph("Images par Niveau de Suspicion", styles['heading'])
+        
+        # Tableau découpé en morceaux pour éviter un Table géant en mémoire
+        header = ['Image', 'SHA-256', 'Niveau', 'Méthodes']
+        rows = self._sorted_rows()
+        for start in range(0, len(rows), CASE_REPORT_TABLE_CHUNK):
+            chunk = [header] + [
+                [row[2][:40], row[3], row[4].upper(), row[5][:60]]
+                for row in rows[start:start + CASE_REPORT_TABLE_CHUNK]
+            ]
+            table = Table(chunk, colWidths=[5*cm, 3.5*cm, 2*cm, 5.5*cm], repeatRows=1)
+            table.setStyle(styles['results_table'])
+            yield table
+        
+        for results, assets in self._flagged_records():
+            yield PageBreak()
+            yield Paragraph(f"Détail : {results['image']}", styles['title'])
+            for flowable in build_pdf_elements(results, assets):
+                yield flowable
+        
+        yield Spacer(1, 40)
+        yield Paragraph(
+            f"Le Décodeur - Rapport de cas | Généré le {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            styles['footer']
+        )
+    
+    def _build_pdf(self):
+        doc = _StreamingDocTemplate(
+            str(self.output_path),
+            pagesize=A4,
+            rightMargin=2*cm,
+            leftMargin=2*cm,
+            topMargin=2*cm,
+            bottomMargin=2*cm,
+            pageCompression=1
+        )
+        doc.build_stream(self._pdf_flowables())
+    
+    # ----------------------------------------------------------------- HTML
+    
+    def _build_html(self):
+        level_colors_map = {'none': '#28a745', 'low': '#28a745', 'medium': '#ffc107', 'high': '#dc3545'}
+        esc = html.escape
+        
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            f.write("<!DOCTYPE html>\n<html lang=\"fr\"><head><meta charset=\"utf-8\">"
+                    "<title>Le Décodeur - Rapport de Cas</title><style>"
+                    "body{font-family:sans-serif;margin:2em;color:#1a1a2e}"
+                    "table{border-collapse:collapse;width:100%}"
+                    "th{background:#16213e;color:#fff}th,td{border:1px solid #ccc;padding:4px 8px;font-size:13px}"
+                    "tr:nth-child(even){background:#f5f5f5}section{page-break-before:always;margin-top:2em}"
+                    "</style></head><body>\n")
+            f.write("<h1>LE DÉCODEUR - Rapport de Cas Consolidé</h1>\n")
+            f.write(f"<p><b>Images analysées:</b> {len(self.rows)} &mdash; "
+                    f"<b>Images signalées:</b> {self.flagged_count}</p>\n")
+            
+            f.write("<h2>Images par Niveau de Suspicion</h2>\n<table>"
+                    "<tr><th>Image</th><th>SHA-256</th><th>Niveau</th><th>Méthodes</th></tr>\n")
+            for row in self._sorted_rows():
+                color = level_colors_map.get(row[4], '#000')
+                f.write(f"<tr><td>{esc(row[2])}</td><td><code>{esc(row[3])}</code></td>"
+                        f"<td style=\"color:{color}\"><b>{esc(row[4].upper())}</b></td>"
+                        f"<td>{esc(row[5])}</td></tr>\n")
+            f.write("</table>\n")
+            
+            for results, _ in self._flagged_records():
+                summary = results['summary']
+                steg = results['steganography']
+                f.write(f"<section><h2>Détail : {esc(results['image'])}</h2>\n<ul>")
+                f.write(f"<li><b>Chemin:</b> {esc(results['image_path'])}</li>")
+                f.write(f"<li><b>Niveau de suspicion:</b> {esc(summary['suspicion_level'].upper())}</li>")
+                f.write(f"<li><b>Méthodes avec résultats:</b> "
+                        f"{esc(', '.join(summary['methods_with_findings']) or 'Aucune')}</li>")
+                if steg.get('lsb'):
+                    f.write(f"<li><b>Message LSB:</b> <code>{esc(steg['lsb'][:200])}</code></li>")
+                for entry in steg.get('decoded', [])[:5]:
+                    if entry['plaintext']:
+                        f.write(f"<li><b>Décodé ({esc(entry['source'])}, {esc(entry['transforms'])}):</b> "
+                                f"<code>{esc(entry['plaintext'][:200])}</code></li>")
+                for sig in steg.get('binary_signatures', [])[:10]:
+                    f.write(f"<li><b>Signature:</b> {esc(sig['type'])} @ {esc(sig['hex_offset'])}</li>")
+                for entry in steg.get('carved', [])[:10]:
+                    f.write(f"<li><b>Extrait:</b> {esc(entry['type'])} ({entry['length']} octets) "
+                            f"<code>{esc(entry.get('sha256', '-'))}</code></li>")
+                for string in steg.get('ascii_strings', [])[:10]:
+                    f.write(f"<li><b>Chaîne:</b> <code>{esc(string[:120])}</code></li>")
+                ia = results.get('intelligent_analysis', {})
+                if ia.get('status') == 'success':
+                    f.write(f"<li><b>Score IA:</b> {ia['suspicion_score']}/100 "
+                            f"({esc(ia['danger_level'].upper())})</li>")
+                f.write("</ul></section>\n")
+            
+            f.write(f"<footer><p><small>Le Décodeur - Rapport de cas | Généré le "
+                    f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</small></p></footer>\n")
+            f.write("</body></html>\n")
+    
+    def build(self):
+        """Rend le rapport de cas et libère le fichier temporaire."""
+        print(f"\n{Fore.CYAN}[INFO] Génération du rapport de cas ({len(self.rows)} images, "
+              f"{self.flagged_count} signalées)...")
+        try:
+            if self.use_html:
+                self._build_html()
+            else:
+                self._build_pdf()
+        finally:
+            self._spill.close()
+        print(f"{Fore.GREEN}[+] Rapport de cas généré : {self.output_path}")
+
+
 
 # ============================================================================
 # DOCUMENTATION
@@ -1047,12 +2702,59 @@ DOCUMENTATION = """
 🚀 USAGE:
    python decodeur.py --image <FICHIER> [OPTIONS]
 
-📌 OPTIONS OBLIGATOIRES:
+📌 OPTIONS OBLIGATOIRES (l'une ou l'autre):
    --image, -i <FICHIER>     Chemin vers l'image à analyser (JPG, PNG, BMP, etc.)
+   --batch, -b <DOSSIER>     Analyser toutes les images d'un dossier
+   --watch <DOSSIER...>      Mode démon : analyser les fichiers déposés dans ces dossiers
+   --worker                  Analyser les images d'une file de travaux (--queue)
 
 📌 OPTIONS UTILES:
    --output, -o <DOSSIER>    Dossier de sortie pour les rapports (défaut: même dossier)
    --pdf                      Générer un rapport PDF détaillé
+   --parquet <FICHIER>        Export colonnaire (Parquet/Arrow) des résultats aplatis
+   --case-report <FICHIER>    Rapport de cas consolidé du lot (.pdf ou .html)
+   --ocr-tiles auto|on|off    OCR par tuiles parallèles (auto: au-delà de 16 MP)
+   --no-ocr-regions           OCR sur toute l'image (sans pré-passe de régions)
+   --ocr-variants             OCR sur variantes CLAHE/seuil/inversion/canaux/LSB
+   --ocr-lang <LANGUES>       Langues OCR (codes EasyOCR, ex: en,fr)
+   --ocr-detect-script        Détection d'écriture (OSD) avant de charger les modèles
+   --max-frames <N>           Frames GIF/APNG/TIFF (ou vidéo) analysées au plus
+   --video, -V <FICHIER>      Analyser une vidéo (frames en flux, échantillonnées)
+   --video-sampling stride|scene  Vidéo : une frame sur N ou changements de scène
+   --video-stride <N>         Vidéo : pas d'échantillonnage (mode stride)
+   --carve                    Extraire les fichiers incrustés dans <sortie>/<image>_carved/
+   --recursive, -r            Analyser récursivement les fichiers extraits (implique --carve)
+   --max-depth <N>            Profondeur d'imbrication max de l'analyse récursive
+   --recursion-budget <Mo>    Octets analysés/décompressés au plus par image
+   --skip <NOMS>              Analyseurs à ignorer (ex: ocr,dct ; cf. --list-analyzers)
+   --max-cost <C>             Ignorer les analyseurs de coût estimé supérieur à C
+   --list-analyzers           Lister les analyseurs (intégrés et plugins) et leur coût
+   --known-bad <BASE>         Base de hachages connus (<BASE>.bloom + <BASE>.idx)
+   --build-known-bad <LISTE>  Construire --known-bad depuis une liste de SHA-256 puis quitter
+   --analyze-known-bad        Analyser quand même un porteur connu (sinon pipeline évité)
+   --index-db <FICHIER>       Index plein texte SQLite (FTS5) alimenté par chaque analyse
+   --search <REQUÊTE>         Rechercher dans --index-db (images + extraits) puis quitter
+   --index-reports <DOSSIER>  Indexer les rapports JSON existants dans --index-db puis quitter
+   --duplicate-index <FICHIER>  Index des analyses (pHash/dHash) : quasi-doublons et comparaison
+   --reuse-duplicates         Reprendre l'OCR d'un quasi-doublon très proche au lieu de le refaire
+   --checkpoint <FICHIER>     Mode batch : journal de reprise (lot interrompu repris)
+   --no-resume                Mode batch : ignorer le journal et tout ré-analyser
+   --manifest <FICHIER>       Mode démon : manifeste des fichiers traités
+   --max-megapixels <MP>      Dimensions déclarées max, lues dans l'en-tête (0 = illimité)
+   --max-file-size <MO>       Taille max d'une image (0 = illimitée)
+   --isolate-decode           Décodage dans un processus séparé à mémoire surveillée
+   --decode-memory <MO>       Mémoire résidente max du décodage isolé
+   --stage-timeout <S>        Durée max d'une étape avant abandon (0 = illimitée)
+   --queue <URL>              File de travaux : --batch/--watch y déposent les images
+   --worker                   Analyser les images de --queue (--drain : jusqu'à file vide)
+   --job-timeout <S>          Worker : durée max d'un travail avant arrêt pour relance (0 = aucune)
+   --queue-status             État de --queue (dont travaux en quarantaine) puis quitter
+   --requeue-dead             Remettre en file les travaux en quarantaine puis quitter
+   --poll                     Mode démon : polling au lieu d'inotify
+   --workers, -w <N>          Mode batch / démon : images analysées en parallèle
+   --ocr-batch-size <N>       Mode batch : entrées EasyOCR par inférence batchée
+   --ocr-batch-wait <S>       Mode batch : attente max avant un lot incomplet
+   --ocr-recognizer-batch <N> Lignes de texte par passe du reconnaisseur EasyOCR
    --verbose, -v              Affichage détaillé de toutes les étapes
    --docs, -d                 Afficher cette documentation
 
@@ -1063,14 +2765,27 @@ DOCUMENTATION = """
    • Métadonnées EXIF         Analyse des données embarquées
    • Chaînes ASCII             Recherche de contenu textuel caché
    • Signatures binaires       Détection de fichiers cachés
+   • Carving                   Extraction des fichiers cachés (étendue validée, SHA-256)
+   • Décodage                  base64 / hex / zlib / gzip / XOR des flux extraits
+   • Entropie des octets       Régions chiffrées/compressées hors données image
+   • Analyse récursive         Fichiers extraits et membres ZIP/GZIP ré-analysés (arbre)
    • Bit-planes                Analyse spectrale des plans de bits
    • Histogramme               Détection d'anomalies statistiques
+   • Frames multiples          GIF animé / APNG / TIFF multi-pages, frame par frame
+   • Structure PNG             Chunks : CRC, inconnus/privés, données après IEND
+   • Structure JPEG            Segments APPn/COM/DQT/SOF/SOS, données après EOI
+   • Coefficients DCT          Détection JSteg (chi²) et F5 (calibration)
+   • Vidéo                     Frames échantillonnées (pas fixe / changement de scène)
    • Analyse LLM               Analyse intelligente avec NLP
+   • Plugins                   Analyseurs externes (points d'entrée decodeur.analyzers)
+   • Quasi-doublons            pHash/dHash + arbre BK : analyses précédentes et différences
+   • Hachages connus           SHA-256 du porteur et des charges extraites (Bloom + index)
 
 📊 RÉSULTATS:
    • Rapport JSON              Données structurées complètes
    • Rapport PDF               Rapport formaté pour présentation
    • Rapport Terminal          Résumé visuel immédiat
+   • Export Parquet/Arrow      Table colonnaire pour l'analyse de flotte
 
 💡 EXEMPLES D'UTILISATION:
    # Analyse basique
@@ -1085,6 +2800,16 @@ DOCUMENTATION = """
    # Rapport vers un dossier spécifique
    python decodeur.py --image photo.jpg --output ./rapports --pdf --verbose
    
+   # Surveiller des dossiers de dépôt (Ctrl+C pour arrêter)
+   python decodeur.py --watch ./depot1 ./depot2 --output ./rapports --workers 4
+   
+   # Répartir un lot sur plusieurs workers (dossiers partagés entre les machines)
+   python decodeur.py --batch /partage/preuves --queue ./travaux.db
+   python decodeur.py --worker --queue ./travaux.db --output /partage/rapports --drain
+   
+   # Retrouver toutes les images mentionnant une adresse
+   python decodeur.py --index-db ./cas.db --search "alice@example.com"
+   
    # Afficher cette documentation
    python decodeur.py --docs
 
@@ -1116,6 +2841,7 @@ DOCUMENTATION = """
    • opencv-python      - Traitement d'images
    • pillow             - Manipulation d'images
    • pytesseract        - OCR Tesseract
+   • tesserocr          - Tesseract en processus (optionnel, plus rapide)
    • easyocr            - OCR multi-langue
    • stegano            - Analyse stéganographie
    • reportlab          - Génération PDF
@@ -1135,10 +2861,193 @@ def display_documentation():
     sys.exit(0)
 
 
+def print_search_results(query: str, matches: List[Dict[str, Any]], elapsed: float):
+    """Affiche les résultats d'une recherche plein texte, groupés par image."""
+    images = {}
+    for match in matches:
+        images.setdefault(match['sha256'], []).append(match)
+    print(f"{Fore.CYAN}[RECHERCHE] « {query} » : {len(matches)} texte(s) dans {len(images)} image(s) "
+          f"({elapsed * 1000:.1f} ms)")
+    for image_matches in images.values():
+        first = image_matches[0]
+        print(f"\n  {Fore.WHITE}{Style.BRIGHT}{first['image']}{Style.RESET_ALL} "
+              f"({first['suspicion_level'].upper()}, {first['analysis_date'][:10]}) {first['sha256'][:16]}...")
+        print(f"    {first['image_path']}")
+        for match in image_matches:
+            print(f"    {Fore.YELLOW}{match['source']}{Style.RESET_ALL} : {' '.join(match['snippet'].split())}")
+
+
+def list_analyzers():
+    """Affiche les analyseurs enregistrés (ordre, coût, formats, dépendances)."""
+    print(f"{Fore.WHITE}{Style.BRIGHT}{'Nom':<12} {'Coût':>6}  {'Formats':<10} {'Source':<9} Entrées -> Sorties")
+    for spec in sorted(REGISTRY.specs(), key=lambda spec: (not spec.builtin, spec.name)):
+        formats = ','.join(sorted(spec.formats)) if spec.formats else 'tous'
+        flags = ' [parallèle]' if spec.parallel else ''
+        print(f"{spec.name:<12} {spec.cost:>6g}  {formats:<10} {spec.source:<9} "
+              f"{', '.join(sorted(spec.inputs)) or '-'} -> {', '.join(sorted(spec.outputs))}{flags}")
+    for name, error in REGISTRY.plugin_errors.items():
+        print(f"{Fore.RED}[PLUGINS] {name} : {error}")
+    sys.exit(0)
+
+
 # ============================================================================
 # POINT D'ENTRÉE CLI
 # ============================================================================
 
+def print_queue_status(url: str, work_queue: job_queue.JobQueue):
+    """Affiche les travaux par état et les images en quarantaine."""
+    counts = work_queue.stats()
+    print(f"{Fore.CYAN}[QUEUE] {url} : {counts['pending']} en attente, {counts['leased']} en cours, "
+          f"{counts['done']} terminés, {counts['dead']} en quarantaine")
+    for job in work_queue.dead_letters():
+        print(f"  {Fore.RED}{job['path']}{Style.RESET_ALL} ({job['attempts']} tentatives) : {job['error']}")
+
+
+def run_service(args, output_dir: Optional[Path], pdf_worker: Optional[PDFReportWorker],
+                ocr_batcher: Optional[ocr_engine.EasyOCRBatcher],
+                duplicate_index: Optional[perceptual_hash.DuplicateIndex],
+                hash_database: Optional[known_hashes.KnownHashDatabase],
+                search_index: Optional[text_index.TextIndex],
+                columnar_writer: Optional[ColumnarFindingsWriter],
+                work_queue: Optional[job_queue.JobQueue]):
+    """
+    Modes sans fin, jusqu'à Ctrl+C ou SIGTERM : surveillance des dossiers de
+    --watch (analyse, ou dépôt dans --queue), ou worker de --queue.
+    Retourne True si le worker s'est arrêté sur un travail bloqué (à relancer).
+    """
+    record_lock = threading.Lock()
+    
+    def analyze(path: Path) -> Dict[str, Any]:
+        results = analyze_image(path, output_dir or path.parent, args, pdf_worker, None, ocr_batcher,
+                                duplicate_index, hash_database)
+        if search_index is not None:
+            search_index.add(results)
+        if columnar_writer:
+            with record_lock:
+                columnar_writer.add(results)
+        return results
+    
+    def on_idle():
+        # Pool vide : index et résultats rendus visibles sans attendre l'arrêt
+        if search_index is not None:
+            search_index.flush()
+        if duplicate_index is not None:
+            duplicate_index.save()
+    
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    
+    if args.worker:
+        def handle(path: Path) -> str:
+            return analyze(path)['summary']['suspicion_level']
+        
+        return job_queue.QueueWorker(work_queue, handle, workers=args.workers, drain=args.drain,
+                                     on_idle=on_idle, job_timeout=args.job_timeout or None).run(stop)
+    
+    def enqueue(path: Path) -> None:
+        # Coordinateur : le fichier stabilisé est confié aux workers (remis en file s'il a changé)
+        work_queue.enqueue([str(path.resolve())], requeue=True)
+        print(f"{Fore.CYAN}[QUEUE] {path.name} ajouté à la file")
+    
+    manifest_path = args.manifest or str(Path(args.output or args.watch[0]) / WATCH_MANIFEST_NAME)
+    watcher = FolderWatcher([Path(directory) for directory in args.watch],
+                            enqueue if work_queue is not None else analyze, Manifest(manifest_path),
+                            IMAGE_EXTENSIONS + VIDEO_EXTENSIONS, workers=args.workers,
+                            on_idle=on_idle, use_inotify=not args.poll)
+    watcher.run(stop)
+    return False
+
+
+def collect_images(directory: Path) -> List[Path]:
+    """Liste les images et vidéos d'un dossier (non récursif), triées par nom."""
+    return sorted(
+        p for p in directory.iterdir()
+        if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS + VIDEO_EXTENSIONS
+    )
+
+
+def build_options(args) -> Dict[str, Any]:
+    """Traduit les arguments CLI en options de ForensicAnalyzer."""
+    return {
+        'ocr_tiling': args.ocr_tiles,
+        'ocr_regions': not args.no_ocr_regions,
+        'ocr_variants': args.ocr_variants or ANALYSIS_OPTIONS['ocr_variants'],
+        'ocr_languages': args.ocr_lang.split(',') if args.ocr_lang else ANALYSIS_OPTIONS['ocr_languages'],
+        'ocr_script_detection': args.ocr_detect_script or ANALYSIS_OPTIONS['ocr_script_detection'],
+        'max_frames': args.max_frames,
+        'video_sampling': args.video_sampling,
+        'video_stride': args.video_stride,
+        'recursive': args.recursive,
+        'recursion_depth': args.max_depth,
+        'recursion_budget': args.recursion_budget * 1024 * 1024,
+        'skip_analyzers': [name.strip() for name in args.skip.split(',') if name.strip()] if args.skip else [],
+        'max_cost': args.max_cost,
+        'reuse_duplicates': args.reuse_duplicates,
+        'known_hash_short_circuit': not args.analyze_known_bad,
+        'max_image_pixels': int(args.max_megapixels * 1_000_000) or None,
+        'max_file_size_mb': args.max_file_size or None,
+        'isolate_decode': args.isolate_decode,
+        'decode_max_rss_mb': args.decode_memory,
+        'stage_timeout': args.stage_timeout or None,
+    }
+
+
+# Sérialise l'affichage des rapports terminal quand plusieurs images sont analysées en parallèle
+_REPORT_LOCK = threading.Lock()
+
+
+def report_paths(image_path: Path, output_dir: Path, args) -> Dict[str, Path]:
+    """Rapports produits pour une image : JSON, et PDF avec --pdf."""
+    paths = {'json': output_dir / f"{image_path.stem}_forensic_report.json"}
+    if args.pdf:
+        paths['pdf'] = output_dir / f"{image_path.stem}_forensic_report.pdf"
+    return paths
+
+
+def analyze_image(image_path: Path, output_dir: Path, args,
+                  pdf_worker: Optional[PDFReportWorker] = None,
+                  case_report: Optional[CaseReportBuilder] = None,
+                  ocr_batcher: Optional[ocr_engine.EasyOCRBatcher] = None,
+                  duplicate_index: Optional[perceptual_hash.DuplicateIndex] = None,
+                  hash_database: Optional[known_hashes.KnownHashDatabase] = None) -> Dict[str, Any]:
+    """Analyse une image (ou une vidéo) et génère ses rapports (terminal, JSON, PDF)."""
+    is_video = args.video or image_path.suffix.lower() in VIDEO_EXTENSIONS
+    analyzer_class = VideoForensicAnalyzer if is_video else ForensicAnalyzer
+    options = build_options(args)
+    if args.carve or args.recursive:
+        options['carve_dir'] = str(output_dir / f"{image_path.stem}_carved")
+    analyzer = analyzer_class(str(image_path), verbose=args.verbose, options=options,
+                              ocr_batcher=ocr_batcher, duplicate_index=duplicate_index,
+                              hash_database=hash_database)
+    results = analyzer.run_all_analyses()
+    
+    # Afficher le rapport terminal
+    with _REPORT_LOCK:
+        print_terminal_report(results)
+    
+    # Générer le rapport JSON
+    outputs = report_paths(image_path, output_dir, args)
+    generate_json_report(results, outputs['json'])
+    
+    # Visuels du PDF : seulement si un rapport PDF les affichera
+    assets = None
+    flagged = results['summary']['suspicion_level'] in CASE_REPORT_FLAG_LEVELS
+    if args.pdf or (case_report and flagged and not case_report.use_html):
+        assets = analyzer.build_report_assets(output_dir / '.thumbnails')
+    
+    if case_report:
+        case_report.add(results, assets)
+    
+    # Générer le rapport PDF si demandé (rendu en arrière-plan)
+    if args.pdf:
+        if pdf_worker:
+            pdf_worker.submit(results, outputs['pdf'], assets)
+        else:
+            generate_pdf_report(results, outputs['pdf'], assets)
+    
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Le Décodeur - Analyse Forensique d\'Images (Phase 1)',
@@ -1147,15 +3056,45 @@ def main():
 Exemples:
   python decodeur.py --image photo.png
   python decodeur.py --image photo.png --verbose --pdf
+  python decodeur.py --batch ./preuves --parquet ./flotte/findings.parquet
+  python decodeur.py --batch ./preuves --case-report ./rapports/cas.pdf
   python decodeur.py --docs (pour voir la documentation complète)
         '''
     )
     
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
         '--image', '-i',
         type=str,
-        required=True,
-        help='Chemin vers l\'image à analyser (obligatoire)'
+        help='Chemin vers l\'image à analyser'
+    )
+    
+    source.add_argument(
+        '--video', '-V',
+        type=str,
+        metavar='FICHIER',
+        help='Analyser une vidéo (frames décodées en flux et échantillonnées)'
+    )
+    
+    source.add_argument(
+        '--batch', '-b',
+        type=str,
+        metavar='DOSSIER',
+        help='Analyser toutes les images d\'un dossier'
+    )
+    
+    source.add_argument(
+        '--watch',
+        type=str,
+        nargs='+',
+        metavar='DOSSIER',
+        help='Mode démon : surveiller ces dossiers et analyser chaque fichier déposé (Ctrl+C pour arrêter)'
+    )
+    
+    source.add_argument(
+        '--worker',
+        action='store_true',
+        help='Worker : analyser les images de la file --queue (plusieurs machines possibles)'
     )
     
     parser.add_argument(
@@ -1177,6 +3116,308 @@ Exemples:
         help='Générer un rapport PDF en plus du JSON'
     )
     
+    parser.add_argument(
+        '--parquet',
+        type=str,
+        metavar='FICHIER',
+        default=None,
+        help='Exporter les résultats aplatis en Parquet (.parquet) ou Arrow IPC (.arrow)'
+    )
+    
+    parser.add_argument(
+        '--case-report',
+        type=str,
+        metavar='FICHIER',
+        default=None,
+        help='Rapport de cas consolidé du lot (.pdf ou .html)'
+    )
+    
+    parser.add_argument(
+        '--ocr-tiles',
+        choices=['auto', 'on', 'off'],
+        default=ANALYSIS_OPTIONS['ocr_tiling'],
+        help='OCR par tuiles parallèles pour les très grandes images (défaut: auto)'
+    )
+    
+    parser.add_argument(
+        '--no-ocr-regions',
+        action='store_true',
+        help='Désactiver la pré-passe de détection de régions de texte (OCR sur toute l\'image)'
+    )
+    
+    parser.add_argument(
+        '--ocr-variants',
+        action='store_true',
+        help='OCR sur plusieurs variantes de pré-traitement (texte peu contrasté)'
+    )
+    
+    parser.add_argument(
+        '--ocr-lang',
+        metavar='LANGUES',
+        help=f"Langues OCR, codes EasyOCR séparés par des virgules (défaut: {','.join(OCR_LANGUAGES)})"
+    )
+    
+    parser.add_argument(
+        '--ocr-detect-script',
+        action='store_true',
+        help="Détecte l'écriture (OSD Tesseract) et ne charge que les langues correspondantes"
+    )
+    
+    parser.add_argument(
+        '--max-frames',
+        type=int,
+        default=MAX_FRAMES,
+        help=f'Frames GIF/APNG/TIFF analysées en plus de la première, 0 = aucune (défaut: {MAX_FRAMES})'
+    )
+    
+    parser.add_argument(
+        '--video-sampling',
+        choices=['stride', 'scene'],
+        default=VIDEO_SAMPLING,
+        help=f'Vidéo : une frame sur N ou changements de scène (défaut: {VIDEO_SAMPLING})'
+    )
+    
+    parser.add_argument(
+        '--video-stride',
+        type=int,
+        default=VIDEO_FRAME_STRIDE,
+        help=f"Vidéo : pas d'échantillonnage en mode stride (défaut: {VIDEO_FRAME_STRIDE})"
+    )
+    
+    parser.add_argument(
+        '--carve',
+        action='store_true',
+        help='Extraire les fichiers incrustés détectés vers <sortie>/<image>_carved/'
+    )
+    
+    parser.add_argument(
+        '--recursive', '-r',
+        action='store_true',
+        help="Analyser récursivement les fichiers extraits et les membres d'archives (implique --carve)"
+    )
+    
+    parser.add_argument(
+        '--max-depth',
+        type=int,
+        default=RECURSION_MAX_DEPTH,
+        help=f"Analyse récursive : profondeur d'imbrication max (défaut: {RECURSION_MAX_DEPTH})"
+    )
+    
+    parser.add_argument(
+        '--recursion-budget',
+        type=int,
+        metavar='MO',
+        default=RECURSION_MAX_BYTES // (1024 * 1024),
+        help=f"Analyse récursive : Mo analysés/décompressés au plus par image "
+             f"(défaut: {RECURSION_MAX_BYTES // (1024 * 1024)})"
+    )
+    
+    parser.add_argument(
+        '--skip',
+        type=str,
+        metavar='NOMS',
+        help='Analyseurs à ignorer, séparés par des virgules (ex: ocr,dct)'
+    )
+    
+    parser.add_argument(
+        '--max-cost',
+        type=float,
+        metavar='C',
+        help="Ignorer les analyseurs dont le coût estimé dépasse C (1 = une passe sur l'image)"
+    )
+    
+    parser.add_argument(
+        '--list-analyzers',
+        action='store_true',
+        help='Lister les analyseurs enregistrés (intégrés et plugins) puis quitter'
+    )
+    
+    parser.add_argument(
+        '--known-bad',
+        type=str,
+        metavar='BASE',
+        default=KNOWN_HASH_DB,
+        help='Base de hachages SHA-256 connus (<BASE>.bloom et <BASE>.idx) : porteur et charges extraites vérifiés'
+    )
+    
+    parser.add_argument(
+        '--build-known-bad',
+        type=str,
+        metavar='LISTE',
+        help='Construire la base --known-bad depuis une liste de SHA-256 (une par ligne) puis quitter'
+    )
+    
+    parser.add_argument(
+        '--analyze-known-bad',
+        action='store_true',
+        help="Analyser quand même un porteur connu (par défaut, seules l'identification et la corrélation sont faites)"
+    )
+    
+    parser.add_argument(
+        '--index-db',
+        type=str,
+        metavar='FICHIER',
+        default=TEXT_INDEX_PATH,
+        help='Index plein texte SQLite (FTS5) : textes extraits de chaque analyse ajoutés (créé si absent)'
+    )
+    
+    parser.add_argument(
+        '--search',
+        type=str,
+        metavar='REQUÊTE',
+        help='Rechercher dans --index-db (syntaxe FTS5 : mots, "phrase", OR, préfixe*) puis quitter'
+    )
+    
+    parser.add_argument(
+        '--index-reports',
+        type=str,
+        metavar='DOSSIER',
+        help='Indexer dans --index-db les rapports JSON existants du dossier (et sous-dossiers) puis quitter'
+    )
+    
+    parser.add_argument(
+        '--duplicate-index',
+        type=str,
+        metavar='FICHIER',
+        default=DUPLICATE_INDEX_PATH,
+        help='Index JSON des analyses précédentes (pHash/dHash) : signale les quasi-doublons '
+             'et les compare (créé si absent)'
+    )
+    
+    parser.add_argument(
+        '--reuse-duplicates',
+        action='store_true',
+        help="Avec --duplicate-index : reprendre l'OCR d'un quasi-doublon très proche au lieu de le refaire"
+    )
+    
+    parser.add_argument(
+        '--checkpoint',
+        type=str,
+        metavar='FICHIER',
+        help=f'Mode batch : journal de reprise des images terminées (défaut: <sortie>/{CHECKPOINT_NAME})'
+    )
+    
+    parser.add_argument(
+        '--no-resume',
+        action='store_true',
+        help='Mode batch : ignorer le journal de reprise et ré-analyser tout le lot'
+    )
+    
+    parser.add_argument(
+        '--max-megapixels',
+        type=float,
+        default=MAX_IMAGE_PIXELS / 1_000_000,
+        metavar='MP',
+        help=f'Dimensions déclarées max, vérifiées avant décodage (défaut: {MAX_IMAGE_PIXELS / 1_000_000:g}, 0 = illimité)'
+    )
+    
+    parser.add_argument(
+        '--max-file-size',
+        type=float,
+        default=MAX_FILE_SIZE_MB,
+        metavar='MO',
+        help=f'Taille max d\'une image en Mo (défaut: {MAX_FILE_SIZE_MB}, 0 = illimitée)'
+    )
+    
+    parser.add_argument(
+        '--isolate-decode',
+        action='store_true',
+        help='Décoder chaque image dans un processus séparé à mémoire surveillée (fichiers hostiles)'
+    )
+    
+    parser.add_argument(
+        '--decode-memory',
+        type=float,
+        default=DECODE_MAX_RSS_MB,
+        metavar='MO',
+        help=f'Avec --isolate-decode : mémoire résidente max du décodage (défaut: {DECODE_MAX_RSS_MB})'
+    )
+    
+    parser.add_argument(
+        '--stage-timeout',
+        type=float,
+        default=STAGE_TIMEOUT,
+        metavar='S',
+        help=f'Durée max d\'une étape avant abandon (défaut: {STAGE_TIMEOUT}, 0 = illimitée)'
+    )
+    
+    parser.add_argument(
+        '--queue',
+        type=str,
+        metavar='URL',
+        help='File de travaux partagée (chemin SQLite ou <schéma>://... d\'un backend plugin) : '
+             'avec --batch/--watch, dépose les images au lieu de les analyser'
+    )
+    
+    parser.add_argument(
+        '--job-timeout',
+        type=float,
+        default=QUEUE_JOB_TIMEOUT,
+        metavar='S',
+        help=f'Worker : durée max d\'un travail; au-delà il est marqué en échec et le worker quitte '
+             f'(code {job_queue.EXIT_STALLED}) pour être relancé (défaut: {QUEUE_JOB_TIMEOUT}, 0 = aucune)'
+    )
+    
+    parser.add_argument(
+        '--drain',
+        action='store_true',
+        help='Worker : s\'arrêter quand la file est vide (sinon attendre de nouveaux travaux)'
+    )
+    
+    parser.add_argument(
+        '--queue-status',
+        action='store_true',
+        help='Afficher l\'état de --queue (travaux par état, quarantaine) puis quitter'
+    )
+    
+    parser.add_argument(
+        '--requeue-dead',
+        action='store_true',
+        help='Remettre en file les travaux en quarantaine de --queue puis quitter'
+    )
+    
+    parser.add_argument(
+        '--manifest',
+        type=str,
+        metavar='FICHIER',
+        help=f'Mode démon : manifeste des fichiers traités (défaut: <sortie>/{WATCH_MANIFEST_NAME})'
+    )
+    
+    parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='Mode démon : parcours périodique des dossiers au lieu d\'inotify'
+    )
+    
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=BATCH_WORKERS,
+        help=f'Mode batch / démon : images analysées en parallèle (défaut: {BATCH_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--ocr-batch-size',
+        type=int,
+        default=OCR_BATCH_SIZE,
+        help=f'Mode batch : entrées EasyOCR regroupées par inférence (défaut: {OCR_BATCH_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--ocr-batch-wait',
+        type=float,
+        default=OCR_BATCH_MAX_WAIT,
+        help=f'Mode batch : attente max (s) pour compléter un lot EasyOCR (défaut: {OCR_BATCH_MAX_WAIT})'
+    )
+    
+    parser.add_argument(
+        '--ocr-recognizer-batch',
+        type=int,
+        default=OCR_RECOGNIZER_BATCH_SIZE,
+        help=f'Mode batch : lignes de texte par passe du reconnaisseur EasyOCR, '
+             f'indépendant de --ocr-batch-size (défaut: {OCR_RECOGNIZER_BATCH_SIZE})'
+    )
+    
     parser.add_argument(
         '--docs', '-d',
         action='store_true',
@@ -1185,41 +3426,229 @@ Exemples:
     
     args = parser.parse_args()
     
+    # Garde de PIL alignée sur --max-megapixels (défaut de PIL si 0)
+    resource_guard.configure_pil(int(args.max_megapixels * 1_000_000) or None)
+    
     # Afficher la documentation si demandé
     if args.docs:
         display_documentation()
     
-    # Vérifier que l'image existe
-    image_path = Path(args.image)
-    if not image_path.exists():
-        print(f"{Fore.RED}[ERREUR] Image non trouvée: {args.image}")
-        sys.exit(1)
+    if args.list_analyzers:
+        list_analyzers()
+    
+    if args.search or args.index_reports:
+        if not args.index_db:
+            parser.error("--search et --index-reports nécessitent --index-db <FICHIER>")
+        index = text_index.TextIndex(args.index_db)
+        try:
+            if args.index_reports:
+                counts = index.ingest_reports(args.index_reports)
+                print(f"{Fore.GREEN}[+] Rapports indexés : {counts['indexed']}/{counts['reports']} "
+                      f"(inchangés : {counts['unchanged']}, invalides : {counts['invalid']})")
+            if args.search:
+                start = time.perf_counter()
+                matches = index.search(args.search)
+                print_search_results(args.search, matches, time.perf_counter() - start)
+        finally:
+            index.close()
+        sys.exit(0)
+    
+    if args.build_known_bad:
+        if not args.known_bad:
+            parser.error("--build-known-bad nécessite --known-bad <BASE>")
+        stats = known_hashes.build_database(args.build_known_bad, args.known_bad)
+        print(f"{Fore.GREEN}[+] Base de hachages construite : {args.known_bad} ({stats['entries']} empreintes, "
+              f"filtre {stats['bloom_bytes'] // 1024} Ko / {stats['functions']} fonctions, "
+              f"index {stats['index_bytes'] // 1024} Ko)")
+        sys.exit(0)
+    
+    if args.queue_status or args.requeue_dead:
+        if not args.queue:
+            parser.error("--queue-status et --requeue-dead nécessitent --queue <URL>")
+        work_queue = job_queue.open_queue(args.queue)
+        try:
+            if args.requeue_dead:
+                print(f"{Fore.GREEN}[+] Travaux remis en file : {work_queue.requeue_dead()}")
+            print_queue_status(args.queue, work_queue)
+        finally:
+            work_queue.close()
+        sys.exit(0)
+    
+    if not args.image and not args.video and not args.batch and not args.watch and not args.worker:
+        parser.error("l'une des options --image, --video, --batch, --watch ou --worker est requise")
+    if (args.watch or args.worker) and args.case_report:
+        parser.error("--case-report n'est pas disponible en mode --watch / --worker (lot sans fin)")
+    if args.worker and not args.queue:
+        parser.error("--worker nécessite --queue <URL>")
+    if args.queue and (args.image or args.video):
+        parser.error("--queue s'utilise avec --batch, --watch ou --worker")
+    
+    # Déterminer les images à analyser
+    if args.watch:
+        for directory in args.watch:
+            if not Path(directory).is_dir():
+                print(f"{Fore.RED}[ERREUR] Dossier non trouvé: {directory}")
+                sys.exit(1)
+        image_paths = []
+        # Sans --output, les rapports sont écrits à côté de chaque fichier
+        default_output = None
+    elif args.worker:
+        image_paths = []
+        default_output = None
+    elif args.batch:
+        batch_dir = Path(args.batch)
+        if not batch_dir.is_dir():
+            print(f"{Fore.RED}[ERREUR] Dossier non trouvé: {args.batch}")
+            sys.exit(1)
+        image_paths = collect_images(batch_dir)
+        if not image_paths:
+            print(f"{Fore.RED}[ERREUR] Aucune image trouvée dans: {args.batch}")
+            sys.exit(1)
+        default_output = batch_dir
+        # Coordinateur : le lot est déposé dans la file, les workers l'analysent
+        if args.queue:
+            work_queue = job_queue.open_queue(args.queue)
+            try:
+                added = work_queue.enqueue(str(path.resolve()) for path in image_paths)
+                print(f"{Fore.GREEN}[+] {added} images ajoutées à la file ({len(image_paths) - added} déjà présentes)")
+                print_queue_status(args.queue, work_queue)
+            finally:
+                work_queue.close()
+            return
+    else:
+        # Vérifier que l'image (ou la vidéo) existe
+        image_path = Path(args.image or args.video)
+        if not image_path.exists():
+            print(f"{Fore.RED}[ERREUR] Fichier non trouvé: {image_path}")
+            sys.exit(1)
+        image_paths = [image_path]
+        default_output = image_path.parent
     
     # Créer le dossier de sortie si spécifié
     if args.output:
         output_dir = Path(args.output)
         output_dir.mkdir(parents=True, exist_ok=True)
     else:
-        output_dir = image_path.parent
-    
+        output_dir = default_output
+    
+    columnar_writer = None
+    ocr_batcher = None
+    duplicate_index = None
+    hash_database = None
+    search_index = None
+    checkpoint = None
+    work_queue = None
+    stalled = False
+    pdf_worker = PDFReportWorker() if args.pdf else None
+    case_report = CaseReportBuilder(Path(args.case_report)) if args.case_report else None
     try:
-        # Exécuter l'analyse
-        analyzer = ForensicAnalyzer(str(image_path), verbose=args.verbose)
-        results = analyzer.run_all_analyses()
-        
-        # Afficher le rapport terminal
-        print_terminal_report(results)
-        
-        # Générer le rapport JSON
-        json_path = output_dir / f"{image_path.stem}_forensic_report.json"
-        generate_json_report(results, json_path)
-        
-        # Générer le rapport PDF si demandé
-        if args.pdf:
-            pdf_path = output_dir / f"{image_path.stem}_forensic_report.pdf"
-            generate_pdf_report(results, pdf_path, image_path)
-        
-        print(f"\n{Fore.GREEN}[+] Analyse terminée avec succès!")
+        if args.parquet:
+            columnar_writer = ColumnarFindingsWriter(args.parquet)
+        
+        if args.index_db:
+            search_index = text_index.TextIndex(args.index_db)
+        
+        if args.queue:
+            work_queue = job_queue.open_queue(args.queue)
+        
+        if args.known_bad:
+            hash_database = known_hashes.KnownHashDatabase(args.known_bad)
+            print(f"{Fore.CYAN}[+] Base de hachages connus : {args.known_bad} ({len(hash_database)} empreintes)")
+        
+        if args.duplicate_index:
+            duplicate_index = perceptual_hash.DuplicateIndex(args.duplicate_index)
+            print(f"{Fore.CYAN}[+] Index des quasi-doublons : {args.duplicate_index} "
+                  f"({len(duplicate_index)} analyses)")
+        
+        # Mode batch : images terminées journalisées, reprises au redémarrage
+        if args.batch:
+            checkpoint = Checkpoint(args.checkpoint or str(output_dir / CHECKPOINT_NAME), resume=not args.no_resume)
+            if len(checkpoint):
+                print(f"{Fore.CYAN}[REPRISE] Checkpoint : {checkpoint.path} ({len(checkpoint)} images terminées)")
+        
+        # Mode batch / démon / worker : EasyOCR regroupe les entrées de toutes les images en cours
+        if args.batch or args.watch or args.worker:
+            ocr_batcher = ocr_engine.EasyOCRBatcher(args.ocr_batch_size, args.ocr_batch_wait,
+                                                     recognizer_batch_size=args.ocr_recognizer_batch)
+        
+        def process(index: int, image_path: Path) -> Dict[str, Any]:
+            if args.batch:
+                print(f"\n{Fore.CYAN}[BATCH] ({index}/{len(image_paths)}) {image_path.name}")
+            stat = image_path.stat()
+            results = analyze_image(image_path, output_dir, args, pdf_worker, case_report, ocr_batcher,
+                                    duplicate_index, hash_database)
+            if checkpoint is not None:
+                checkpoint.record(image_path, results['file_info'].get('sha256'),
+                                  list(report_paths(image_path, output_dir, args).values()), stat)
+            return results
+        
+        def completed(image_path: Path) -> bool:
+            # Terminée, inchangée, et rapports de ce lancement présents (PDF rendu après le journal)
+            return (checkpoint.completed_entry(image_path) is not None
+                    and all(path.exists() for path in report_paths(image_path, output_dir, args).values()))
+        
+        def replay(image_path: Path) -> Dict[str, Any]:
+            # Image reprise : son rapport JSON alimente les sorties agrégées du lot
+            with open(report_paths(image_path, output_dir, args)['json'], 'r', encoding='utf-8') as f:
+                results = json.load(f)
+            if case_report:
+                case_report.add(results)
+            if (duplicate_index is not None and 'perceptual_hash' in results
+                    and results['file_info'].get('sha256') not in duplicate_index.entries):
+                duplicate_index.add(perceptual_hash.index_entry(results, DUPLICATE_REUSE_STAGES))
+            return results
+        
+        needs_replay = bool(columnar_writer or case_report or search_index is not None or duplicate_index is not None)
+        
+        if args.watch or args.worker:
+            stalled = run_service(args, output_dir, pdf_worker, ocr_batcher, duplicate_index,
+                                  hash_database, search_index, columnar_writer, work_queue)
+            return
+        
+        failures = 0
+        resumed = 0
+        workers = max(1, args.workers) if args.batch else 1
+        queued = iter(enumerate(image_paths, 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analyse') as executor:
+            # Fenêtre bornée de tâches en vol : la mémoire ne dépend pas de la taille du lot
+            in_flight = {}
+            while True:
+                for index, image_path in queued:
+                    if checkpoint is not None and completed(image_path):
+                        resumed += 1
+                        if needs_replay:
+                            in_flight[executor.submit(replay, image_path)] = (image_path, True)
+                    else:
+                        in_flight[executor.submit(process, index, image_path)] = (image_path, False)
+                    if len(in_flight) >= workers * 2:
+                        break
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    image_path, replayed = in_flight.pop(future)
+                    try:
+                        results = future.result()
+                        if columnar_writer:
+                            columnar_writer.add(results)
+                        # Index idempotent : une image reprise n'est réindexée que si son lot d'écriture a été perdu
+                        if search_index is not None and not (
+                                replayed and search_index.is_indexed(results['file_info']['sha256'],
+                                                                     results['analysis_date'])):
+                            search_index.add(results)
+                    except Exception as e:
+                        # En mode batch, une image en échec n'interrompt pas le lot
+                        if not args.batch:
+                            raise
+                        failures += 1
+                        print(f"{Fore.RED}[ERREUR] {image_path.name}: {e}")
+        
+        if case_report:
+            case_report.build()
+        
+        if search_index is not None:
+            search_index.flush()
+            print(f"\n{Fore.GREEN}[+] Index plein texte : {args.index_db} ({search_index.indexed} analyses ajoutées)")
         
     except Exception as e:
         print(f"{Fore.RED}[ERREUR] {e}")
@@ -1227,6 +3656,38 @@ Exemples:
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        if ocr_batcher:
+            ocr_batcher.close()
+        if work_queue is not None:
+            work_queue.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        if duplicate_index is not None:
+            duplicate_index.save()
+        if hash_database is not None:
+            hash_database.close()
+        if search_index is not None:
+            search_index.close()
+        if pdf_worker:
+            pdf_worker.wait()
+        if columnar_writer:
+            columnar_writer.close()
+        if stalled:
+            # Thread d'analyse bloqué (non interruptible) : sortie immédiate, le superviseur relance
+            sys.stdout.flush()
+            os._exit(job_queue.EXIT_STALLED)
+    
+    # Rapports PDF rendus et export fermé (finally) : bilan du lancement
+    if columnar_writer:
+        print(f"\n{Fore.GREEN}[+] Export colonnaire généré : {args.parquet} "
+              f"({columnar_writer.rows_written} lignes)")
+    
+    if args.batch:
+        print(f"\n{Fore.GREEN}[+] Lot terminé : {len(image_paths) - failures}/{len(image_paths)} images analysées"
+              + (f" ({resumed} reprises du checkpoint)" if resumed else ""))
+    else:
+        print(f"\n{Fore.GREEN}[+] Analyse terminée avec succès!")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,277 @@
+"""
+Export colonnaire des résultats forensiques (Parquet / Arrow IPC)
+1. Aplatit le dictionnaire `results` imbriqué en une ligne de colonnes scalaires
+2. Accumule les lignes et les écrit par row groups pour l'analyse de flotte
+"""
+
+from pathlib import Path
+from typing import Dict, List, Any
+
+from config import EXPORT_ROW_GROUP_SIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Étapes chronométrées exportées comme colonnes fixes (schéma stable)
+TIMED_STAGES = [
+    'known_hashes', 'phash', 'ocr', 'lsb', 'png', 'jpeg', 'exif', 'strings', 'signatures', 'carving',
+    'bitplanes', 'histogram', 'dct', 'entropy', 'frames', 'decoding', 'recursion',
+    'correlation', 'llm'
+]
+
+HISTOGRAM_CHANNELS = ['Blue', 'Green', 'Red']
+
+
+def _build_schema() -> 'pa.Schema':
+    """Construit le schéma Arrow des lignes exportées."""
+    fields = [
+        ('sha256', pa.string()),
+        ('file_name', pa.string()),
+        ('file_path', pa.string()),
+        ('file_size', pa.int64()),
+        ('format', pa.string()),
+        ('width', pa.int32()),
+        ('height', pa.int32()),
+        ('channels', pa.int32()),
+        ('analysis_date', pa.string()),
+        ('suspicion_level', pa.string()),
+        ('total_findings', pa.int32()),
+        ('methods_with_findings', pa.list_(pa.string())),
+        ('extraction_success', pa.bool_()),
+        ('ocr_tesseract_chars', pa.int32()),
+        ('ocr_easyocr_chars', pa.int32()),
+        ('lsb_found', pa.bool_()),
+        ('lsb_length', pa.int32()),
+        ('lsb_entropy', pa.float64()),
+        ('lsb_ratio', pa.float64()),
+        ('bit_plane_anomaly', pa.bool_()),
+        ('exif_suspicious_count', pa.int32()),
+        ('exif_comment_count', pa.int32()),
+        ('ascii_string_count', pa.int32()),
+        ('signature_count', pa.int32()),
+        ('signature_types', pa.list_(pa.string())),
+        ('carved_count', pa.int32()),
+        ('carved_bytes', pa.int64()),
+        ('carved_sha256', pa.list_(pa.string())),
+        ('histogram_anomaly', pa.bool_()),
+        ('histogram_anomalous_channels', pa.list_(pa.string())),
+        ('png_chunk_count', pa.int32()),
+        ('png_anomalies', pa.list_(pa.string())),
+        ('png_trailing_bytes', pa.int64()),
+        ('jpeg_anomalies', pa.list_(pa.string())),
+        ('jpeg_trailing_bytes', pa.int64()),
+        ('dct_jsteg_probability', pa.float64()),
+        ('dct_f5_beta', pa.float64()),
+        ('decoded_count', pa.int32()),
+        ('decoded_transforms', pa.list_(pa.string())),
+        ('byte_entropy_max', pa.float64()),
+        ('byte_entropy_mean', pa.float64()),
+        ('high_entropy_regions', pa.int32()),
+        ('high_entropy_bytes', pa.int64()),
+        ('nested_count', pa.int32()),
+        ('nested_flagged', pa.int32()),
+        ('nested_depth', pa.int32()),
+        ('known_bad_carrier', pa.bool_()),
+        ('known_bad_carved', pa.int32()),
+        ('phash', pa.string()),
+        ('dhash', pa.string()),
+        ('near_duplicate_count', pa.int32()),
+        ('near_duplicate_sha256', pa.string()),
+        ('near_duplicate_distance', pa.int32()),
+        ('reused_stages', pa.list_(pa.string())),
+        ('stage_timeouts', pa.list_(pa.string())),
+        ('frame_count', pa.int32()),
+        ('frames_with_findings', pa.int32()),
+    ]
+    for channel in HISTOGRAM_CHANNELS:
+        key = channel.lower()
+        fields.append((f'hist_{key}_mean', pa.float64()))
+        fields.append((f'hist_{key}_std', pa.float64()))
+        fields.append((f'hist_{key}_zero_gaps', pa.int32()))
+    fields.append(('ia_suspicion_score', pa.int32()))
+    fields.append(('ia_danger_level', pa.string()))
+    for stage in TIMED_STAGES:
+        fields.append((f'time_{stage}', pa.float64()))
+    fields.append(('time_total', pa.float64()))
+    return pa.schema(fields)
+
+
+def flatten_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplatit les résultats d'une image en une ligne pour l'export colonnaire."""
+    file_info = results.get('file_info', {})
+    summary = results.get('summary', {})
+    ocr = results.get('ocr', {})
+    steg = results.get('steganography', {})
+    exif = steg.get('exif', {}) or {}
+    bitplanes = steg.get('bit_plane_details', {})
+    histogram = steg.get('histogram_details', {})
+    timings = results.get('timings', {})
+    ia = results.get('intelligent_analysis', {})
+    frames = results.get('frames', {})
+    png = steg.get('png')
+    jpeg = steg.get('jpeg')
+    dct = steg.get('dct')
+    carved = steg.get('carved', [])
+    recursion = results.get('recursion', {})
+    entropy = steg.get('entropy', {})
+    known = results.get('known_hashes', {})
+    hashes = results.get('perceptual_hash', {})
+    duplicates = results.get('near_duplicates', {})
+    closest = (duplicates.get('matches') or [{}])[0]
+    lsb_message = steg.get('lsb') or ''
+
+    row = {
+        'sha256': file_info.get('sha256'),
+        'file_name': results.get('image'),
+        'file_path': results.get('image_path'),
+        'file_size': file_info.get('size_bytes'),
+        'format': file_info.get('format'),
+        'width': file_info.get('width'),
+        'height': file_info.get('height'),
+        'channels': file_info.get('channels'),
+        'analysis_date': results.get('analysis_date'),
+        'suspicion_level': summary.get('suspicion_level'),
+        'total_findings': summary.get('total_findings', 0),
+        'methods_with_findings': list(summary.get('methods_with_findings', [])),
+        'extraction_success': bool(summary.get('extraction_success')),
+        'ocr_tesseract_chars': len(ocr.get('tesseract', {}).get('text', '')),
+        'ocr_easyocr_chars': len(ocr.get('easyocr', {}).get('text', '')),
+        'lsb_found': bool(lsb_message),
+        'lsb_length': len(lsb_message),
+        'lsb_entropy': bitplanes.get('lsb_entropy'),
+        'lsb_ratio': bitplanes.get('lsb_ratio'),
+        'bit_plane_anomaly': bool(steg.get('bit_plane_anomaly')),
+        'exif_suspicious_count': len(exif.get('suspicious', [])),
+        'exif_comment_count': len(exif.get('comments', [])),
+        'ascii_string_count': len(steg.get('ascii_strings', [])),
+        'signature_count': len(steg.get('binary_signatures', [])),
+        'signature_types': sorted({sig['type'] for sig in steg.get('binary_signatures', [])}),
+        'carved_count': len(carved),
+        'carved_bytes': sum(entry['length'] for entry in carved),
+        'carved_sha256': [entry['sha256'] for entry in carved if 'sha256' in entry],
+        'histogram_anomaly': bool(steg.get('histogram_anomaly')),
+        'histogram_anomalous_channels': list(histogram.get('anomalous_channels', [])),
+        'png_chunk_count': sum(png['chunk_counts'].values()) if png else None,
+        'png_anomalies': list(png['anomalies']) if png else [],
+        'png_trailing_bytes': (png['trailing'] or {}).get('length', 0) if png else None,
+        'jpeg_anomalies': list(jpeg['anomalies']) if jpeg else [],
+        'jpeg_trailing_bytes': (jpeg['trailing'] or {}).get('length', 0) if jpeg else None,
+        'dct_jsteg_probability': dct['jsteg']['probability'] if dct else None,
+        'dct_f5_beta': dct['f5_beta'] if dct else None,
+        'decoded_count': len(steg.get('decoded', [])),
+        'decoded_transforms': sorted({entry['transforms'] for entry in steg.get('decoded', [])}),
+        'byte_entropy_max': entropy.get('max'),
+        'byte_entropy_mean': entropy.get('mean'),
+        'high_entropy_regions': len(entropy.get('regions', [])),
+        'high_entropy_bytes': sum(region['length'] for region in entropy.get('regions', [])),
+        'nested_count': recursion.get('nodes', 0),
+        'nested_flagged': recursion.get('flagged', 0),
+        'nested_depth': recursion.get('depth', 0),
+        'known_bad_carrier': bool(known.get('carrier')),
+        'known_bad_carved': len(known.get('carved', [])),
+        'phash': hashes.get('phash'),
+        'dhash': hashes.get('dhash'),
+        'near_duplicate_count': len(duplicates.get('matches', [])),
+        'near_duplicate_sha256': closest.get('sha256'),
+        'near_duplicate_distance': closest.get('distance'),
+        'reused_stages': list(duplicates.get('reused', [])),
+        'stage_timeouts': list(results.get('stage_timeouts', [])),
+        'frame_count': frames.get('count', 1),
+        'frames_with_findings': len(frames.get('with_findings', [])),
+    }
+
+    channel_stats = histogram.get('channel_stats', {})
+    for channel in HISTOGRAM_CHANNELS:
+        key = channel.lower()
+        stats = channel_stats.get(channel, {})
+        row[f'hist_{key}_mean'] = stats.get('mean')
+        row[f'hist_{key}_std'] = stats.get('std')
+        row[f'hist_{key}_zero_gaps'] = stats.get('zero_gaps')
+
+    if ia.get('status') == 'success':
+        row['ia_suspicion_score'] = ia.get('suspicion_score')
+        row['ia_danger_level'] = ia.get('danger_level')
+    else:
+        row['ia_suspicion_score'] = None
+        row['ia_danger_level'] = None
+
+    for stage in TIMED_STAGES:
+        row[f'time_{stage}'] = timings.get(stage)
+    row['time_total'] = timings.get('total')
+
+    return row
+
+
+class ColumnarFindingsWriter:
+    """
+    Écrit les résultats aplatis dans un fichier Parquet (ou Arrow IPC si
+    l'extension est .arrow/.feather), un row group toutes les `row_group_size` lignes.
+    """
+
+    def __init__(self, output_path: str, row_group_size: int = EXPORT_ROW_GROUP_SIZE):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow est requis pour l'export colonnaire (pip install pyarrow)")
+
+        self.output_path = Path(output_path)
+        self.row_group_size = max(1, row_group_size)
+        self.schema = _build_schema()
+        self.use_ipc = self.output_path.suffix.lower() in ['.arrow', '.feather', '.ipc']
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._writer = None
+        self._sink = None
+
+    def _open(self):
+        """Ouvre le writer sous-jacent au premier flush."""
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.use_ipc:
+            self._sink = pa.OSFile(str(self.output_path), 'wb')
+            self._writer = pa_ipc.new_file(self._sink, self.schema)
+        else:
+            self._writer = pq.ParquetWriter(str(self.output_path), self.schema, compression='zstd')
+
+    def add(self, results: Dict[str, Any]):
+        """Ajoute les résultats d'une image; écrit un row group si le tampon est plein."""
+        self._buffer.append(flatten_results(results))
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Écrit les lignes en attente comme un row group."""
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self._open()
+
+        batch = pa.RecordBatch.from_pylist(self._buffer, schema=self.schema)
+        if self.use_ipc:
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write_batch(batch, row_group_size=self.row_group_size)
+
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        """Vide le tampon et ferme le fichier."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
@@ -0,0 +1,430 @@
+"""
+File d'attente de travaux pour répartir les analyses sur plusieurs machines
+1. Un coordinateur (--batch ou --watch avec --queue) dépose les chemins des
+   images ; des workers (--worker), sur cette machine ou d'autres, les prennent
+2. Bail (lease) : un travail pris est réservé LEASE secondes, prolongé tant que
+   le worker vit. Un bail expiré (worker tué, machine arrêtée) rend le travail
+   aux autres workers
+3. Tentatives comptées à la prise : une image qui fait planter le décodeur
+   (processus tué, sans échec signalé) est mise en quarantaine (dead-letter)
+   après QUEUE_MAX_ATTEMPTS prises, comme une image en échec répété
+4. Backends par URL : fichier SQLite (une machine, tests), ou backend réseau
+   fourni par un plugin (points d'entrée `decodeur.queues`, un par schéma d'URL)
+5. Durée max d'un travail (limite stricte) : un travail bloqué au-delà est
+   marqué en échec et le worker s'arrête (code EXIT_STALLED), seul moyen de
+   libérer un thread d'analyse non interruptible ; le superviseur le relance
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Iterable
+
+from colorama import Fore
+
+from config import (QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS, QUEUE_RETRY_DELAY, QUEUE_POLL_INTERVAL,
+                    QUEUE_JOB_TIMEOUT)
+
+
+ENTRY_POINT_GROUP = 'decodeur.queues'
+
+# États d'un travail
+PENDING, LEASED, DONE, DEAD = 'pending', 'leased', 'done', 'dead'
+
+# Code de sortie d'un worker arrêté par un travail bloqué (EX_TEMPFAIL : à relancer)
+EXIT_STALLED = 75
+
+
+def worker_id() -> str:
+    """Identifiant d'un worker : machine et processus."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue(ABC):
+    """
+    Interface d'un backend (classe abstraite : un backend incomplet échoue dès
+    son instanciation). Un travail est un dict {id, path, attempts}; `owner`
+    identifie le worker titulaire du bail (les opérations d'un worker dont le
+    bail a expiré et été repris sont ignorées).
+    """
+
+    @abstractmethod
+    def enqueue(self, paths: Iterable[str], requeue: bool = False) -> int:
+        """
+        Ajoute des chemins; un chemin déjà en file n'est pas dupliqué (reprise
+        d'un lot). Avec `requeue`, un chemin connu est remis en file (fichier
+        modifié). Retourne le nombre de travaux ajoutés ou remis en file.
+        """
+        ...
+
+    @abstractmethod
+    def lease(self, owner: str, lease_seconds: float = QUEUE_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """Prend le prochain travail disponible (None si la file est vide pour l'instant)."""
+        ...
+
+    @abstractmethod
+    def heartbeat(self, job_id: int, owner: str, lease_seconds: float = QUEUE_LEASE_SECONDS) -> bool:
+        """Prolonge un bail; False s'il n'appartient plus à `owner`."""
+        ...
+
+    @abstractmethod
+    def complete(self, job_id: int, owner: str, result: Optional[str] = None):
+        """Travail terminé; `result` : résumé court (niveau de suspicion)."""
+        ...
+
+    @abstractmethod
+    def fail(self, job_id: int, owner: str, error: str) -> str:
+        """Échec signalé : nouvel essai différé, ou dead-letter. Retourne le nouvel état."""
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Nombre de travaux par état."""
+        ...
+
+    @abstractmethod
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Travaux en quarantaine : {id, path, attempts, error}."""
+        ...
+
+    @abstractmethod
+    def requeue_dead(self) -> int:
+        """Remet les travaux en quarantaine en file (tentatives remises à zéro)."""
+        ...
+
+    def close(self):
+        pass
+
+
+# ============================================================================
+# BACKEND SQLITE
+# ============================================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    result TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, available_at);
+"""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    File dans une base SQLite (WAL). Les prises se font dans une transaction
+    IMMEDIATE : plusieurs processus de la même machine peuvent partager la
+    file. Pas de SQLite sur un partage réseau : utiliser un backend réseau.
+    """
+
+    def __init__(self, path: str, max_attempts: int = QUEUE_MAX_ATTEMPTS,
+                 retry_delay: float = QUEUE_RETRY_DELAY):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def enqueue(self, paths: Iterable[str], requeue: bool = False) -> int:
+        now = time.time()
+        conflict = ('ON CONFLICT(path) DO UPDATE SET status = excluded.status, attempts = 0, '
+                    'available_at = excluded.available_at, last_error = NULL, result = NULL, '
+                    'updated = excluded.updated WHERE status != ?' if requeue else 'ON CONFLICT(path) DO NOTHING')
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Un travail en cours n'est pas remis en file (le worker le termine)
+                self._conn.executemany(
+                    f'INSERT INTO jobs (path, status, available_at, updated) VALUES (?, ?, ?, ?) {conflict}',
+                    ((str(path), PENDING, now, now, *((LEASED,) if requeue else ())) for path in paths))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            return self._conn.total_changes - before
+
+    def lease(self, owner: str, lease_seconds: float = QUEUE_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Baux expirés épuisés : le décodeur a planté sur ces images à chaque prise
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, updated = ?, "
+                    "last_error = COALESCE(last_error, 'bail expiré : worker arrêté pendant l''analyse') "
+                    "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (DEAD, now, LEASED, now, self.max_attempts))
+                row = self._conn.execute(
+                    'SELECT id, path, attempts FROM jobs '
+                    'WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?) '
+                    'ORDER BY available_at, id LIMIT 1',
+                    (PENDING, now, LEASED, now)).fetchone()
+                if row:
+                    self._conn.execute(
+                        'UPDATE jobs SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, '
+                        'updated = ? WHERE id = ?',
+                        (LEASED, owner, now + lease_seconds, now, row[0]))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        if not row:
+            return None
+        return {'id': row[0], 'path': row[1], 'attempts': row[2] + 1}
+
+    def _update_owned(self, job_id: int, owner: str, assignments: str, values: tuple) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                f'UPDATE jobs SET {assignments}, updated = ? WHERE id = ? AND owner = ? AND status = ?',
+                (*values, time.time(), job_id, owner, LEASED))
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: int, owner: str, lease_seconds: float = QUEUE_LEASE_SECONDS) -> bool:
+        return self._update_owned(job_id, owner, 'lease_expires = ?', (time.time() + lease_seconds,))
+
+    def complete(self, job_id: int, owner: str, result: Optional[str] = None):
+        self._update_owned(job_id, owner, 'status = ?, owner = NULL, lease_expires = NULL, result = ?',
+                           (DONE, result))
+
+    def fail(self, job_id: int, owner: str, error: str) -> str:
+        with self._lock:
+            row = self._conn.execute('SELECT attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        attempts = row[0] if row else self.max_attempts
+        if attempts >= self.max_attempts:
+            status, available_at = DEAD, time.time()
+        else:
+            # Nouvel essai différé, délai doublé à chaque tentative
+            status, available_at = PENDING, time.time() + self.retry_delay * 2 ** (attempts - 1)
+        self._update_owned(job_id, owner,
+                           'status = ?, owner = NULL, lease_expires = NULL, available_at = ?, last_error = ?',
+                           (status, available_at, error[:1000]))
+        return status
+
+    def stats(self) -> Dict[str, int]:
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        with self._lock:
+            for status, count in self._conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'):
+                counts[status] = count
+        return counts
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute('SELECT id, path, attempts, last_error FROM jobs WHERE status = ? ORDER BY id',
+                                      (DEAD,)).fetchall()
+        return [{'id': row[0], 'path': row[1], 'attempts': row[2], 'error': row[3]} for row in rows]
+
+    def requeue_dead(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated = ? WHERE status = ?',
+                (PENDING, time.time(), time.time(), DEAD))
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ============================================================================
+# OUVERTURE PAR URL
+# ============================================================================
+
+def _load_backends() -> Dict[str, Callable[[str], JobQueue]]:
+    """Backends enregistrés : schéma d'URL -> fabrique(url). Plugins : groupe `decodeur.queues`."""
+    backends: Dict[str, Callable[[str], JobQueue]] = {}
+    found = entry_points()
+    group = found.select(group=ENTRY_POINT_GROUP) if hasattr(found, 'select') else found.get(ENTRY_POINT_GROUP, [])
+    for entry_point in group:
+        try:
+            backends[entry_point.name] = entry_point.load()
+        except Exception as e:
+            print(f"{Fore.YELLOW}[QUEUE] Backend '{entry_point.name}' ignoré : {e}")
+    return backends
+
+
+def open_queue(url: str) -> JobQueue:
+    """
+    Ouvre une file : `sqlite:///chemin.db` ou un simple chemin pour SQLite,
+    `<schéma>://...` pour un backend fourni par un plugin.
+    """
+    scheme, separator, rest = url.partition('://')
+    if not separator:
+        return SQLiteJobQueue(url)
+    if scheme == 'sqlite':
+        # sqlite:///tmp/q.db -> /tmp/q.db ; sqlite://q.db -> q.db (relatif)
+        return SQLiteJobQueue(rest)
+    backends = _load_backends()
+    if scheme not in backends:
+        raise ValueError(f"Backend de file inconnu : {scheme}:// (disponibles : sqlite, {', '.join(backends) or 'aucun plugin'})")
+    queue = backends[scheme](url)
+    if not isinstance(queue, JobQueue):
+        raise TypeError(f"Le backend {scheme} ne retourne pas un JobQueue")
+    return queue
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+class QueueWorker:
+    """
+    Prend des travaux et appelle `handle(path) -> résumé` sur `workers` threads.
+    Les baux en cours sont prolongés toutes les LEASE/3 secondes. `on_idle()`
+    est appelé quand la file n'a plus rien à donner (flush des index). Avec
+    `drain`, s'arrête quand la file n'a plus de travail disponible ni en cours.
+    Un travail qui dépasse `job_timeout` secondes est marqué en échec et le
+    worker s'arrête sans attendre son thread (`stalled` : le processus doit
+    quitter avec EXIT_STALLED).
+    """
+
+    def __init__(self, queue: JobQueue, handle: Callable[[Path], Optional[str]], workers: int = 1,
+                 drain: bool = False, on_idle: Optional[Callable[[], None]] = None,
+                 lease_seconds: float = QUEUE_LEASE_SECONDS,
+                 job_timeout: Optional[float] = QUEUE_JOB_TIMEOUT):
+        self.queue = queue
+        self.handle = handle
+        self.workers = max(1, workers)
+        self.drain = drain
+        self.on_idle = on_idle
+        self.lease_seconds = lease_seconds
+        self.job_timeout = job_timeout
+        self.owner = worker_id()
+        self._active: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop: Optional[threading.Event] = None
+        self.stalled: List[threading.Thread] = []
+        self.stats = {'done': 0, 'retried': 0, 'dead': 0}
+
+    def _heartbeat(self, stop: threading.Event):
+        last_beat = time.monotonic()
+        while not stop.wait(min(1.0, self.lease_seconds / 3)):
+            self._check_timeouts()
+            if time.monotonic() - last_beat < self.lease_seconds / 3:
+                continue
+            last_beat = time.monotonic()
+            with self._lock:
+                active = [job_id for job_id, job in self._active.items() if job['thread'] not in self.stalled]
+            for job_id in active:
+                if not self.queue.heartbeat(job_id, self.owner, self.lease_seconds):
+                    print(f"{Fore.YELLOW}[QUEUE] Bail perdu pour le travail {job_id} (repris par un autre worker)")
+
+    def _check_timeouts(self):
+        """Travaux au-delà de job_timeout : échec signalé, plus de nouvelle prise, arrêt du worker."""
+        if not self.job_timeout:
+            return
+        now = time.monotonic()
+        with self._lock:
+            expired = [(job_id, job) for job_id, job in self._active.items()
+                       if job['thread'] not in self.stalled and now - job['started'] > self.job_timeout]
+            self.stalled.extend(job['thread'] for _, job in expired)
+        for job_id, job in expired:
+            state = self.queue.fail(job_id, self.owner, f"durée max de {self.job_timeout:g} s dépassée")
+            print(f"{Fore.RED}[QUEUE] {Path(job['path']).name} : bloqué depuis plus de {self.job_timeout:g} s"
+                  + (" (mis en quarantaine)" if state == DEAD else " (nouvel essai différé)")
+                  + ", arrêt du worker après les travaux en cours")
+            with self._lock:
+                self.stats['dead' if state == DEAD else 'retried'] += 1
+        if expired and self._stop is not None:
+            self._stop.set()
+
+    def _loop(self, stop: threading.Event):
+        while not stop.is_set():
+            job = self.queue.lease(self.owner, self.lease_seconds)
+            if job is None:
+                self._idle()
+                # Vide = rien en cours ni en attente d'un nouvel essai différé
+                counts = self.queue.stats()
+                if self.drain and not counts[PENDING] and not counts[LEASED]:
+                    return
+                stop.wait(QUEUE_POLL_INTERVAL)
+                continue
+            with self._lock:
+                self._active[job['id']] = {'path': job['path'], 'started': time.monotonic(),
+                                           'thread': threading.current_thread()}
+            try:
+                print(f"\n{Fore.CYAN}[QUEUE] Travail {job['id']} (tentative {job['attempts']}) : {job['path']}")
+                result = self.handle(Path(job['path']))
+                self.queue.complete(job['id'], self.owner, result)
+                outcome = 'done'
+            except Exception as e:
+                outcome = 'dead' if self.queue.fail(job['id'], self.owner, str(e)) == DEAD else 'retried'
+                print(f"{Fore.RED}[QUEUE] {Path(job['path']).name} : {e}"
+                      + (" (mis en quarantaine)" if outcome == 'dead' else " (nouvel essai différé)"))
+            finally:
+                with self._lock:
+                    self._active.pop(job['id'], None)
+            with self._lock:
+                # Travail déjà compté en échec par le contrôle de durée (complete/fail ignorés)
+                if threading.current_thread() in self.stalled:
+                    return
+                self.stats[outcome] += 1
+                self._dirty = True
+
+    def _idle(self):
+        with self._lock:
+            if not self._dirty or self._active:
+                return
+            self._dirty = False
+        if self.on_idle:
+            self.on_idle()
+
+    def run(self, stop: Optional[threading.Event] = None) -> bool:
+        """
+        Traite des travaux jusqu'à `stop`, Ctrl+C ou (drain) file vide; les travaux
+        en cours sont terminés, sauf ceux bloqués au-delà de job_timeout.
+        Retourne True si le worker s'est arrêté sur un travail bloqué.
+        """
+        stop = stop or threading.Event()
+        self._stop = stop
+        print(f"{Fore.CYAN}[QUEUE] Worker {self.owner} : {self.workers} thread(s)"
+              + (", arrêt quand la file est vide" if self.drain else ""))
+        beat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(beat_stop,), daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._loop, args=(stop,), name=f"queue-{i}")
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        def running():
+            with self._lock:
+                return [thread for thread in threads if thread.is_alive() and thread not in self.stalled]
+
+        try:
+            while running():
+                for thread in running():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print(f"\n{Fore.YELLOW}[QUEUE] Arrêt demandé, fin des travaux en cours...")
+            stop.set()
+            while running():
+                for thread in running():
+                    thread.join(timeout=0.5)
+        finally:
+            beat_stop.set()
+            # Contrôle de durée en cours terminé avant le bilan
+            heartbeat.join()
+            self._idle()
+            print(f"{Fore.GREEN}[QUEUE] Arrêt : {self.stats['done']} terminés, "
+                  f"{self.stats['retried']} à réessayer, {self.stats['dead']} en quarantaine")
+            if self.stalled:
+                print(f"{Fore.RED}[QUEUE] {len(self.stalled)} travail(s) bloqué(s) abandonné(s) : "
+                      f"le worker doit être relancé (code {EXIT_STALLED})")
+        return bool(self.stalled)
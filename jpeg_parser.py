@@ -0,0 +1,459 @@
+"""
+Analyse structurelle et statistique des fichiers JPEG
+1. Parcours des segments en une passe sur un memoryview des octets bruts :
+   APP0-APP15, COM, DQT, SOF, DHT, SOS (données entropiques sautées), EOI,
+   données après EOI
+2. Statistiques des coefficients DCT (luminance), vectorisées avec NumPy :
+   - test du chi² sur les paires de valeurs (JSteg et dérivés LSB)
+   - estimation de rétrécissement par calibration (F5)
+   Coefficients réels via jpegio si installé, sinon DCT 8x8 recalculée depuis
+   les pixels décodés et quantifiée avec la table DQT du fichier ; le verdict
+   F5 exige les coefficients réels (β seulement rapporté sinon) et une
+   calibration fiable (pas de quantification suffisant, peu d'aplats)
+"""
+
+import math
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import (JPEG_JSTEG_THRESHOLD, JPEG_F5_THRESHOLD, JPEG_F5_CALIBRATION_BLUR, JPEG_F5_MIN_QUANT_STEP,
+                    JPEG_F5_MAX_FLAT_BLOCKS, JPEG_DCT_MIN_COEFFICIENTS)
+
+try:
+    import jpegio
+    JPEGIO_AVAILABLE = True
+except ImportError:
+    JPEGIO_AVAILABLE = False
+
+
+SOI = 0xD8
+EOI = 0xD9
+SOS = 0xDA
+
+# Marqueurs sans champ longueur
+STANDALONE_MARKERS = {0x01, SOI, EOI} | set(range(0xD0, 0xD8))
+
+MARKER_NAMES = {
+    0xC4: 'DHT', 0xCC: 'DAC', 0xDA: 'SOS', 0xDB: 'DQT', 0xDD: 'DRI',
+    0xFE: 'COM', 0xD8: 'SOI', 0xD9: 'EOI',
+}
+MARKER_NAMES.update({0xE0 + n: f'APP{n}' for n in range(16)})
+MARKER_NAMES.update({code: f'SOF{code - 0xC0}' for code in range(0xC0, 0xD0) if code not in (0xC4, 0xC8, 0xCC)})
+
+# Identifiants APPn courants (préfixe de la charge utile)
+KNOWN_APP_IDENTIFIERS = [
+    b'JFIF\x00', b'JFXX\x00', b'Exif\x00', b'http://ns.adobe.com/xap/1.0/\x00',
+    b'http://ns.adobe.com/xmp/extension/\x00', b'ICC_PROFILE\x00', b'Photoshop 3.0\x00',
+    b'Adobe', b'MPF\x00', b'Ducky', b'FPXR\x00', b'Meta\x00', b'AROT\x00', b'HPSC',
+]
+
+# Ordre zigzag : position naturelle (ligne * 8 + colonne) du i-ème coefficient DQT
+ZIGZAG = np.array([
+    0, 1, 8, 16, 9, 2, 3, 10, 17, 24, 32, 25, 18, 11, 4, 5,
+    12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13, 6, 7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61, 54, 47, 55, 62, 63
+])
+
+
+def is_jpeg(data) -> bool:
+    """Le contenu commence-t-il par un marqueur SOI ?"""
+    return bytes(data[:2]) == b'\xff\xd8'
+
+
+# ============================================================================
+# PARCOURS DES SEGMENTS
+# ============================================================================
+
+def _skip_entropy_data(raw: bytes, start: int) -> int:
+    """
+    Position du prochain marqueur après des données entropiques : un 0xFF suivi
+    d'un octet autre que 0x00 (bourrage) ou RSTn.
+    """
+    pos = start
+    while True:
+        pos = raw.find(b'\xff', pos)
+        if pos == -1 or pos + 1 >= len(raw):
+            return len(raw)
+        following = raw[pos + 1]
+        if following == 0x00 or 0xD0 <= following <= 0xD7 or following == 0xFF:
+            pos += 1
+            continue
+        return pos
+
+
+def iter_segments(raw: bytes, start: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourt les segments après le SOI situé à `start` (offsets absolus, pour
+    un JPEG incrusté dans un autre fichier). Chaque segment est un dict
+    {marker, name, offset, length, data} où `data` est une tranche de memoryview
+    (charge utile sans le champ longueur). Les données entropiques qui suivent
+    chaque SOS sont sautées ({'entropy_length'} sur le segment SOS).
+    S'arrête après EOI ; {'error'} sur une structure invalide.
+    """
+    view = memoryview(raw)
+    pos = start + 2
+    end = len(raw)
+    while pos < end:
+        if raw[pos] != 0xFF:
+            yield {'error': f"octet inattendu 0x{raw[pos]:02X} à l'offset {pos} (marqueur attendu)", 'offset': pos}
+            return
+        # Octets de remplissage 0xFF autorisés avant un marqueur
+        while pos + 1 < end and raw[pos + 1] == 0xFF:
+            pos += 1
+        if pos + 1 >= end:
+            break
+        marker = raw[pos + 1]
+        name = MARKER_NAMES.get(marker, f'0x{marker:02X}')
+
+        if marker in STANDALONE_MARKERS:
+            yield {'marker': marker, 'name': name, 'offset': pos, 'length': 0, 'data': view[pos:pos]}
+            pos += 2
+            if marker == EOI:
+                return
+            continue
+
+        if pos + 4 > end:
+            yield {'error': f"segment {name} tronqué à l'offset {pos}", 'offset': pos}
+            return
+        length = int.from_bytes(raw[pos + 2:pos + 4], 'big')
+        if length < 2 or pos + 2 + length > end:
+            yield {'error': f"segment {name} tronqué à l'offset {pos} (longueur {length})", 'offset': pos}
+            return
+
+        segment = {
+            'marker': marker,
+            'name': name,
+            'offset': pos,
+            'length': length,
+            'data': view[pos + 4:pos + 2 + length]
+        }
+        pos += 2 + length
+        if marker == SOS:
+            next_marker = _skip_entropy_data(raw, pos)
+            segment['entropy_length'] = next_marker - pos
+            pos = next_marker
+        yield segment
+
+
+def _parse_dqt(data: memoryview, tables: Dict[int, List[int]]):
+    """Tables de quantification d'un segment DQT (ordre naturel 8x8 aplati)."""
+    pos = 0
+    while pos < len(data):
+        precision, table_id = data[pos] >> 4, data[pos] & 0x0F
+        size = 128 if precision else 64
+        values = np.frombuffer(data[pos + 1:pos + 1 + size], dtype='>u2' if precision else np.uint8)
+        if len(values) < 64:
+            return
+        natural = np.zeros(64, dtype=np.int32)
+        natural[ZIGZAG] = values
+        tables[table_id] = natural.tolist()
+        pos += 1 + size
+
+
+def _parse_sof(data: memoryview, name: str) -> Dict[str, Any]:
+    """En-tête de trame : précision, dimensions, composantes (id, échantillonnage, table)."""
+    components = []
+    for i in range(data[5]):
+        base = 6 + 3 * i
+        components.append({
+            'id': data[base],
+            'sampling': f"{data[base + 1] >> 4}x{data[base + 1] & 0x0F}",
+            'quant_table': data[base + 2]
+        })
+    return {
+        'type': name,
+        'progressive': name in ('SOF2', 'SOF6', 'SOF10', 'SOF14'),
+        'precision': data[0],
+        'height': int.from_bytes(data[1:3], 'big'),
+        'width': int.from_bytes(data[3:5], 'big'),
+        'components': components
+    }
+
+
+def parse_jpeg(raw_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Parcourt la structure d'un JPEG en une passe et retourne le rapport :
+    segments, APPn (identifiant), commentaires COM, tables DQT, trame SOF,
+    nombre de scans et plages [début, fin) de leurs données entropiques,
+    données après EOI et anomalies. None si pas un JPEG.
+    """
+    if not is_jpeg(raw_bytes):
+        return None
+
+    report: Dict[str, Any] = {
+        'segments': [],
+        'app': [],
+        'comments': [],
+        'quantization': {},
+        'frame': None,
+        'scans': 0,
+        'entropy_bytes': 0,
+        'image_data_ranges': [],
+        'trailing': None,
+        'anomalies': []
+    }
+    anomalies = report['anomalies']
+    end_offset = None
+
+    for segment in iter_segments(raw_bytes):
+        if 'error' in segment:
+            anomalies.append(f"Structure invalide : {segment['error']}")
+            break
+
+        name = segment['name']
+        offset = segment['offset']
+        data = segment['data']
+        report['segments'].append({'name': name, 'offset': offset, 'length': segment['length']})
+
+        if name.startswith('APP'):
+            payload = bytes(data[:40])
+            identifier = next((known for known in KNOWN_APP_IDENTIFIERS if payload.startswith(known)), None)
+            entry = {
+                'marker': name,
+                'offset': offset,
+                'length': segment['length'],
+                'identifier': identifier.rstrip(b'\x00').decode('latin-1') if identifier else None
+            }
+            report['app'].append(entry)
+            if identifier is None:
+                anomalies.append(f"Segment {name} non standard ({segment['length']} octets) à l'offset {offset}")
+        elif name == 'COM':
+            report['comments'].append({
+                'offset': offset,
+                'value': bytes(data).decode('utf-8', errors='replace')
+            })
+        elif name == 'DQT':
+            _parse_dqt(data, report['quantization'])
+        elif name.startswith('SOF') and report['frame'] is None and len(data) >= 6:
+            report['frame'] = _parse_sof(data, name)
+        elif name == 'SOS':
+            report['scans'] += 1
+            report['entropy_bytes'] += segment.get('entropy_length', 0)
+            # Données entropiques du scan : [fin du segment SOS, marqueur suivant)
+            scan_start = offset + 2 + segment['length']
+            report['image_data_ranges'].append([scan_start, scan_start + segment.get('entropy_length', 0)])
+        elif name == 'EOI':
+            end_offset = offset + 2
+
+    if end_offset is None:
+        if not any('Structure invalide' in anomaly for anomaly in anomalies):
+            anomalies.append("Marqueur EOI absent (fichier tronqué)")
+    elif end_offset < len(raw_bytes):
+        report['trailing'] = {'offset': end_offset, 'length': len(raw_bytes) - end_offset}
+        anomalies.append(f"{len(raw_bytes) - end_offset} octets après EOI (offset {end_offset})")
+
+    return report
+
+
+def exif_payload(raw_bytes: bytes, report: Dict[str, Any]) -> Optional[bytes]:
+    """Charge utile du segment APP1 Exif (pour piexif.load, sans relire le fichier)."""
+    for entry in report['app']:
+        if entry['marker'] == 'APP1' and entry['identifier'] == 'Exif':
+            start = entry['offset'] + 4
+            return raw_bytes[start:entry['offset'] + 2 + entry['length']]
+    return None
+
+
+# ============================================================================
+# STATISTIQUES DCT (JSteg / F5)
+# ============================================================================
+
+_DCT_BASIS = np.array([
+    [(math.sqrt(1 / 8) if k == 0 else math.sqrt(2 / 8)) * math.cos((2 * n + 1) * k * math.pi / 16)
+     for n in range(8)]
+    for k in range(8)
+], dtype=np.float32)
+
+
+def block_dct(luma: np.ndarray, quant: np.ndarray) -> np.ndarray:
+    """
+    Coefficients DCT quantifiés des blocs 8x8 d'un plan de luminance,
+    forme (blocs_y, blocs_x, 8, 8). Un seul produit matriciel vectorisé.
+    """
+    height = luma.shape[0] - luma.shape[0] % 8
+    width = luma.shape[1] - luma.shape[1] % 8
+    blocks = luma[:height, :width].astype(np.float32) - 128.0
+    blocks = blocks.reshape(height // 8, 8, width // 8, 8).transpose(0, 2, 1, 3)
+    coefficients = _DCT_BASIS @ blocks @ _DCT_BASIS.T
+    return np.rint(coefficients / quant).astype(np.int32)
+
+
+def calibrated_dct(luma: np.ndarray, quant: np.ndarray, blur: float = JPEG_F5_CALIBRATION_BLUR) -> np.ndarray:
+    """
+    Coefficients de l'image calibrée (Fridrich et al.) : luminance décodée
+    recadrée de 4 px, passe-bas en croix (efface les artefacts de bloc de la
+    grille d'origine), puis re-quantifiée avec la table du fichier.
+    """
+    kernel = np.array([[0, blur, 0], [blur, 1 - 4 * blur, blur], [0, blur, 0]], dtype=np.float32)
+    filtered = cv2.filter2D(luma[4:, 4:].astype(np.float32), -1, kernel, borderType=cv2.BORDER_REPLICATE)
+    return block_dct(np.clip(np.rint(filtered), 0, 255), quant)
+
+
+def _luma(bgr: np.ndarray) -> np.ndarray:
+    """Plan Y (YCrCb) d'une image BGR ou niveaux de gris."""
+    if bgr.ndim == 2:
+        return bgr
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2YCrCb)[:, :, 0]
+
+
+def _chi2_sf(statistic: float, dof: int) -> float:
+    """P(X > statistic) pour un chi² à `dof` degrés (approximation de Wilson-Hilferty)."""
+    if dof <= 0:
+        return 1.0
+    scaled = (statistic / dof) ** (1 / 3)
+    mean = 1 - 2 / (9 * dof)
+    z = (scaled - mean) / math.sqrt(2 / (9 * dof))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def jsteg_probability(ac: np.ndarray) -> Dict[str, Any]:
+    """
+    Test du chi² de Westfeld-Pfitzmann sur les paires de valeurs (2k, 2k+1)
+    des coefficients AC hors {0, 1} (ceux que JSteg modifie). Une insertion
+    LSB égalise les paires : probabilité proche de 1.
+    """
+    values = ac[(ac != 0) & (ac != 1)]
+    if values.size == 0:
+        return {'probability': 0.0, 'pairs': 0}
+    offset = -int(values.min()) + (int(values.min()) % 2)
+    histogram = np.bincount(values + offset)
+    if histogram.size % 2:
+        histogram = np.append(histogram, 0)
+    pairs = histogram.reshape(-1, 2)
+    expected = pairs.sum(axis=1) / 2.0
+    usable = expected > 4
+    if usable.sum() < 2:
+        return {'probability': 0.0, 'pairs': int(usable.sum())}
+    statistic = float(np.sum((pairs[usable, 0] - expected[usable]) ** 2 / expected[usable]))
+    dof = int(usable.sum()) - 1
+    return {'probability': round(_chi2_sf(statistic, dof), 4), 'pairs': int(usable.sum()), 'chi2': round(statistic, 2)}
+
+
+# Modes DCT basse fréquence de l'estimation F5
+F5_MODES = [(0, 1), (1, 0), (1, 1)]
+
+
+def f5_shrinkage(coefficients: np.ndarray, calibrated: np.ndarray) -> Optional[float]:
+    """
+    Estimation β de la proportion de coefficients modifiés par F5 (Fridrich et al.) :
+    comparaison des histogrammes |h(0)|, |h(1)|, |h(2)| des modes (0,1), (1,0), (1,1)
+    avec ceux de l'image calibrée (calibrated_dct). β est une proportion :
+    bornée à [0, 1]. Un mode dont l'histogramme calibré a une case vide
+    (dégradés synthétiques) est ignoré; None si aucun n'est utilisable.
+    """
+    betas = []
+    for row, col in F5_MODES:
+        observed = np.bincount(np.abs(coefficients[:, :, row, col]).ravel(), minlength=3)[:3].astype(np.float64)
+        estimate = np.bincount(np.abs(calibrated[:, :, row, col]).ravel(), minlength=3)[:3].astype(np.float64)
+        # Normalisation : les deux grilles n'ont pas le même nombre de blocs
+        estimate *= coefficients[:, :, 0, 0].size / max(1, calibrated[:, :, 0, 0].size)
+        if not np.all(estimate > 0):
+            continue
+        denominator = estimate[1] ** 2 + (estimate[2] - estimate[1]) ** 2
+        betas.append((estimate[1] * (observed[0] - estimate[0])
+                      + (observed[1] - estimate[1]) * (estimate[2] - estimate[1])) / denominator)
+    return round(min(max(float(np.mean(betas)), 0.0), 1.0), 4) if betas else None
+
+
+def dct_statistics(bgr: np.ndarray, report: Dict[str, Any], image_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Histogramme des coefficients AC de luminance, probabilité JSteg et
+    estimation F5. None si la table de quantification de luminance est absente.
+    Sans jpegio, les coefficients recalculés depuis les pixels ne sont pas ceux
+    du fichier : β est rapporté mais F5 n'est jamais suspecté. β vaut None si
+    la calibration n'est pas fiable (pas de quantification des modes F5 sous
+    JPEG_F5_MIN_QUANT_STEP, blocs sans AC au-delà de JPEG_F5_MAX_FLAT_BLOCKS).
+    """
+    frame = report.get('frame') or {}
+    components = frame.get('components') or [{'quant_table': 0}]
+    table = report['quantization'].get(components[0]['quant_table'])
+    if table is None:
+        return None
+    quant = np.array(table, dtype=np.float32).reshape(8, 8)
+
+    luma = _luma(bgr)
+    source = 'pixels'
+    coefficients = None
+    if JPEGIO_AVAILABLE and image_path:
+        try:
+            coef_array = jpegio.read(image_path).coef_arrays[0]
+            height = coef_array.shape[0] - coef_array.shape[0] % 8
+            width = coef_array.shape[1] - coef_array.shape[1] % 8
+            coefficients = coef_array[:height, :width].reshape(height // 8, 8, width // 8, 8).transpose(0, 2, 1, 3)
+            source = 'jpegio'
+        except Exception:
+            coefficients = None
+    if coefficients is None:
+        coefficients = block_dct(luma, quant)
+
+    ac = coefficients.reshape(-1, 64)[:, 1:].ravel()
+    if ac.size < JPEG_DCT_MIN_COEFFICIENTS:
+        return None
+
+    clipped = np.clip(ac, -8, 8)
+    histogram = np.bincount(clipped + 8, minlength=17)
+    jsteg = jsteg_probability(ac)
+    flat_blocks = float(np.mean(~coefficients.reshape(-1, 64)[:, 1:].any(axis=1)))
+    min_step = min(quant[row, col] for row, col in F5_MODES)
+    beta = None
+    if min_step >= JPEG_F5_MIN_QUANT_STEP and flat_blocks <= JPEG_F5_MAX_FLAT_BLOCKS:
+        beta = f5_shrinkage(coefficients, calibrated_dct(luma, quant))
+
+    return {
+        'source': source,
+        'blocks': int(coefficients.shape[0] * coefficients.shape[1]),
+        'ac_histogram': {str(value): int(count) for value, count in zip(range(-8, 9), histogram)},
+        'zero_ratio': round(float(np.mean(ac == 0)), 4),
+        'jsteg': jsteg,
+        'f5_beta': beta,
+        'jsteg_suspected': jsteg['probability'] >= JPEG_JSTEG_THRESHOLD,
+        'f5_suspected': source == 'jpegio' and beta is not None and beta >= JPEG_F5_THRESHOLD
+    }
+
+
+def format_f5_beta(dct: Dict[str, Any], digits: int = 2) -> str:
+    """β F5 pour les rapports; 'n/d' si la calibration n'est pas fiable."""
+    beta = dct.get('f5_beta')
+    return 'n/d' if beta is None else f"{beta:.{digits}f}"
+
+
+def f5_calibration_check(quality_levels: Tuple[int, ...] = (50, 75, 95)) -> List[Dict[str, Any]]:
+    """
+    Contrôle de l'estimateur F5 sur des JPEG sains encodés par OpenCV (texture
+    naturelle synthétique, dégradé lisse, page de texte) : β doit rester sous
+    JPEG_F5_THRESHOLD (ou être non fiable, None). `python jpeg_parser.py`.
+    """
+    rng = np.random.default_rng(0)
+    texture = np.zeros((512, 512), np.float32)
+    for scale in (64, 16, 4, 1):
+        noise = rng.normal(0, 40 / scale ** 0.3, (512 // scale + 1, 512 // scale + 1)).astype(np.float32)
+        texture += cv2.resize(noise, (512, 512), interpolation=cv2.INTER_CUBIC)
+    texture = cv2.GaussianBlur(texture, (0, 0), 1.2) + 128
+    yy, xx = np.mgrid[0:512, 0:512]
+    gradient = np.dstack([xx // 2, yy // 2, (xx + yy) // 4])
+    page = np.full((512, 512), 255, np.uint8)
+    for line in range(40, 480, 24):
+        cv2.putText(page, 'Objet : explication de la situation', (20, line), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 1)
+    images = {'texture': texture, 'dégradé': gradient, 'texte': page}
+
+    checks = []
+    for name, image in images.items():
+        image = np.clip(image, 0, 255).astype(np.uint8)
+        for quality in quality_levels:
+            data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+            bgr = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            stats = dct_statistics(bgr, parse_jpeg(data))
+            beta = stats['f5_beta'] if stats else None
+            checks.append({'image': name, 'quality': quality, 'f5_beta': beta,
+                           'ok': beta is None or beta < JPEG_F5_THRESHOLD})
+    return checks
+
+
+if __name__ == '__main__':
+    results = f5_calibration_check()
+    for check in results:
+        print(f"{'OK ' if check['ok'] else 'ÉCHEC'} {check['image']:<8} q{check['quality']:<3} β={check['f5_beta']}")
+    raise SystemExit(0 if all(check['ok'] for check in results) else 1)
@@ -0,0 +1,158 @@
+"""
+Base de hachages SHA-256 connus (porteurs malveillants)
+1. Filtre de Bloom (fichier .bloom, projeté en mémoire par mmap) : un hachage
+   absent est écarté en quelques accès mémoire, sans lire l'index
+2. Index trié sur disque (fichier .idx, empreintes binaires de 32 octets) :
+   confirmation des réponses positives du filtre par recherche dichotomique
+3. Construction depuis une liste texte (une empreinte hexadécimale par ligne,
+   les autres lignes sont ignorées), vectorisée avec NumPy
+"""
+
+import math
+import mmap
+import re
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Any
+
+import numpy as np
+
+from config import KNOWN_HASH_FP_RATE
+
+
+BLOOM_MAGIC = b'DCBLOOM1'
+INDEX_MAGIC = b'DCHASH01'
+BLOOM_HEADER = struct.Struct('<8sQIQ')   # magic, bits (m), fonctions (k), entrées (n)
+INDEX_HEADER = struct.Struct('<8sQ')     # magic, entrées
+DIGEST_SIZE = 32
+_MASK64 = (1 << 64) - 1
+
+SHA256_HEX = re.compile(rb'\b[0-9a-fA-F]{64}\b')
+
+
+def database_paths(base: str) -> Dict[str, Path]:
+    """Fichiers d'une base : <base>.bloom et <base>.idx."""
+    return {'bloom': Path(f"{base}.bloom"), 'index': Path(f"{base}.idx")}
+
+
+def _bloom_size(count: int, fp_rate: float):
+    """Bits (m) et fonctions de hachage (k) pour `count` entrées au taux de faux positifs visé."""
+    bits = max(64, int(math.ceil(-count * math.log(fp_rate) / math.log(2) ** 2)))
+    functions = max(1, int(round(bits / max(count, 1) * math.log(2))))
+    return bits, functions
+
+
+# ============================================================================
+# CONSTRUCTION
+# ============================================================================
+
+def build_database(source: str, base: str, fp_rate: float = KNOWN_HASH_FP_RATE) -> Dict[str, Any]:
+    """
+    Construit <base>.bloom et <base>.idx depuis une liste d'empreintes SHA-256.
+    Les empreintes étant uniformes, les k positions du filtre sont dérivées de
+    l'empreinte elle-même (double hachage h1 + i·h2 sur ses 16 premiers octets).
+    """
+    with open(source, 'rb') as f:
+        tokens = SHA256_HEX.findall(f.read())
+    digests = np.unique(np.array([bytes.fromhex(token.decode('ascii')) for token in tokens], dtype=f'S{DIGEST_SIZE}'))
+    count = len(digests)
+    paths = database_paths(base)
+    paths['index'].parent.mkdir(parents=True, exist_ok=True)
+
+    # Index trié (ordre lexicographique des octets)
+    with open(paths['index'], 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, count))
+        f.write(digests.tobytes())
+
+    # Filtre de Bloom : bits little-endian (bit b de l'octet j = position 8j + b)
+    bits, functions = _bloom_size(count, fp_rate)
+    raw = np.frombuffer(digests.tobytes(), dtype=np.uint8).reshape(-1, DIGEST_SIZE)
+    h1 = raw[:, :8].copy().view('>u8').ravel().astype(np.uint64)
+    h2 = raw[:, 8:16].copy().view('>u8').ravel().astype(np.uint64) | np.uint64(1)
+    bitset = np.zeros(bits, dtype=bool)
+    for i in range(functions):
+        bitset[(h1 + np.uint64(i) * h2) % np.uint64(bits)] = True
+    with open(paths['bloom'], 'wb') as f:
+        f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, bits, functions, count))
+        f.write(np.packbits(bitset, bitorder='little').tobytes())
+
+    return {'entries': count, 'ignored': len(tokens) - count, 'bits': bits, 'functions': functions,
+            'bloom_bytes': paths['bloom'].stat().st_size, 'index_bytes': paths['index'].stat().st_size}
+
+
+# ============================================================================
+# RECHERCHE
+# ============================================================================
+
+class KnownHashDatabase:
+    """
+    Base ouverte en lecture : filtre et index projetés en mémoire (mmap), seules
+    les pages consultées sont lues. Partagée entre les threads du mode batch.
+    """
+
+    def __init__(self, base: str):
+        paths = database_paths(base)
+        for path in paths.values():
+            if not path.exists():
+                raise FileNotFoundError(f"Base de hachages incomplète : {path} absent")
+        self.base = base
+        self._files = [open(paths['bloom'], 'rb'), open(paths['index'], 'rb')]
+        self._bloom = mmap.mmap(self._files[0].fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = mmap.mmap(self._files[1].fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.bits, self.functions, _ = BLOOM_HEADER.unpack_from(self._bloom)
+        if magic != BLOOM_MAGIC:
+            raise ValueError(f"Filtre de Bloom invalide : {paths['bloom']}")
+        magic, self.entries = INDEX_HEADER.unpack_from(self._index)
+        if magic != INDEX_MAGIC or len(self._index) != INDEX_HEADER.size + self.entries * DIGEST_SIZE:
+            raise ValueError(f"Index de hachages invalide : {paths['index']}")
+
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'bloom_rejects': 0, 'confirmed': 0, 'false_positives': 0}
+
+    def __len__(self):
+        return self.entries
+
+    def _bloom_contains(self, digest: bytes) -> bool:
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        for i in range(self.functions):
+            position = ((h1 + i * h2) & _MASK64) % self.bits
+            if not self._bloom[BLOOM_HEADER.size + (position >> 3)] >> (position & 7) & 1:
+                return False
+        return True
+
+    def _index_contains(self, digest: bytes) -> bool:
+        low, high = 0, self.entries
+        while low < high:
+            middle = (low + high) // 2
+            offset = INDEX_HEADER.size + middle * DIGEST_SIZE
+            record = self._index[offset:offset + DIGEST_SIZE]
+            if record < digest:
+                low = middle + 1
+            elif record > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def contains(self, sha256_hex: str) -> bool:
+        """Empreinte connue ? Filtre de Bloom d'abord, index trié pour confirmer."""
+        digest = bytes.fromhex(sha256_hex)
+        if not self._bloom_contains(digest):
+            found, outcome = False, 'bloom_rejects'
+        elif self._index_contains(digest):
+            found, outcome = True, 'confirmed'
+        else:
+            found, outcome = False, 'false_positives'
+        with self._lock:
+            self.stats['lookups'] += 1
+            self.stats[outcome] += 1
+        return found
+
+    def close(self):
+        self._bloom.close()
+        self._index.close()
+        for f in self._files:
+            f.close()
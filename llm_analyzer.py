@@ -320,11 +320,19 @@ class IntelligentForensicAnalyzer:
                     all_texts.append(ocr_data['text'])
                     sources.append(f'OCR ({ocr_type})')
         
-        lsb_text = forensic_results.get('steganography', {}).get('lsb')
-        if lsb_text:
+        steg = forensic_results.get('steganography', {})
+        decoded = [entry for entry in steg.get('decoded', []) if entry.get('plaintext')]
+        
+        # Message LSB brut seulement s'il n'a pas été décodé (base64, XOR... = bruit pour le LLM)
+        lsb_text = steg.get('lsb')
+        if lsb_text and not any(entry['source'] == 'lsb' for entry in decoded):
             all_texts.append(lsb_text)
             sources.append('Stéganographie LSB')
         
+        for entry in decoded:
+            all_texts.append(entry['plaintext'])
+            sources.append(f"Décodé ({entry['source']}, {entry['transforms']})")
+        
         return "\n\n--- SECTION SÉPARÉE ---\n\n".join(all_texts), sources
     
     def build_context(self, forensic_results: Dict) -> Dict:
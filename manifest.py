@@ -0,0 +1,186 @@
+"""
+Manifeste d'ingestion : fichiers déjà traités (chemin, taille, mtime, SHA-256)
+1. Un fichier dont la taille et la date de modification n'ont pas changé n'est
+   ni relu ni haché
+2. Un fichier modifié est haché : même contenu qu'un fichier déjà analysé
+   (copie, renommage, touch) = doublon, non ré-analysé
+3. Sauvegarde atomique (fichier temporaire puis remplacement)
+4. Checkpoint du mode batch : journal en ajout seul (JSON Lines) des fichiers
+   terminés et de leurs rapports, relu pour reprendre un lot interrompu
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from config import CHECKPOINT_FSYNC_INTERVAL
+
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 d'un fichier lu par blocs."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class Manifest:
+    """
+    Entrées {chemin absolu: {size, mtime_ns, sha256, status, updated, ...}}.
+    status : 'done', 'failed' ou 'duplicate' (contenu déjà analysé sous un autre
+    chemin, cf. duplicate_of). Partagé entre les threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._analyzed: Dict[str, str] = {}   # SHA-256 analysé -> chemin
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+            for key, entry in self.entries.items():
+                if entry['status'] == 'done':
+                    self._analyzed[entry['sha256']] = key
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    def unchanged(self, path: Path, stat: Optional[os.stat_result] = None) -> bool:
+        """Même taille et même mtime qu'à la dernière visite (aucune lecture du fichier)."""
+        stat = stat or path.stat()
+        with self._lock:
+            entry = self.entries.get(self.key(path))
+        return entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+    def check(self, path: Path, stat: Optional[os.stat_result] = None) -> Dict[str, Any]:
+        """
+        Hache un fichier nouveau ou modifié. Retourne {sha256, duplicate_of}; un
+        doublon est enregistré tout de suite (status 'duplicate'), un fichier
+        dont seul le mtime a changé est son propre doublon.
+        """
+        stat = stat or path.stat()
+        sha256 = file_sha256(path)
+        key = self.key(path)
+        with self._lock:
+            duplicate_of = self._analyzed.get(sha256)
+            if duplicate_of == key:
+                # Même fichier, même contenu (touch) : seules taille et mtime sont mises à jour
+                self.entries[key].update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                self._dirty = True
+            elif duplicate_of:
+                self._set(key, stat, sha256, 'duplicate', duplicate_of=duplicate_of)
+        return {'sha256': sha256, 'duplicate_of': duplicate_of}
+
+    def record(self, path: Path, sha256: str, status: str,
+               stat: Optional[os.stat_result] = None, **details):
+        """Enregistre le résultat du traitement d'un fichier ('done' ou 'failed')."""
+        stat = stat or path.stat()
+        with self._lock:
+            self._set(self.key(path), stat, sha256, status, **details)
+            if status == 'done':
+                self._analyzed.setdefault(sha256, self.key(path))
+
+    def _set(self, key: str, stat: os.stat_result, sha256: str, status: str, **details):
+        self.entries[key] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+            'status': status,
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            **details
+        }
+        self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix='.manifest-', suffix='.json')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+class Checkpoint:
+    """
+    Journal de reprise du mode batch : une ligne JSON par fichier terminé
+    {path, size, mtime_ns, sha256, outputs, time}, ajoutée après l'écriture de
+    ses rapports. Rien n'est réécrit : un arrêt brutal coûte au plus la dernière
+    ligne (tronquée, ignorée à la relecture) et les lignes non synchronisées,
+    dont les fichiers sont simplement ré-analysés (au moins une fois).
+    """
+
+    def __init__(self, path: str, resume: bool = True, fsync_interval: int = CHECKPOINT_FSYNC_INTERVAL):
+        self.path = Path(path)
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        self.fsync_interval = max(1, fsync_interval)
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        if resume and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.completed[entry['path']] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def __len__(self):
+        return len(self.completed)
+
+    def completed_entry(self, path: Path, stat: Optional[os.stat_result] = None) -> Optional[Dict[str, Any]]:
+        """Entrée du fichier s'il est terminé et inchangé depuis (taille, mtime), sinon None."""
+        entry = self.completed.get(Manifest.key(path))
+        if entry is None:
+            return None
+        stat = stat or path.stat()
+        if entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            return None
+        return entry
+
+    def record(self, path: Path, sha256: str, outputs: List[Path], stat: os.stat_result):
+        """Ajoute un fichier terminé (`stat` pris avant l'analyse : une modification pendant l'analyse la refera)."""
+        entry = {
+            'path': Manifest.key(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+            'outputs': [str(output) for output in outputs],
+            'time': datetime.now().isoformat(timespec='seconds')
+        }
+        with self._lock:
+            self.completed[entry['path']] = entry
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            # flush : survit à un crash du processus ; fsync groupé : survit à un redémarrage
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
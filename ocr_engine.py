@@ -0,0 +1,879 @@
+"""
+Moteur OCR du Décodeur (Tesseract + EasyOCR)
+1. Lecteurs EasyOCR mis en cache par jeu de langues (chargés une seule fois)
+2. Mode tuilé pour les très grandes images : tuiles chevauchantes reconnues
+   en parallèle, détections dédupliquées dans les zones de recouvrement
+3. Pré-passe de proposition de régions de texte (gradient morphologique) :
+   l'OCR est sauté sans région candidate, sinon limité aux régions
+4. Variantes de pré-traitement (CLAHE, seuil adaptatif, inversion, canaux,
+   plan LSB) classées par leur gain sur l'image de référence (contours de texte
+   invisibles sur celle-ci), quasi-doublons écartés, les meilleures étant
+   reconnues en parallèle
+5. Micro-batching EasyOCR (mode batch) : les entrées de plusieurs images sont
+   complétées jusqu'à quelques toiles de taille fixe, regroupées par toile et
+   passées à l'inférence batchée d'EasyOCR
+6. Backend Tesseract en processus (tesserocr) avec un pool de moteurs
+   initialisés par langue; repli sur pytesseract (un processus par appel)
+7. Langues configurables et détection d'écriture (OSD) optionnelle : seuls
+   les modèles de reconnaissance nécessaires sont chargés
+"""
+
+import heapq
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Iterator, Tuple, Callable, Optional
+
+import cv2
+import numpy as np
+import pytesseract
+import easyocr
+from colorama import Fore
+
+from config import (
+    OCR_TILE_SIZE, OCR_TILE_OVERLAP, OCR_TILE_THRESHOLD_PIXELS, OCR_TILE_WORKERS,
+    OCR_REGION_MAX_SIDE, OCR_REGION_MAX_COUNT, OCR_REGION_PADDING, OCR_REGION_MAX_COVERAGE,
+    OCR_VARIANTS, OCR_VARIANT_TOP_K, OCR_VARIANT_MIN_GAIN, OCR_VARIANT_MIN_DIFF,
+    OCR_BATCH_SIZE, OCR_BATCH_MAX_WAIT, OCR_BATCH_CANVASES, OCR_RECOGNIZER_BATCH_SIZE,
+    TESSERACT_CMD, OCR_TESSERACT_BACKEND, OCR_TESSERACT_POOL_SIZE,
+    OCR_LANGUAGE_CODES, OCR_SCRIPT_MIN_CONF, OCR_SCRIPT_MAX_SIDE
+)
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# pytesseract : n'imposer le chemin de l'exécutable que s'il existe (sinon PATH)
+if TESSERACT_CMD and os.path.isfile(TESSERACT_CMD):
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+
+class TesseractInitError(RuntimeError):
+    """Moteur tesserocr impossible à initialiser (données de langue introuvables)."""
+
+
+_READERS: Dict[Tuple[str, ...], Any] = {}
+_READERS_LOCK = threading.Lock()
+
+
+def get_easyocr_reader(langs: List[str]):
+    """Retourne un lecteur EasyOCR partagé pour ce jeu de langues."""
+    key = tuple(langs)
+    with _READERS_LOCK:
+        if key not in _READERS:
+            _READERS[key] = easyocr.Reader(list(langs), gpu=False, verbose=False)
+        return _READERS[key]
+
+
+# ============================================================================
+# BACKEND TESSERACT EN PROCESSUS
+# ============================================================================
+
+class TesseractEnginePool:
+    """
+    Pool de moteurs tesserocr (API C de Tesseract) initialisés par langue.
+    
+    Un moteur n'est pas thread-safe : chaque appel en emprunte un au pool et
+    le rend ensuite. Les moteurs sont créés à la demande, jusqu'à `size` par
+    langue, puis réutilisés (pas de processus ni de fichier temporaire par appel).
+    """
+    
+    def __init__(self, size: int = OCR_TESSERACT_POOL_SIZE):
+        self.size = size if size > 0 else (os.cpu_count() or 1)
+        self._idle: Dict[str, queue.LifoQueue] = {}
+        self._created: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._engines: List[Any] = []
+    
+    @contextmanager
+    def acquire(self, lang: str):
+        """Emprunte un moteur initialisé pour `lang` (bloque si tous sont occupés)."""
+        with self._lock:
+            idle = self._idle.setdefault(lang, queue.LifoQueue())
+            engine = None
+            if idle.empty() and self._created.get(lang, 0) < self.size:
+                self._created[lang] = self._created.get(lang, 0) + 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                engine = tesserocr.PyTessBaseAPI(lang=lang)
+            except Exception as e:
+                with self._lock:
+                    self._created[lang] -= 1
+                if isinstance(e, RuntimeError):
+                    raise TesseractInitError(str(e)) from e
+                raise
+            with self._lock:
+                self._engines.append(engine)
+        else:
+            engine = idle.get()
+        try:
+            yield engine
+        finally:
+            engine.Clear()
+            idle.put(engine)
+    
+    def close(self):
+        """Libère tous les moteurs."""
+        with self._lock:
+            for engine in self._engines:
+                engine.End()
+            self._engines = []
+            self._idle = {}
+            self._created = {}
+
+
+_TESSERACT_POOL: Optional[TesseractEnginePool] = None
+_TESSERACT_POOL_LOCK = threading.Lock()
+_TESSEROCR_FAILED: set = set()
+
+
+def get_tesseract_pool() -> TesseractEnginePool:
+    """Retourne le pool de moteurs tesserocr partagé."""
+    global _TESSERACT_POOL
+    with _TESSERACT_POOL_LOCK:
+        if _TESSERACT_POOL is None:
+            _TESSERACT_POOL = TesseractEnginePool()
+        return _TESSERACT_POOL
+
+
+def _use_tesserocr(lang: str) -> bool:
+    """Backend en processus utilisable pour cette langue ?"""
+    if OCR_TESSERACT_BACKEND == 'pytesseract' or not TESSEROCR_AVAILABLE:
+        return False
+    return lang not in _TESSEROCR_FAILED
+
+
+def _set_tesserocr_image(engine, image: np.ndarray):
+    """Passe directement le tampon NumPy au moteur (niveaux de gris ou BGR)."""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    bpp = 1 if image.ndim == 2 else image.shape[2]
+    engine.SetImageBytes(image.tobytes(), width, height, bpp, width * bpp)
+
+
+def _with_tesserocr(lang: str, func: Callable[[Any], Any]):
+    """
+    Exécute `func(engine)` avec un moteur du pool. Retourne None si le backend
+    est indisponible pour cette langue (le repli pytesseract prend alors le relais).
+    """
+    if not _use_tesserocr(lang):
+        return None
+    # Seul l'échec d'initialisation du moteur déclenche le repli : une erreur de
+    # reconnaissance remonte à l'appelant sans désactiver tesserocr
+    try:
+        with get_tesseract_pool().acquire(lang) as engine:
+            return func(engine)
+    except TesseractInitError as e:
+        # Données de langue introuvables pour tesserocr : ne plus réessayer
+        if OCR_TESSERACT_BACKEND == 'tesserocr':
+            raise
+        _TESSEROCR_FAILED.add(lang)
+        print(f"{Fore.YELLOW}[OCR] tesserocr indisponible pour '{lang}' ({e}) : repli sur pytesseract")
+        return None
+
+
+# ============================================================================
+# LANGUES ET DÉTECTION D'ÉCRITURE
+# ============================================================================
+
+# Noms d'écriture OSD regroupés sous ceux de OCR_LANGUAGE_CODES
+_SCRIPT_ALIASES = {'Katakana': 'Japanese', 'Hiragana': 'Japanese', 'Korean': 'Hangul'}
+
+_TESSERACT_INSTALLED: Optional[set] = None
+
+
+def installed_tesseract_langs() -> set:
+    """Données de langue Tesseract installées (mises en cache)."""
+    global _TESSERACT_INSTALLED
+    if _TESSERACT_INSTALLED is None:
+        try:
+            if _use_tesserocr('eng'):
+                _TESSERACT_INSTALLED = set(tesserocr.get_languages()[1])
+            else:
+                _TESSERACT_INSTALLED = set(pytesseract.get_languages(config=''))
+        except Exception:
+            _TESSERACT_INSTALLED = set()
+    return _TESSERACT_INSTALLED
+
+
+def tesseract_lang(langs: List[str]) -> str:
+    """
+    Chaîne de langues Tesseract ('eng+fra') pour des codes EasyOCR, limitée aux
+    données installées; 'eng' si aucune ne l'est.
+    """
+    installed = installed_tesseract_langs()
+    codes = []
+    for lang in langs:
+        code = OCR_LANGUAGE_CODES.get(lang, (lang, None))[0]
+        if code not in codes and (not installed or code in installed):
+            codes.append(code)
+    return '+'.join(codes) or 'eng'
+
+
+def _downscale(gray: np.ndarray, max_side: int) -> Tuple[np.ndarray, float]:
+    """Version réduite (plus grand côté <= max_side) et son facteur d'échelle."""
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale == 1.0:
+        return gray, scale
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+def detect_script(gray: np.ndarray) -> Optional[Dict[str, Any]]:
+    """
+    Écriture dominante détectée par l'OSD de Tesseract sur une version réduite
+    de l'image : {'script', 'conf'}. None si l'OSD échoue (trop peu de texte,
+    osd.traineddata absent).
+    """
+    small, _ = _downscale(gray, OCR_SCRIPT_MAX_SIDE)
+    
+    def read(engine):
+        _set_tesserocr_image(engine, small)
+        return engine.DetectOrientationScript()
+    
+    try:
+        osd = _with_tesserocr('osd', read)
+        if osd:
+            script, conf = osd['script_name'], osd['script_conf']
+        else:
+            data = pytesseract.image_to_osd(small, output_type=pytesseract.Output.DICT)
+            script, conf = data['script'], data['script_conf']
+    except Exception:
+        return None
+    return {'script': _SCRIPT_ALIASES.get(script, script), 'conf': float(conf)}
+
+
+def languages_for_script(langs: List[str], script: Optional[Dict[str, Any]]) -> List[str]:
+    """
+    Restreint les langues configurées à celles de l'écriture détectée.
+    Conserve toutes les langues si l'écriture est incertaine ou sans correspondance.
+    """
+    if not script or script['conf'] < OCR_SCRIPT_MIN_CONF:
+        return list(langs)
+    matching = [lang for lang in langs
+                if OCR_LANGUAGE_CODES.get(lang, (None, None))[1] == script['script']]
+    return matching or list(langs)
+
+
+# ============================================================================
+# RECONNAISSANCE PLEINE IMAGE
+# ============================================================================
+
+def tesseract_text(image: np.ndarray, lang: str = 'eng') -> str:
+    """Texte reconnu par Tesseract sur l'image entière."""
+    def read(engine) -> str:
+        _set_tesserocr_image(engine, image)
+        return engine.GetUTF8Text().strip()
+    
+    text = _with_tesserocr(lang, read)
+    if text is not None:
+        return text
+    return pytesseract.image_to_string(image, lang=lang).strip()
+
+
+def _easyocr_readtext(image: np.ndarray, langs: List[str], detail: int,
+                      batcher: Optional['EasyOCRBatcher'] = None) -> List[Any]:
+    """readtext EasyOCR, direct ou via le micro-batcher."""
+    if batcher is not None:
+        return batcher.readtext(image, langs, detail)
+    return get_easyocr_reader(langs).readtext(image, detail=detail)
+
+
+def easyocr_text(image: np.ndarray, langs: List[str],
+                 batcher: Optional['EasyOCRBatcher'] = None) -> str:
+    """Texte reconnu par EasyOCR sur l'image entière."""
+    results = _easyocr_readtext(image, langs, 0, batcher)
+    return ' '.join(results).strip()
+
+
+# ============================================================================
+# DÉTECTIONS AVEC BOÎTES (modes tuilé et régions)
+# ============================================================================
+
+def tesseract_boxes(image: np.ndarray, lang: str = 'eng') -> List[Dict[str, Any]]:
+    """Mots reconnus par Tesseract avec leur boîte (x, y, w, h) et confiance."""
+    def read(engine) -> List[Dict[str, Any]]:
+        _set_tesserocr_image(engine, image)
+        engine.Recognize()
+        level = tesserocr.RIL.WORD
+        words = []
+        iterator = engine.GetIterator()
+        if iterator is None:
+            return words
+        for word in tesserocr.iterate_level(iterator, level):
+            text = (word.GetUTF8Text(level) or '').strip()
+            bbox = word.BoundingBox(level)
+            if not text or bbox is None:
+                continue
+            x1, y1, x2, y2 = bbox
+            words.append({
+                'text': text,
+                'box': (x1, y1, x2 - x1, y2 - y1),
+                'conf': word.Confidence(level) / 100.0
+            })
+        return words
+    
+    words = _with_tesserocr(lang, read)
+    if words is not None:
+        return words
+    
+    data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    detections = []
+    for i, text in enumerate(data['text']):
+        text = text.strip()
+        conf = float(data['conf'][i])
+        if not text or conf < 0:
+            continue
+        detections.append({
+            'text': text,
+            'box': (data['left'][i], data['top'][i], data['width'][i], data['height'][i]),
+            'conf': conf / 100.0
+        })
+    return detections
+
+
+def easyocr_boxes(image: np.ndarray, langs: List[str],
+                  batcher: Optional['EasyOCRBatcher'] = None) -> List[Dict[str, Any]]:
+    """Segments reconnus par EasyOCR avec leur boîte (x, y, w, h) et confiance."""
+    detections = []
+    for points, text, conf in _easyocr_readtext(image, langs, 1, batcher):
+        text = text.strip()
+        if not text:
+            continue
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        x, y = int(min(xs)), int(min(ys))
+        detections.append({
+            'text': text,
+            'box': (x, y, int(max(xs)) - x, int(max(ys)) - y),
+            'conf': float(conf)
+        })
+    return detections
+
+
+def should_tile(image: np.ndarray, mode: str = 'auto',
+                threshold: int = OCR_TILE_THRESHOLD_PIXELS) -> bool:
+    """Mode tuilé : 'on', 'off' ou 'auto' (au-delà du seuil de pixels)."""
+    if mode == 'on':
+        return True
+    if mode == 'off':
+        return False
+    return image.shape[0] * image.shape[1] > threshold
+
+
+def iter_tiles(image: np.ndarray, tile_size: int = OCR_TILE_SIZE,
+               overlap: int = OCR_TILE_OVERLAP) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """Découpe l'image en tuiles chevauchantes (vues NumPy, sans copie)."""
+    height, width = image.shape[:2]
+    step = max(1, tile_size - overlap)
+    ys = list(range(0, max(height - overlap, 1), step))
+    xs = list(range(0, max(width - overlap, 1), step))
+    for y in ys:
+        for x in xs:
+            yield x, y, image[y:y + tile_size, x:x + tile_size]
+
+
+def _normalize(text: str) -> str:
+    return ''.join(text.split()).casefold()
+
+
+def merge_detections(detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Déduplique les détections issues de tuiles chevauchantes : un texte vu
+    deux fois au même endroit, ou un fragment coupé au bord d'une tuile et
+    contenu dans une détection plus complète, n'est conservé qu'une fois.
+    """
+    # Les détections les plus complètes (longues, confiantes) passent en premier
+    ordered = sorted(detections, key=lambda d: (-len(_normalize(d['text'])), -d['conf']))
+    kept: List[Dict[str, Any]] = []
+    # Boîtes conservées dans un tableau préalloué (pas de copie à chaque ajout)
+    kept_boxes = np.empty((len(ordered), 4), dtype=np.float64)
+
+    for det in ordered:
+        x, y, w, h = det['box']
+        area = max(w * h, 1)
+        if kept:
+            boxes = kept_boxes[:len(kept)]
+            ix1 = np.maximum(boxes[:, 0], x)
+            iy1 = np.maximum(boxes[:, 1], y)
+            ix2 = np.minimum(boxes[:, 0] + boxes[:, 2], x + w)
+            iy2 = np.minimum(boxes[:, 1] + boxes[:, 3], y + h)
+            inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+            candidates = np.nonzero(inter / area > 0.5)[0]
+            norm = _normalize(det['text'])
+            if any(norm in _normalize(kept[i]['text']) for i in candidates):
+                continue
+        kept_boxes[len(kept)] = (x, y, w, h)
+        kept.append(det)
+
+    return kept
+
+
+def detections_to_text(detections: List[Dict[str, Any]]) -> str:
+    """Recompose le texte dans l'ordre de lecture (lignes puis gauche à droite)."""
+    if not detections:
+        return ''
+    ordered = sorted(detections, key=lambda d: d['box'][1] + d['box'][3] / 2)
+    lines: List[List[Dict[str, Any]]] = []
+    line_center = None
+    for det in ordered:
+        center = det['box'][1] + det['box'][3] / 2
+        if line_center is None or abs(center - line_center) > max(det['box'][3], 1) / 2:
+            lines.append([])
+            line_center = center
+        lines[-1].append(det)
+    return '\n'.join(
+        ' '.join(d['text'] for d in sorted(line, key=lambda d: d['box'][0]))
+        for line in lines
+    ).strip()
+
+
+_OCR_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_OCR_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_ocr_executor() -> ThreadPoolExecutor:
+    """
+    Pool de reconnaissance partagé (OCR_TILE_WORKERS threads) : fenêtres,
+    tuiles et variantes de toutes les images s'y partagent un nombre borné
+    d'appels simultanés aux moteurs. Ses tâches ne soumettent rien au pool.
+    """
+    global _OCR_EXECUTOR
+    with _OCR_EXECUTOR_LOCK:
+        if _OCR_EXECUTOR is None:
+            _OCR_EXECUTOR = ThreadPoolExecutor(max_workers=OCR_TILE_WORKERS or os.cpu_count() or 1,
+                                               thread_name_prefix='ocr')
+        return _OCR_EXECUTOR
+
+
+def _run_window(window: Tuple[int, int, np.ndarray],
+                recognize_boxes: Callable[[np.ndarray], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Détections d'une fenêtre (x, y, vue), ramenées dans les coordonnées de l'image."""
+    x, y, view = window
+    detections = recognize_boxes(view)
+    for det in detections:
+        bx, by, bw, bh = det['box']
+        det['box'] = (bx + x, by + y, bw, bh)
+    return detections
+
+
+def _recognize_windows(windows: List[Tuple[int, int, np.ndarray]],
+                       recognize_boxes: Callable[[np.ndarray], List[Dict[str, Any]]]) -> str:
+    """Reconnaît des fenêtres (x, y, vue) en parallèle et recompose le texte."""
+    detections: List[Dict[str, Any]] = []
+    for window_detections in get_ocr_executor().map(lambda window: _run_window(window, recognize_boxes), windows):
+        detections.extend(window_detections)
+
+    return detections_to_text(merge_detections(detections))
+
+
+def tiled_recognize(image: np.ndarray,
+                    recognize_boxes: Callable[[np.ndarray], List[Dict[str, Any]]],
+                    tile_size: int = OCR_TILE_SIZE,
+                    overlap: int = OCR_TILE_OVERLAP) -> Tuple[str, int]:
+    """
+    Reconnaît le texte tuile par tuile en parallèle.
+    Retourne (texte dédupliqué, nombre de tuiles).
+    """
+    tiles = list(iter_tiles(image, tile_size, overlap))
+    return _recognize_windows(tiles, recognize_boxes), len(tiles)
+
+
+# ============================================================================
+# PROPOSITION DE RÉGIONS DE TEXTE
+# ============================================================================
+
+def _gradient(gray: np.ndarray) -> np.ndarray:
+    """Gradient morphologique (contours des traits)."""
+    return cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+
+
+def _merge_boxes(boxes: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
+    """Fusionne les boîtes qui se chevauchent jusqu'à stabilité."""
+    merged = list(boxes)
+    changed = True
+    while changed:
+        changed = False
+        result: List[Tuple[int, int, int, int]] = []
+        for x, y, w, h in merged:
+            for i, (rx, ry, rw, rh) in enumerate(result):
+                if x < rx + rw and rx < x + w and y < ry + rh and ry < y + h:
+                    nx, ny = min(x, rx), min(y, ry)
+                    result[i] = (nx, ny, max(x + w, rx + rw) - nx, max(y + h, ry + rh) - ny)
+                    changed = True
+                    break
+            else:
+                result.append((x, y, w, h))
+        merged = result
+    return merged
+
+
+def propose_text_regions(gray: np.ndarray,
+                         max_side: int = OCR_REGION_MAX_SIDE,
+                         max_regions: int = OCR_REGION_MAX_COUNT,
+                         padding: int = OCR_REGION_PADDING) -> List[Tuple[int, int, int, int]]:
+    """
+    Propose des boîtes (x, y, w, h) susceptibles de contenir du texte :
+    gradient morphologique + seuil d'Otsu + fermeture horizontale, puis filtrage
+    des composantes par densité et forme de ligne de texte.
+    Calculé sur une version réduite de l'image (coût négligeable devant l'OCR).
+    Si le nombre de régions dépasse `max_regions`, retourne l'image entière.
+    """
+    height, width = gray.shape[:2]
+    small, scale = _downscale(gray, max_side)
+
+    gradient = _gradient(small)
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE,
+                                 cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    small_h = small.shape[0]
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < 6 or w < 8 or h > small_h * 0.5 or w < h * 1.2:
+            continue
+        density = cv2.countNonZero(connected[y:y + h, x:x + w]) / float(w * h)
+        if density < 0.45:
+            continue
+        # Retour aux coordonnées de l'image d'origine, avec marge
+        x0 = max(0, int(x / scale) - padding)
+        y0 = max(0, int(y / scale) - padding)
+        x1 = min(width, int((x + w) / scale) + padding)
+        y1 = min(height, int((y + h) / scale) + padding)
+        boxes.append((x0, y0, x1 - x0, y1 - y0))
+
+    boxes = _merge_boxes(boxes)
+    if len(boxes) > max_regions:
+        return [(0, 0, width, height)]
+    return boxes
+
+
+def region_coverage(regions: List[Tuple[int, int, int, int]], shape: Tuple[int, ...]) -> float:
+    """Fraction de l'image couverte par les régions (fusionnées, donc disjointes)."""
+    return sum(w * h for _, _, w, h in regions) / float(shape[0] * shape[1])
+
+
+def region_windows(image: np.ndarray,
+                   regions: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, np.ndarray]]:
+    """Fenêtres (x, y, vue) des régions proposées (vues NumPy, sans copie)."""
+    return [(x, y, image[y:y + h, x:x + w]) for x, y, w, h in regions]
+
+
+def recognize_regions(image: np.ndarray, regions: List[Tuple[int, int, int, int]],
+                      recognize_boxes: Callable[[np.ndarray], List[Dict[str, Any]]]) -> str:
+    """Reconnaît uniquement les régions proposées, en parallèle."""
+    return _recognize_windows(region_windows(image, regions), recognize_boxes)
+
+
+# ============================================================================
+# PLAN DE RECONNAISSANCE
+# ============================================================================
+
+def plan_recognition(image: np.ndarray, use_regions: bool = True, tiling_mode: str = 'auto',
+                     regions: Optional[List[Tuple[int, int, int, int]]] = None) -> Dict[str, Any]:
+    """
+    Choisit comment reconnaître une image : 'skipped' (aucune région de texte),
+    'regions', 'tiled' ou 'full'. `regions` : régions déjà proposées (évite de
+    refaire la pré-passe).
+    """
+    plan: Dict[str, Any] = {'mode': 'full', 'regions': None, 'score': 0.0}
+
+    if use_regions:
+        if regions is None:
+            regions = propose_text_regions(image)
+        if not regions:
+            plan['mode'] = 'skipped'
+        elif region_coverage(regions, image.shape) <= OCR_REGION_MAX_COVERAGE:
+            plan['mode'] = 'regions'
+            plan['regions'] = regions
+
+    if plan['mode'] == 'full' and should_tile(image, tiling_mode):
+        plan['mode'] = 'tiled'
+        plan['tiles'] = sum(1 for _ in iter_tiles(image))
+    return plan
+
+
+def plan_windows(image: np.ndarray, plan: Dict[str, Any]) -> Optional[List[Tuple[int, int, np.ndarray]]]:
+    """Fenêtres (x, y, vue) à reconnaître pour un plan; None : image entière."""
+    if plan['mode'] == 'skipped':
+        return []
+    if plan['mode'] == 'regions':
+        return region_windows(image, plan['regions'])
+    if plan['mode'] == 'tiled':
+        return list(iter_tiles(image))
+    return None
+
+
+def run_plan(image: np.ndarray, plan: Dict[str, Any],
+             recognize_text: Callable[[np.ndarray], str],
+             recognize_boxes: Callable[[np.ndarray], List[Dict[str, Any]]]) -> str:
+    """Exécute un plan de reconnaissance avec un moteur donné."""
+    windows = plan_windows(image, plan)
+    if windows is None:
+        return recognize_text(image)
+    if not windows:
+        return ''
+    return _recognize_windows(windows, recognize_boxes)
+
+
+# ============================================================================
+# VARIANTES DE PRÉ-TRAITEMENT
+# ============================================================================
+
+def iter_variants(bgr: np.ndarray, gray: np.ndarray,
+                  names: Optional[List[str]] = None) -> Iterator[Tuple[str, np.ndarray]]:
+    """
+    Génère paresseusement les variantes de pré-traitement (une seule à la fois
+    en mémoire) : texte peu contrasté, texte clair sur fond clair, texte porté
+    par un seul canal ou dessiné dans le plan LSB.
+    """
+    names = names or OCR_VARIANTS
+    for name in names:
+        if name == 'clahe':
+            yield name, cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8)).apply(gray)
+        elif name == 'adaptive':
+            yield name, cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                              cv2.THRESH_BINARY, 31, 5)
+        elif name == 'inverted':
+            yield name, cv2.bitwise_not(gray)
+        elif name == 'channels' and bgr.ndim == 3:
+            for index, channel_name in enumerate(['blue', 'green', 'red']):
+                yield f'channel_{channel_name}', cv2.normalize(
+                    bgr[:, :, index], None, 0, 255, cv2.NORM_MINMAX
+                )
+        elif name == 'lsb':
+            raw_gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY) if bgr.ndim == 3 else bgr
+            yield name, (raw_gray & 1) * 255
+
+
+def _near_duplicate(small: np.ndarray, other: np.ndarray, max_diff: float = OCR_VARIANT_MIN_DIFF) -> bool:
+    """Versions réduites quasi identiques, ou l'une négatif de l'autre (même texte pour l'OCR)."""
+    return (float(np.mean(cv2.absdiff(small, other))) < max_diff
+            or float(np.mean(cv2.absdiff(small, cv2.bitwise_not(other)))) < max_diff)
+
+
+def text_gain(small: np.ndarray, scale: float, regions: List[Tuple[int, int, int, int]],
+              reference_gradient: np.ndarray) -> float:
+    """
+    Gain d'une variante sur la référence : part des contours nets de ses
+    régions candidates qui sont à peine visibles sur l'image de référence
+    (texte peu contrasté relevé par CLAHE ou le seuil adaptatif, texte porté
+    par un canal ou par le plan LSB). 0 : rien de plus que la référence.
+    """
+    mask = np.zeros(small.shape[:2], dtype=bool)
+    for x, y, w, h in regions:
+        mask[int(y * scale):int((y + h) * scale) + 1, int(x * scale):int((x + w) * scale) + 1] = True
+    strong = mask & (_gradient(small) >= 64)
+    total = np.count_nonzero(strong)
+    if not total:
+        return 0.0
+    return float(np.count_nonzero(strong & (reference_gradient < 32))) / total
+
+
+def select_variants(bgr: np.ndarray, gray: np.ndarray, use_regions: bool, tiling_mode: str,
+                    top_k: int = OCR_VARIANT_TOP_K) -> List[Tuple[str, np.ndarray, Dict[str, Any]]]:
+    """
+    Ne garde que les `top_k` variantes au meilleur gain (text_gain >=
+    OCR_VARIANT_MIN_GAIN) en plus de l'image normalisée de référence. Une
+    variante quasi identique à la référence ou à une variante retenue (canal
+    égal au gris, inversion) est écartée avant toute pré-passe, une variante
+    sans région de texte ou couverte de régions (texture, bruit) aussi.
+    Retourne [(nom, image, plan)], la référence en premier; plan['score'] : gain.
+    """
+    baseline_plan = plan_recognition(gray, use_regions, tiling_mode)
+    reference, scale = _downscale(gray, OCR_REGION_MAX_SIDE)
+    reference_gradient = _gradient(reference)
+    best: List[Tuple[float, int, str, np.ndarray, Dict[str, Any], np.ndarray]] = []
+
+    for order, (name, variant) in enumerate(iter_variants(bgr, gray)):
+        small, _ = _downscale(variant, OCR_REGION_MAX_SIDE)
+        if any(_near_duplicate(small, other) for other in [reference] + [entry[5] for entry in best]):
+            continue
+        regions = propose_text_regions(variant)
+        if not regions or region_coverage(regions, variant.shape) > OCR_REGION_MAX_COVERAGE:
+            continue
+        gain = text_gain(small, scale, regions, reference_gradient)
+        if gain < OCR_VARIANT_MIN_GAIN:
+            continue
+        plan = plan_recognition(variant, use_regions, tiling_mode, regions)
+        plan['score'] = gain
+        entry = (gain, -order, name, variant, plan, small)
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        else:
+            heapq.heappushpop(best, entry)
+
+    selected = [('normalized', gray, baseline_plan)]
+    selected.extend((name, variant, plan) for _, _, name, variant, plan, _ in sorted(best, reverse=True))
+    return selected
+
+
+def merge_variant_texts(texts: List[str]) -> str:
+    """Fusionne les textes de plusieurs variantes en supprimant les lignes répétées."""
+    seen = set()
+    lines = []
+    for text in texts:
+        for line in text.splitlines():
+            key = _normalize(line)
+            if key and key not in seen:
+                seen.add(key)
+                lines.append(line.strip())
+    return '\n'.join(lines)
+
+
+def recognize_variants(selected: List[Tuple[str, np.ndarray, Dict[str, Any]]],
+                       recognize_text: Callable[[np.ndarray], str],
+                       recognize_boxes: Callable[[np.ndarray], List[Dict[str, Any]]]) -> Tuple[str, List[str]]:
+    """
+    Reconnaît les variantes sélectionnées en parallèle : les fenêtres de toutes
+    les variantes (ou l'image entière d'un plan 'full') forment une seule liste
+    de tâches du pool partagé, sans pool imbriqué par variante.
+    Retourne (texte fusionné, noms des variantes ayant produit du texte).
+    """
+    tasks: List[Tuple[int, Optional[Tuple[int, int, np.ndarray]]]] = []
+    full = set()
+    for index, (_, image, plan) in enumerate(selected):
+        windows = plan_windows(image, plan)
+        if windows is None:
+            full.add(index)
+            tasks.append((index, None))
+        else:
+            tasks.extend((index, window) for window in windows)
+
+    def run(task):
+        index, window = task
+        if window is None:
+            return recognize_text(selected[index][1])
+        return _run_window(window, recognize_boxes)
+
+    outputs: List[Any] = [[] for _ in selected]
+    for (index, _), output in zip(tasks, get_ocr_executor().map(run, tasks)):
+        if index in full:
+            outputs[index] = output
+        else:
+            outputs[index].extend(output)
+    texts = [output if index in full else detections_to_text(merge_detections(output))
+             for index, output in enumerate(outputs)]
+    productive = [name for (name, _, _), text in zip(selected, texts) if text]
+    return merge_variant_texts(texts), productive
+
+
+# ============================================================================
+# MICRO-BATCHING EASYOCR
+# ============================================================================
+
+class EasyOCRBatcher:
+    """
+    Regroupe les appels readtext de plusieurs images (ou régions) et les
+    exécute via `readtext_batched` : un lot part dès `batch_size` entrées ou
+    après `max_wait` secondes. Chaque entrée est complétée (bord constant, sans
+    redimensionnement qui déformerait le texte) jusqu'à la plus petite des
+    toiles `canvases` (hauteur, largeur) qui la contient : les régions de texte,
+    de tailles toutes différentes, partagent ainsi quelques formes communes.
+    Une entrée plus grande que toutes les toiles passe seule, sans complément.
+    Les boîtes restent dans les coordonnées d'origine. `recognizer_batch_size`
+    est le batch_size du reconnaisseur d'EasyOCR (lignes de texte par passe du
+    réseau), indépendant du nombre d'entrées par lot.
+    Chaque appelant récupère son résultat via un Future.
+    """
+
+    def __init__(self, batch_size: int = OCR_BATCH_SIZE, max_wait: float = OCR_BATCH_MAX_WAIT,
+                 canvases: List[Tuple[int, int]] = OCR_BATCH_CANVASES,
+                 recognizer_batch_size: int = OCR_RECOGNIZER_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max(0.0, max_wait)
+        self.canvases = sorted((tuple(canvas) for canvas in canvases), key=lambda c: (c[0] * c[1], c))
+        self.recognizer_batch_size = max(1, recognizer_batch_size)
+        self.batches_run = 0
+        self.items_run = 0
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name='easyocr-batcher', daemon=True)
+        self._thread.start()
+
+    def readtext(self, image: np.ndarray, langs: List[str], detail: int = 0) -> List[Any]:
+        """Soumet une image et attend son résultat (même format que readtext)."""
+        future: Future = Future()
+        self._queue.put((image, tuple(langs), detail, future))
+        return future.result()
+
+    def close(self):
+        """Traite les entrées restantes puis arrête le thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run(batch)
+            if stop:
+                return
+
+    def canvas_for(self, image: np.ndarray) -> Optional[Tuple[int, int]]:
+        """Plus petite toile (hauteur, largeur) contenant l'image; None si aucune."""
+        height, width = image.shape[:2]
+        for canvas_height, canvas_width in self.canvases:
+            if height <= canvas_height and width <= canvas_width:
+                return canvas_height, canvas_width
+        return None
+
+    def _run(self, batch: List[Tuple[np.ndarray, Tuple[str, ...], int, Future]]):
+        groups: Dict[Tuple[Any, ...], List[Tuple[np.ndarray, Future]]] = {}
+        for index, (image, langs, detail, future) in enumerate(batch):
+            # Hors toiles : groupe à part (identifiant d'entrée unique), exécuté seul
+            canvas = self.canvas_for(image) or ('alone', index)
+            groups.setdefault((langs, detail, canvas, image.ndim), []).append((image, future))
+
+        for (langs, detail, canvas, _), items in groups.items():
+            try:
+                reader = get_easyocr_reader(list(langs))
+                if canvas[0] == 'alone':
+                    image, future = items[0]
+                    outputs = [reader.readtext(image, detail=detail, batch_size=self.recognizer_batch_size)]
+                else:
+                    height, width = canvas
+                    padded = []
+                    for image, _ in items:
+                        fill = int(np.median(image))
+                        padded.append(cv2.copyMakeBorder(
+                            image, 0, height - image.shape[0], 0, width - image.shape[1],
+                            cv2.BORDER_CONSTANT, value=fill
+                        ))
+                    outputs = reader.readtext_batched(padded, detail=detail,
+                                                      batch_size=self.recognizer_batch_size)
+                for (_, future), output in zip(items, outputs):
+                    future.set_result(output)
+                self.batches_run += 1
+                self.items_run += len(items)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
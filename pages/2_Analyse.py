@@ -83,23 +83,13 @@ if uploaded_file is not None:
             status_text.text(steps[0][1])
             analyzer.preprocess_image()
             
-            progress_bar.progress(30)
-            status_text.text(steps[1][1])
-            analyzer.analyze_ocr()
+            # Étapes planifiées par le registre (intégrées et plugins) : la barre
+            # avance après chaque analyseur exécuté
+            def on_stage(name, done, total):
+                progress_bar.progress(10 + int(75 * done / max(total, 1)))
+                status_text.text(f"Analyse : {name} ({done}/{total})...")
             
-            progress_bar.progress(50)
-            status_text.text(steps[2][1])
-            analyzer.analyze_lsb()
-            
-            progress_bar.progress(70)
-            status_text.text(steps[3][1])
-            analyzer.analyze_strings()
-            analyzer.detect_signatures()
-            analyzer.analyze_exif()
-            
-            # Autres analyses...
-            analyzer.analyze_bitplanes()
-            analyzer.analyze_histogram()
+            analyzer._run_stages(progress=on_stage)
             
             progress_bar.progress(85)
             status_text.text(steps[4][1])
@@ -192,7 +182,19 @@ if uploaded_file is not None:
                         st.warning(f"Fichier détecté : {sig['type']} @ {sig['hex_offset']}")
                 else:
                     st.info("Aucune signature de fichier suspecte.")
-            
+
+                # Plugins (analyseurs externes)
+                plugins = results.get('plugins', {})
+                if plugins:
+                    st.markdown("#### Plugins")
+                    for plugin in plugins.values():
+                        if plugin.get('error'):
+                            st.error(f"{plugin['label']} : erreur - {plugin['error']}")
+                        elif plugin['finding']:
+                            st.warning(f"{plugin['label']} : {plugin['summary'] or 'résultat positif'}")
+                        else:
+                            st.info(f"{plugin['label']} : {plugin['summary'] or 'rien de détecté'}")
+
             with tab2:
                 st.markdown("#### OCR - Texte Extrait")
                 ocr_res = results.get('ocr', {})
@@ -0,0 +1,193 @@
+"""
+Décodage des charges utiles extraites (message LSB, données finales, commentaires)
+1. Transformations essayées sur chaque flux candidat : base64 (standard et URL),
+   hexadécimal, zlib, gzip, XOR à octet unique
+2. XOR : les 256 clés sont testées en une seule opération NumPy (matrice 256 × n)
+   et notées par la proportion de caractères imprimables
+   (XOR seulement si aucune autre transformation ne s'applique)
+3. Chaînes de transformations (ex. base64 → zlib) jusqu'à DECODE_MAX_DEPTH;
+   seul le résultat le plus profond lisible (ou une décompression valide) est gardé
+"""
+
+import base64
+import binascii
+import re
+import zlib
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    DECODE_MAX_DEPTH, DECODE_MIN_TOKEN, DECODE_MAX_TOKENS, DECODE_PRINTABLE_RATIO,
+    DECODE_MAX_INPUT, DECODE_MAX_OUTPUT, DECODE_XOR_SAMPLE, DECODE_PLAINTEXT_CHARS
+)
+
+
+BASE64_TOKEN = re.compile(rb'[A-Za-z0-9+/_-]{%d,}={0,2}' % DECODE_MIN_TOKEN)
+HEX_TOKEN = re.compile(rb'(?:[0-9a-fA-F]{2}){%d,}' % (DECODE_MIN_TOKEN // 2))
+
+# Table des octets imprimables (ASCII visible + tabulation, retours à la ligne)
+_PRINTABLE = np.zeros(256, dtype=bool)
+_PRINTABLE[0x20:0x7F] = True
+_PRINTABLE[[0x09, 0x0A, 0x0D]] = True
+# Lettres et espace : départagent les clés XOR donnant toutes du texte imprimable
+_LETTERS = np.zeros(256, dtype=bool)
+_LETTERS[ord('a'):ord('z') + 1] = True
+_LETTERS[ord('A'):ord('Z') + 1] = True
+_LETTERS[0x20] = True
+
+
+def printable_ratio(data: bytes) -> float:
+    """Proportion d'octets imprimables."""
+    if not data:
+        return 0.0
+    return float(_PRINTABLE[np.frombuffer(data, dtype=np.uint8)].mean())
+
+
+def _is_plaintext(data: bytes) -> bool:
+    return len(data) >= 4 and printable_ratio(data) >= DECODE_PRINTABLE_RATIO
+
+
+# ============================================================================
+# TRANSFORMATIONS : chacune retourne [(sortie, métadonnées)]
+# ============================================================================
+
+def _tokens(pattern: re.Pattern, data: bytes) -> List[bytes]:
+    """Jetons candidats, les plus longs d'abord."""
+    return sorted(set(pattern.findall(data)), key=len, reverse=True)[:DECODE_MAX_TOKENS]
+
+
+def decode_base64(data: bytes) -> List[Tuple[bytes, Dict[str, Any]]]:
+    outputs = []
+    for token in _tokens(BASE64_TOKEN, data):
+        padded = token.rstrip(b'=') + b'=' * (-len(token.rstrip(b'=')) % 4)
+        altchars = b'-_' if (b'-' in token or b'_' in token) else None
+        try:
+            decoded = base64.b64decode(padded, altchars=altchars, validate=True)
+        except (binascii.Error, ValueError):
+            continue
+        if decoded:
+            outputs.append((decoded, {'token_length': len(token)}))
+    return outputs
+
+
+def decode_hex(data: bytes) -> List[Tuple[bytes, Dict[str, Any]]]:
+    return [(bytes.fromhex(token.decode('ascii')), {'token_length': len(token)})
+            for token in _tokens(HEX_TOKEN, data)]
+
+
+def _inflate(data: bytes, wbits: int) -> Optional[bytes]:
+    """Décompression bornée à DECODE_MAX_OUTPUT octets (None si flux invalide)."""
+    try:
+        return zlib.decompressobj(wbits=wbits).decompress(data, DECODE_MAX_OUTPUT)
+    except zlib.error:
+        return None
+
+
+def decode_zlib(data: bytes) -> List[Tuple[bytes, Dict[str, Any]]]:
+    # En-tête zlib : méthode deflate (CMF & 0x0F == 8) et contrôle CMF·FLG multiple de 31
+    if len(data) < 2 or data[0] & 0x0F != 8 or (data[0] * 256 + data[1]) % 31:
+        return []
+    inflated = _inflate(data, 15)
+    return [(inflated, {})] if inflated else []
+
+
+def decode_gzip(data: bytes) -> List[Tuple[bytes, Dict[str, Any]]]:
+    if not data.startswith(b'\x1f\x8b\x08'):
+        return []
+    inflated = _inflate(data, 31)
+    return [(inflated, {})] if inflated else []
+
+
+def xor_scores(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Proportions d'octets imprimables et de lettres pour les 256 clés, calculées
+    en une opération sur l'échantillon (matrice 256 × DECODE_XOR_SAMPLE).
+    """
+    sample = np.frombuffer(data[:DECODE_XOR_SAMPLE], dtype=np.uint8)
+    keys = np.arange(256, dtype=np.uint8)[:, None]
+    xored = sample[None, :] ^ keys
+    return _PRINTABLE[xored].mean(axis=1), _LETTERS[xored].mean(axis=1)
+
+
+def decode_xor(data: bytes) -> List[Tuple[bytes, Dict[str, Any]]]:
+    if len(data) < DECODE_MIN_TOKEN:
+        return []
+    printable, letters = xor_scores(data)
+    candidates = np.flatnonzero(printable >= DECODE_PRINTABLE_RATIO)
+    if not len(candidates):
+        return []
+    # Plusieurs clés peuvent donner du texte imprimable : la meilleure en lettres
+    # l'emporte, et la clé 0 (flux laissé tel quel) signifie qu'il n'y a rien à décoder
+    key = int(candidates[np.argmax(printable[candidates] + letters[candidates])])
+    if key == 0:
+        return []
+    decoded = (np.frombuffer(data, dtype=np.uint8) ^ np.uint8(key)).tobytes()
+    return [(decoded, {'key': hex(key), 'score': round(float(printable[key]), 4)})]
+
+
+TRANSFORMS = [
+    ('base64', decode_base64),
+    ('hex', decode_hex),
+    ('zlib', decode_zlib),
+    ('gzip', decode_gzip),
+    ('xor', decode_xor),
+]
+
+# Décompressions valides : conservées même si le résultat n'est pas du texte
+VALIDATING_TRANSFORMS = {'zlib', 'gzip'}
+
+
+# ============================================================================
+# DÉCODAGE D'UN FLUX
+# ============================================================================
+
+def decode_stream(data: bytes, depth: int = 0, chain: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Essaie toutes les transformations sur `data` et enchaîne sur leurs sorties.
+    Retourne [{chain: [{transform, ...}], output}] pour les résultats terminaux.
+    """
+    chain = chain or []
+    results = []
+    decoded_any = False
+    for name, transform in TRANSFORMS:
+        # XOR en dernier recours : sur du texte déjà décodable (hex, base64), une clé
+        # transformerait les chiffres en lettres et donnerait un faux texte lisible
+        if name == 'xor' and decoded_any:
+            continue
+        for output, meta in transform(data):
+            decoded_any = True
+            step = chain + [{'transform': name, **meta}]
+            deeper = decode_stream(output, depth + 1, step) if depth + 1 < DECODE_MAX_DEPTH else []
+            if deeper:
+                results.extend(deeper)
+            elif _is_plaintext(output) or name in VALIDATING_TRANSFORMS:
+                results.append({'chain': step, 'output': output})
+    return results
+
+
+def decode_candidates(candidates: List[Tuple[str, bytes]]) -> List[Dict[str, Any]]:
+    """
+    Décode chaque flux candidat (source, octets). Retourne les textes décodés :
+    [{source, chain, transforms, length, printable_ratio, plaintext}] (plaintext
+    None pour une décompression binaire valide).
+    """
+    decoded = []
+    seen = set()
+    for source, data in candidates:
+        for result in decode_stream(data[:DECODE_MAX_INPUT]):
+            output = result['output']
+            if (source, output) in seen:
+                continue
+            seen.add((source, output))
+            ratio = printable_ratio(output)
+            decoded.append({
+                'source': source,
+                'chain': result['chain'],
+                'transforms': '+'.join(step['transform'] for step in result['chain']),
+                'length': len(output),
+                'printable_ratio': round(ratio, 4),
+                'plaintext': (output.decode('utf-8', errors='replace')[:DECODE_PLAINTEXT_CHARS]
+                              if ratio >= DECODE_PRINTABLE_RATIO else None)
+            })
+    return decoded
@@ -0,0 +1,205 @@
+"""
+Empreintes perceptuelles et index des quasi-doublons
+1. pHash (DCT 32×32, 8×8 basses fréquences comparées à la médiane) et dHash
+   (gradients horizontaux 9×8) sur les pixels décodés : 64 bits chacun, stables
+   à la recompression et au redimensionnement
+2. Arbre BK sur le pHash (distance de Hamming) : recherche des images analysées
+   à moins de PHASH_MAX_DISTANCE bits sans parcourir tout l'index
+3. Index persistant (JSON) des analyses précédentes : résultats résumés,
+   comparaison avec une nouvelle analyse et résultats réutilisables (OCR)
+"""
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import PHASH_MAX_DISTANCE, DUPLICATE_MAX_MATCHES
+
+
+INDEX_VERSION = 1
+
+
+def _json_default(obj):
+    """Types NumPy des résultats réutilisables (OCR) vers JSON."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+# ============================================================================
+# EMPREINTES
+# ============================================================================
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int(''.join('1' if bit else '0' for bit in bits.ravel()), 2)
+
+
+def dhash(gray: np.ndarray) -> int:
+    """Différence entre pixels voisins d'une vignette 9×8 (64 bits)."""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(gray: np.ndarray) -> int:
+    """Basses fréquences DCT (8×8 hors composante continue) comparées à leur médiane (64 bits)."""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].ravel()
+    return _bits_to_int(low > np.median(low[1:]))
+
+
+def image_hashes(bgr: np.ndarray) -> Dict[str, str]:
+    """pHash et dHash (hexadécimal, 16 caractères) d'une image BGR ou en niveaux de gris."""
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY) if bgr.ndim == 3 else bgr
+    return {'phash': f"{phash(gray):016x}", 'dhash': f"{dhash(gray):016x}"}
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+# ============================================================================
+# ARBRE BK (distance de Hamming)
+# ============================================================================
+
+class BKTree:
+    """
+    Arbre BK : chaque nœud range ses enfants par distance au nœud. Une recherche
+    de rayon r ne descend que dans les enfants de distance [d - r, d + r].
+    """
+
+    def __init__(self):
+        self._root: Optional[list] = None   # [empreinte, [clés], {distance: nœud}]
+
+    def add(self, value: int, key: Any):
+        if self._root is None:
+            self._root = [value, [key], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(key)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [key], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, Any]]:
+        """[(distance, clé)] à moins de `radius` bits, les plus proches d'abord."""
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend((distance, key) for key in node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return sorted(found, key=lambda item: item[0])
+
+
+# ============================================================================
+# INDEX PERSISTANT DES ANALYSES
+# ============================================================================
+
+def index_entry(results: Dict[str, Any], reusable_stages: List[str]) -> Dict[str, Any]:
+    """Résumé d'une analyse conservé dans l'index (et résultats réutilisables)."""
+    steg = results['steganography']
+    summary = results['summary']
+    return {
+        'sha256': results['file_info'].get('sha256'),
+        'image': results['image'],
+        'image_path': results['image_path'],
+        'analysis_date': results['analysis_date'],
+        **results['perceptual_hash'],
+        'size_bytes': results['file_info'].get('size_bytes'),
+        'suspicion_level': summary['suspicion_level'],
+        'methods_with_findings': list(summary['methods_with_findings']),
+        'lsb': steg.get('lsb'),
+        'signatures': sorted({sig['type'] for sig in steg.get('binary_signatures', [])}),
+        'decoded': sorted({entry['plaintext'] for entry in steg.get('decoded', []) if entry['plaintext']}),
+        'reusable': {stage: results[stage] for stage in reusable_stages if results.get(stage)}
+    }
+
+
+def diff_results(prior: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Différences entre une analyse indexée et l'entrée de la nouvelle analyse."""
+    prior_methods, methods = set(prior['methods_with_findings']), set(current['methods_with_findings'])
+    return {
+        'same_file': prior['sha256'] == current['sha256'],
+        'size_delta': (current['size_bytes'] or 0) - (prior['size_bytes'] or 0),
+        'suspicion': [prior['suspicion_level'], current['suspicion_level']],
+        'new_findings': sorted(methods - prior_methods),
+        'missing_findings': sorted(prior_methods - methods),
+        'lsb_changed': prior['lsb'] != current['lsb'],
+        'new_signatures': sorted(set(current['signatures']) - set(prior['signatures'])),
+        'new_decoded': [text[:200] for text in current['decoded'] if text not in prior['decoded']]
+    }
+
+
+class DuplicateIndex:
+    """
+    Index des analyses passées, chargé depuis / sauvegardé dans un fichier JSON.
+    Une entrée par SHA-256 (la plus récente); arbre BK sur le pHash reconstruit
+    au chargement. Partagé entre les threads du mode batch.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._tree = BKTree()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for entry in data.get('entries', []):
+                self._insert(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _insert(self, entry: Dict[str, Any]):
+        known = entry['sha256'] in self.entries
+        self.entries[entry['sha256']] = entry
+        if not known:
+            self._tree.add(int(entry['phash'], 16), entry['sha256'])
+
+    def find(self, hashes: Dict[str, str], max_distance: int = PHASH_MAX_DISTANCE,
+             limit: int = DUPLICATE_MAX_MATCHES) -> List[Dict[str, Any]]:
+        """Analyses dont le pHash est à moins de `max_distance` bits : [{distance, dhash_distance, entry}]."""
+        value, dvalue = int(hashes['phash'], 16), int(hashes['dhash'], 16)
+        with self._lock:
+            found = self._tree.search(value, max_distance)
+            entries = [self.entries[key] for _, key in found[:limit]]
+        return [{'distance': distance, 'dhash_distance': hamming(dvalue, int(entry['dhash'], 16)), 'entry': entry}
+                for (distance, _), entry in zip(found, entries)]
+
+    def add(self, entry: Dict[str, Any]):
+        with self._lock:
+            self._insert(entry)
+            self._dirty = True
+
+    def save(self):
+        """Écriture atomique (fichier temporaire puis remplacement)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix='.duplicates-', suffix='.json')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'entries': list(self.entries.values())},
+                          f, ensure_ascii=False, default=_json_default)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
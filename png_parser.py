@@ -0,0 +1,222 @@
+"""
+Analyse structurelle des fichiers PNG (parcours des chunks)
+1. Un seul parcours linéaire sur un memoryview des octets bruts (aucune copie
+   des données de chunk : chaque chunk est une tranche de la vue)
+2. Vérification des CRC, détection des chunks inconnus/privés, surdimensionnés,
+   hors ordre, et des données après IEND
+3. Textes tEXt/zTXt/iTXt décodés à la demande, décompression bornée
+"""
+
+import zlib
+from typing import Dict, Any, Iterator, Optional
+
+from config import PNG_MAX_ANCILLARY_CHUNK, PNG_TEXT_MAX_DECOMPRESSED
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Chunks définis par la spécification PNG (+ APNG et eXIf)
+KNOWN_CHUNKS = {
+    'IHDR', 'PLTE', 'IDAT', 'IEND',
+    'tRNS', 'cHRM', 'gAMA', 'iCCP', 'sBIT', 'sRGB', 'cICP', 'mDCv', 'cLLi',
+    'tEXt', 'zTXt', 'iTXt', 'bKGD', 'hIST', 'pHYs', 'sPLT', 'tIME', 'eXIf',
+    'acTL', 'fcTL', 'fdAT',
+}
+
+TEXT_CHUNKS = {'tEXt', 'zTXt', 'iTXt'}
+
+# Chunks de données image : comptés, pas listés un par un
+IMAGE_DATA_CHUNKS = {'IDAT', 'fdAT'}
+
+
+def is_png(data) -> bool:
+    """Le contenu commence-t-il par la signature PNG ?"""
+    return bytes(data[:8]) == PNG_SIGNATURE
+
+
+def iter_chunks(view: memoryview) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourt les chunks après la signature. Chaque chunk est un dict
+    {type, offset, length, crc_ok, data} où `data` est une tranche du memoryview.
+    S'arrête après IEND ou sur un chunk tronqué ({'truncated': True}).
+    """
+    offset = len(PNG_SIGNATURE)
+    end = len(view)
+    while offset + 8 <= end:
+        length = int.from_bytes(view[offset:offset + 4], 'big')
+        chunk_type = bytes(view[offset + 4:offset + 8]).decode('latin-1')
+        data_start = offset + 8
+        data_end = data_start + length
+        if length > 0x7FFFFFFF or data_end + 4 > end:
+            yield {'type': chunk_type, 'offset': offset, 'length': length, 'truncated': True}
+            return
+
+        # Le CRC couvre le type et les données (contigus dans la vue)
+        stored_crc = int.from_bytes(view[data_end:data_end + 4], 'big')
+        crc_ok = zlib.crc32(view[offset + 4:data_end]) == stored_crc
+        yield {
+            'type': chunk_type,
+            'offset': offset,
+            'length': length,
+            'crc_ok': crc_ok,
+            'data': view[data_start:data_end]
+        }
+        offset = data_end + 4
+        if chunk_type == 'IEND':
+            return
+
+
+def chunk_properties(chunk_type: str) -> Dict[str, bool]:
+    """Bits de propriété du type (casse de chaque lettre)."""
+    raw = chunk_type.encode('latin-1')
+    return {
+        'ancillary': bool(raw[0] & 0x20),
+        'private': bool(raw[1] & 0x20),
+        'reserved': bool(raw[2] & 0x20),
+        'safe_to_copy': bool(raw[3] & 0x20),
+    }
+
+
+def _inflate(data: memoryview) -> Dict[str, Any]:
+    """Décompression zlib bornée à PNG_TEXT_MAX_DECOMPRESSED octets."""
+    inflater = zlib.decompressobj()
+    try:
+        text = inflater.decompress(data, PNG_TEXT_MAX_DECOMPRESSED)
+    except zlib.error as e:
+        return {'value': None, 'error': str(e)}
+    return {'value': text, 'capped': bool(inflater.unconsumed_tail)}
+
+
+def _text_keyword(data: memoryview) -> Optional[str]:
+    """Mot-clé (1 à 79 octets) en tête d'un chunk texte."""
+    raw = bytes(data[:80])
+    separator = raw.find(b'\x00')
+    return raw[:separator].decode('latin-1') if separator > 0 else None
+
+
+def read_text(raw_bytes, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Décode le texte d'une entrée de parse_png()['text'] : {value, compressed,
+    language?, capped?, error?}. La décompression n'a lieu qu'à cet appel.
+    """
+    start = entry['offset'] + 8
+    data = memoryview(raw_bytes)[start:start + entry['length']]
+    keyword = _text_keyword(data)
+    if keyword is None:
+        return {'value': None, 'error': 'mot-clé invalide'}
+    rest = data[len(keyword.encode('latin-1')) + 1:]
+    decoded: Dict[str, Any] = {'compressed': False}
+
+    if entry['chunk'] == 'tEXt':
+        decoded['value'] = bytes(rest).decode('latin-1')
+    elif entry['chunk'] == 'zTXt':
+        decoded['compressed'] = True
+        inflated = _inflate(rest[1:])
+        decoded.update(inflated)
+        if inflated.get('value') is not None:
+            decoded['value'] = inflated['value'].decode('latin-1')
+    else:
+        # iTXt : drapeau, méthode, langue\0, mot-clé traduit\0, texte UTF-8
+        compressed = len(rest) > 0 and rest[0] == 1
+        header = bytes(rest[2:2 + 512])
+        language_end = header.find(b'\x00')
+        translated_end = header.find(b'\x00', language_end + 1)
+        if language_end < 0 or translated_end < 0:
+            return {'value': None, 'error': 'en-tête iTXt invalide'}
+        decoded['language'] = header[:language_end].decode('ascii', errors='replace')
+        text = rest[2 + translated_end + 1:]
+        decoded['compressed'] = compressed
+        if compressed:
+            inflated = _inflate(text)
+            decoded.update(inflated)
+            if inflated.get('value') is not None:
+                decoded['value'] = inflated['value'].decode('utf-8', errors='replace')
+        else:
+            decoded['value'] = bytes(text).decode('utf-8', errors='replace')
+    return decoded
+
+
+def _add_range(ranges, start: int, end: int):
+    """Ajoute [start, end) en fusionnant avec la plage précédente si contiguë."""
+    if ranges and ranges[-1][1] == start:
+        ranges[-1][1] = end
+    else:
+        ranges.append([start, end])
+
+
+def parse_png(raw_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Parcourt la structure d'un PNG en une passe et retourne le rapport :
+    chunks (hors IDAT/fdAT, seulement comptés et localisés en plages
+    [début, fin) fusionnées), chunks texte (mot-clé et position,
+    contenu décodé plus tard par read_text), données après IEND et anomalies.
+    None si le contenu n'est pas un PNG.
+    """
+    view = memoryview(raw_bytes)
+    if not is_png(view):
+        return None
+
+    report: Dict[str, Any] = {
+        'chunks': [],
+        'chunk_counts': {},
+        'image_data_bytes': 0,
+        'image_data_ranges': [],
+        'text': [],
+        'trailing': None,
+        'anomalies': []
+    }
+    anomalies = report['anomalies']
+    end_offset = None
+
+    for index, chunk in enumerate(iter_chunks(view)):
+        chunk_type = chunk['type']
+        offset = chunk['offset']
+
+        if chunk.get('truncated'):
+            anomalies.append(f"Chunk {chunk_type!r} tronqué à l'offset {offset} "
+                             f"(longueur annoncée {chunk['length']})")
+            break
+
+        report['chunk_counts'][chunk_type] = report['chunk_counts'].get(chunk_type, 0) + 1
+        if not chunk['crc_ok']:
+            anomalies.append(f"CRC invalide pour {chunk_type} à l'offset {offset}")
+        if index == 0 and chunk_type != 'IHDR':
+            anomalies.append(f"Premier chunk {chunk_type} au lieu de IHDR")
+
+        if chunk_type in IMAGE_DATA_CHUNKS:
+            report['image_data_bytes'] += chunk['length']
+            _add_range(report['image_data_ranges'], offset, offset + 12 + chunk['length'])
+            continue
+
+        properties = chunk_properties(chunk_type)
+        entry = {'type': chunk_type, 'offset': offset, 'length': chunk['length'], 'crc_ok': chunk['crc_ok']}
+        report['chunks'].append(entry)
+
+        if chunk_type not in KNOWN_CHUNKS:
+            entry['unknown'] = True
+            kind = 'critique' if not properties['ancillary'] else ('privé' if properties['private'] else 'public')
+            anomalies.append(f"Chunk inconnu {kind} {chunk_type!r} ({chunk['length']} octets) à l'offset {offset}")
+        if properties['reserved']:
+            anomalies.append(f"Bit réservé activé dans {chunk_type!r} à l'offset {offset}")
+        if properties['ancillary'] and chunk['length'] > PNG_MAX_ANCILLARY_CHUNK:
+            anomalies.append(f"Chunk auxiliaire {chunk_type} surdimensionné ({chunk['length']} octets) "
+                             f"à l'offset {offset}")
+
+        if chunk_type in TEXT_CHUNKS:
+            report['text'].append({
+                'chunk': chunk_type,
+                'offset': offset,
+                'length': chunk['length'],
+                'keyword': _text_keyword(chunk['data'])
+            })
+
+        if chunk_type == 'IEND':
+            end_offset = offset + 12 + chunk['length']
+
+    if end_offset is None:
+        anomalies.append("Chunk IEND absent (fichier tronqué ou structure invalide)")
+    elif end_offset < len(view):
+        report['trailing'] = {'offset': end_offset, 'length': len(view) - end_offset}
+        anomalies.append(f"{len(view) - end_offset} octets après IEND (offset {end_offset})")
+
+    return report
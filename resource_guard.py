@@ -0,0 +1,280 @@
+"""
+Garde-fous contre les fichiers hostiles
+1. Limites vérifiées dans l'en-tête, avant tout décodage : taille du fichier et
+   pixels déclarés (bombes de décompression : quelques Ko qui se décodent en Go)
+2. Décodage isolé (option) : l'image est décodée par un processus Python
+   séparé, plafonné par RLIMIT_AS (POSIX) et surveillé (RSS via /proc, durée) ;
+   un dépassement ou un plantage du décodeur rejette le fichier, le worker
+   survit. Seul le décodage initial des pixels (cv2.imread, ou PIL pour les
+   formats non lus par OpenCV) est isolé : l'en-tête PIL est lu dans le
+   processus, et les étapes qui relisent le fichier (LSB stegano, frames)
+   décodent dans le processus, bornées par les limites d'en-tête et de frame
+   et par la garde de PIL (Image.MAX_IMAGE_PIXELS, voir configure_pil)
+3. Délai max par étape : une étape bloquée (OCR) est abandonnée et l'analyse
+   continue avec les autres étapes ; l'étape travaille sur une copie des
+   résultats, fusionnée seulement si elle se termine à temps (merge_changes)
+"""
+
+import json
+import os
+try:
+    import resource
+except ImportError:
+    # Windows : pas de RLIMIT_AS, seule la surveillance du processus s'applique
+    resource = None
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import MAX_IMAGE_PIXELS, MAX_FILE_SIZE_MB, DECODE_MAX_RSS_MB, DECODE_TIMEOUT
+
+
+# Garde de PIL par défaut (≈ 89 MP), conservée quand la limite configurée est 0
+_PIL_DEFAULT_PIXELS = Image.MAX_IMAGE_PIXELS
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_POLL = 0.02
+
+# Code de sortie du décodeur isolé quand une allocation échoue (RLIMIT_AS atteint)
+_EXIT_MEMORY = 3
+
+
+class ResourceLimitError(ValueError):
+    """Fichier refusé : limite de taille, de pixels ou de mémoire dépassée."""
+
+
+class StageTimeout(Exception):
+    """Étape abandonnée après son délai max."""
+
+
+# ============================================================================
+# LIMITES LUES DANS L'EN-TÊTE
+# ============================================================================
+
+def configure_pil(max_pixels: Optional[int] = MAX_IMAGE_PIXELS):
+    """
+    Garde de décompression de PIL alignée sur la limite configurée (PIL avertit
+    au-delà, refuse au-delà du double); garde par défaut de PIL si 0/None.
+    Protège aussi les décodages PIL hors de check_header (LSB, frames).
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels or _PIL_DEFAULT_PIXELS
+
+
+configure_pil()
+
+
+def check_header(path: Path, max_pixels: Optional[int] = MAX_IMAGE_PIXELS,
+                 max_file_size_mb: Optional[float] = MAX_FILE_SIZE_MB) -> Dict[str, Any]:
+    """
+    Vérifie taille et dimensions déclarées sans décoder les pixels (Image.open
+    ne lit que l'en-tête). Retourne {width, height, format}; ResourceLimitError
+    si une limite est dépassée.
+    """
+    size = path.stat().st_size
+    if max_file_size_mb and size > max_file_size_mb * 1024 * 1024:
+        raise ResourceLimitError(f"Fichier trop volumineux : {size / 1024 / 1024:.0f} Mo "
+                                 f"(limite {max_file_size_mb} Mo)")
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            image_format = image.format
+    except Image.DecompressionBombError as e:
+        raise ResourceLimitError(f"Dimensions refusées par PIL : {e}")
+    check_pixels(width, height, max_pixels)
+    return {'width': width, 'height': height, 'format': image_format}
+
+
+def check_pixels(width: int, height: int, max_pixels: Optional[int] = MAX_IMAGE_PIXELS):
+    """Dimensions déclarées (image, frame, vidéo) au-delà de la limite : ResourceLimitError."""
+    if max_pixels and width * height > max_pixels:
+        raise ResourceLimitError(f"Dimensions déclarées {width}×{height} ({width * height / 1e6:.0f} MP) "
+                                 f"au-delà de la limite ({max_pixels / 1e6:.0f} MP) : bombe de décompression ?")
+
+
+# ============================================================================
+# DÉCODAGE ISOLÉ
+# ============================================================================
+
+def _decode(path: str) -> np.ndarray:
+    """Décodage BGR : OpenCV, ou PIL (première frame) pour les formats non lus par OpenCV."""
+    image = cv2.imread(path)
+    if image is None:
+        with Image.open(path) as pil_image:
+            image = cv2.cvtColor(np.asarray(pil_image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    return image
+
+
+def _rss(pid: int) -> Optional[int]:
+    """Mémoire résidente d'un processus (octets), via /proc (Linux); None si indisponible."""
+    try:
+        with open(f"/proc/{pid}/statm", 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _limit_address_space(max_rss_mb: float):
+    """
+    Enfant : plafonne l'espace d'adressage (RLIMIT_AS) à l'existant (interpréteur,
+    OpenCV, NumPy déjà importés) + max_rss_mb ; une allocation au-delà échoue
+    (MemoryError) au lieu de solliciter la mémoire de la machine.
+    """
+    if resource is None or not max_rss_mb:
+        return
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            mapped = int(f.read().split()[0]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # Sans /proc (macOS) : base non mesurable, seule la durée reste surveillée
+        return
+    limit = mapped + int(max_rss_mb * 1024 * 1024)
+    hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def decode_isolated(path: Path, max_rss_mb: float = DECODE_MAX_RSS_MB,
+                    timeout: float = DECODE_TIMEOUT,
+                    max_pixels: Optional[int] = MAX_IMAGE_PIXELS) -> np.ndarray:
+    """
+    Décode l'image dans un processus enfant (même interpréteur, ce module) :
+    les pixels reviennent par un fichier temporaire. L'enfant plafonne son
+    espace d'adressage à max_rss_mb au-delà de l'existant (RLIMIT_AS, posé par
+    l'enfant après ses imports : preexec_fn n'est pas sûr depuis un processus à
+    threads) ; la mémoire résidente (/proc, Linux) et la durée sont en plus
+    surveillées, l'enfant est tué au-delà de max_rss_mb ou de timeout.
+    """
+    fd, out_path = tempfile.mkstemp(prefix='.decode-', suffix='.raw')
+    os.close(fd)
+    process = subprocess.Popen([sys.executable, str(Path(__file__).resolve()), str(path), out_path,
+                                str(max_rss_mb or 0), str(max_pixels or 0)],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        deadline = time.monotonic() + timeout
+        peak = 0
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=_POLL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            peak = max(peak, _rss(process.pid) or 0)
+            if peak > max_rss_mb * 1024 * 1024:
+                process.kill()
+                process.communicate()
+                raise ResourceLimitError(f"Décodage interrompu : mémoire > {max_rss_mb} Mo")
+            if time.monotonic() > deadline:
+                process.kill()
+                process.communicate()
+                raise ResourceLimitError(f"Décodage interrompu : durée > {timeout} s")
+        if process.returncode == _EXIT_MEMORY:
+            raise ResourceLimitError(f"Décodage interrompu : mémoire > {max_rss_mb} Mo (RLIMIT_AS)")
+        if process.returncode != 0:
+            detail = stderr.decode('utf-8', errors='replace').strip().splitlines()
+            raise ValueError(f"Impossible de charger l'image: {path} "
+                             f"(décodeur {'tué' if process.returncode < 0 else 'en échec'}"
+                             f"{' : ' + detail[-1] if detail else ''})")
+        header = json.loads(stdout)
+        return np.fromfile(out_path, dtype=header['dtype']).reshape(header['shape'])
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        os.unlink(out_path)
+
+
+def _decode_main(argv):
+    """
+    Processus enfant : décode argv[1], écrit les pixels dans argv[2], la forme
+    sur stdout. argv[3] : mémoire max (Mo), argv[4] : pixels max (0 = défaut PIL).
+    """
+    configure_pil(int(argv[4]) or None)
+    _limit_address_space(float(argv[3]))
+    try:
+        image = _decode(argv[1])
+        image.tofile(argv[2])
+    except MemoryError:
+        sys.exit(_EXIT_MEMORY)
+    except cv2.error as e:
+        # Allocation refusée par OpenCV (« Insufficient memory », « Failed to allocate »)
+        if 'memory' in str(e).lower() or 'allocate' in str(e).lower():
+            sys.exit(_EXIT_MEMORY)
+        raise
+    print(json.dumps({'shape': list(image.shape), 'dtype': str(image.dtype)}))
+
+
+# ============================================================================
+# DÉLAI PAR ÉTAPE
+# ============================================================================
+
+def call_with_timeout(func: Callable[[], Any], timeout: Optional[float], name: str = 'étape') -> Any:
+    """
+    Exécute func() dans un thread et attend au plus `timeout` secondes. Un
+    thread Python ne peut pas être interrompu : une étape abandonnée continue
+    en arrière-plan (thread démon) avec son CPU et sa mémoire, l'analyse
+    n'attend plus sa fin. func ne doit donc modifier que des données privées
+    (voir merge_changes) ; la limite stricte est la durée max d'un travail
+    du worker de file (job_queue), qui quitte le processus.
+    """
+    if not timeout:
+        return func()
+    outcome: Dict[str, Any] = {}
+
+    def target():
+        try:
+            outcome['result'] = func()
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, name=f"stage-{name}", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise StageTimeout(f"{name} : délai de {timeout:g} s dépassé")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
+
+
+def _unchanged(old: Any, new: Any) -> bool:
+    if isinstance(old, np.ndarray) or isinstance(new, np.ndarray):
+        return isinstance(old, np.ndarray) and isinstance(new, np.ndarray) and np.array_equal(old, new)
+    try:
+        return bool(old == new)
+    except (ValueError, TypeError):
+        return False
+
+
+def merge_changes(target: Dict[str, Any], base: Dict[str, Any], changed: Dict[str, Any]):
+    """
+    Reporte dans `target` les modifications de `changed` par rapport à `base`
+    (copie prise avant l'étape) : clés ajoutées, valeurs modifiées, clés
+    supprimées, récursivement dans les dictionnaires. Les clés que l'étape n'a
+    pas touchées gardent la valeur de `target` (étapes parallèles).
+    """
+    for key, value in changed.items():
+        if key not in base:
+            target[key] = value
+        elif isinstance(value, dict) and isinstance(base[key], dict) and isinstance(target.get(key), dict):
+            merge_changes(target[key], base[key], value)
+        elif not _unchanged(base[key], value):
+            target[key] = value
+    for key in base:
+        if key not in changed:
+            target.pop(key, None)
+
+
+if __name__ == '__main__':
+    _decode_main(sys.argv)
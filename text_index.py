@@ -0,0 +1,188 @@
+"""
+Index plein texte (SQLite FTS5) des textes extraits, tous dossiers confondus
+1. Textes indexés par image (clé : SHA-256) : OCR, message LSB, commentaires
+   EXIF/PNG/JPEG, chaînes suspectes, textes décodés, LSB des frames
+2. Ingestion incrémentale par transactions groupées (TEXT_INDEX_BATCH_SIZE
+   images) ; une image ré-analysée remplace ses textes précédents
+3. Recherche FTS5 classée (bm25) avec extraits, depuis la CLI
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+from config import TEXT_INDEX_BATCH_SIZE, TEXT_INDEX_MAX_CHARS, TEXT_SEARCH_LIMIT
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    sha256 TEXT PRIMARY KEY,
+    image TEXT,
+    image_path TEXT,
+    analysis_date TEXT,
+    suspicion_level TEXT
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents(sha256);
+CREATE VIRTUAL TABLE IF NOT EXISTS texts USING fts5(
+    content,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+SEARCH_QUERY = """
+SELECT d.sha256, i.image, i.image_path, i.suspicion_level, i.analysis_date, d.source,
+       snippet(texts, 0, '[', ']', '…', 12)
+FROM texts
+JOIN documents d ON d.id = texts.rowid
+JOIN images i ON i.sha256 = d.sha256
+WHERE texts MATCH ?
+ORDER BY rank
+LIMIT ?
+"""
+
+
+def extract_texts(results: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Textes d'une analyse à indexer : [(source, texte)]."""
+    steg = results.get('steganography', {})
+    texts = []
+    for engine in ['tesseract', 'easyocr']:
+        ocr = results.get('ocr', {}).get(engine, {})
+        if ocr.get('success') and ocr.get('text'):
+            texts.append((f"ocr:{engine}", ocr['text']))
+    if steg.get('lsb'):
+        texts.append(('lsb', steg['lsb']))
+    for comment in steg.get('exif', {}).get('comments', []):
+        texts.append((f"exif:{comment['field']}", comment['value']))
+    if steg.get('ascii_strings'):
+        texts.append(('strings', '\n'.join(steg['ascii_strings'])))
+    for entry in steg.get('decoded', []):
+        if entry.get('plaintext'):
+            texts.append((f"decoded:{entry['source']}", entry['plaintext']))
+    for frame in results.get('frames', {}).get('with_findings', []):
+        if frame.get('lsb'):
+            texts.append((f"frame:{frame['index']}", frame['lsb']))
+    return [(source, text[:TEXT_INDEX_MAX_CHARS]) for source, text in texts if text.strip()]
+
+
+class TextIndex:
+    """
+    Index FTS5 partagé entre les threads du mode batch. Les analyses sont mises
+    en attente et écrites par lots, chaque lot dans une seule transaction.
+    """
+
+    def __init__(self, path: str, batch_size: int = TEXT_INDEX_BATCH_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self.indexed = 0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        try:
+            self._conn.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            self._conn.close()
+            raise RuntimeError(f"SQLite sans FTS5 : index plein texte indisponible ({e})")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM images').fetchone()[0]
+
+    def is_indexed(self, sha256: str, analysis_date: str) -> bool:
+        with self._lock:
+            row = self._conn.execute('SELECT analysis_date FROM images WHERE sha256 = ?', (sha256,)).fetchone()
+        return row is not None and row[0] == analysis_date
+
+    @staticmethod
+    def _record(results: Dict[str, Any]) -> Dict[str, Any]:
+        """Ligne d'index d'une analyse; KeyError/TypeError si un champ requis manque."""
+        return {
+            'sha256': results['file_info']['sha256'],
+            'image': results['image'],
+            'image_path': results['image_path'],
+            'analysis_date': results['analysis_date'],
+            'suspicion_level': results['summary']['suspicion_level'],
+            'texts': extract_texts(results)
+        }
+
+    def add(self, results: Dict[str, Any]):
+        """Met une analyse en attente; le lot est écrit quand il est plein."""
+        self._add_record(self._record(results))
+
+    def _add_record(self, record: Dict[str, Any]):
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        with self._conn:
+            for record in pending:
+                # Ré-analyse : les textes précédents de l'image sont remplacés
+                self._conn.execute('DELETE FROM texts WHERE rowid IN (SELECT id FROM documents WHERE sha256 = ?)',
+                                   (record['sha256'],))
+                self._conn.execute('DELETE FROM documents WHERE sha256 = ?', (record['sha256'],))
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?)',
+                    (record['sha256'], record['image'], record['image_path'],
+                     record['analysis_date'], record['suspicion_level']))
+                for source, text in record['texts']:
+                    cursor = self._conn.execute('INSERT INTO documents (sha256, source) VALUES (?, ?)',
+                                                (record['sha256'], source))
+                    self._conn.execute('INSERT INTO texts (rowid, content) VALUES (?, ?)', (cursor.lastrowid, text))
+        self.indexed += len(pending)
+
+    def ingest_reports(self, directory: str) -> Dict[str, int]:
+        """Indexe les rapports JSON existants (*_forensic_report.json, sous-dossiers compris)."""
+        counts = {'reports': 0, 'indexed': 0, 'unchanged': 0, 'invalid': 0}
+        for path in sorted(Path(directory).rglob('*_forensic_report.json')):
+            counts['reports'] += 1
+            # Rapport ancien ou partiel (champ requis absent) : compté invalide, l'ingestion continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = self._record(json.load(f))
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                counts['invalid'] += 1
+                continue
+            if self.is_indexed(record['sha256'], record['analysis_date']):
+                counts['unchanged'] += 1
+                continue
+            self._add_record(record)
+            counts['indexed'] += 1
+        self.flush()
+        return counts
+
+    def search(self, query: str, limit: int = TEXT_SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """
+        Recherche FTS5 (syntaxe FTS5 : ET implicite, OR, "phrase", préfixe*).
+        Une requête invalide pour FTS5 (ex. adresse e-mail) est cherchée comme phrase.
+        """
+        with self._lock:
+            try:
+                rows = self._conn.execute(SEARCH_QUERY, (query, limit)).fetchall()
+            except sqlite3.OperationalError:
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self._conn.execute(SEARCH_QUERY, (phrase, limit)).fetchall()
+        return [{'sha256': row[0], 'image': row[1], 'image_path': row[2], 'suspicion_level': row[3],
+                 'analysis_date': row[4], 'source': row[5], 'snippet': row[6]} for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._conn.close()
@@ -0,0 +1,263 @@
+"""
+Surveillance de dossiers de dépôt (mode démon)
+1. inotify (Linux, via ctypes) signale les fichiers écrits ou déplacés dans les
+   dossiers; sans inotify, les dossiers sont parcourus par polling. Un parcours
+   de rattrapage est fait au démarrage et périodiquement (événements perdus)
+2. Anti-rebond : un fichier n'est traité que lorsque sa taille et sa date de
+   modification sont stables depuis WATCH_SETTLE_SECONDS (copie en cours)
+3. Manifeste (chemin, taille, mtime, SHA-256) : fichiers inchangés et contenus
+   déjà analysés ignorés ; pool de threads permanent, modèles OCR chargés une fois
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple
+
+from colorama import Fore
+
+from config import (
+    WATCH_POLL_INTERVAL, WATCH_SETTLE_SECONDS, WATCH_RESCAN_INTERVAL, WATCH_SAVE_INTERVAL
+)
+from manifest import Manifest
+
+
+# Événements inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT = struct.Struct('iIII')   # wd, mask, cookie, len (nom ensuite, complété de \0)
+
+# Attente max d'un tour de boucle (réactivité de l'arrêt et de l'anti-rebond)
+_TICK = 0.5
+
+
+def _load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_LIBC = _load_libc()
+INOTIFY_AVAILABLE = _LIBC is not None
+
+
+class InotifyWatcher:
+    """Descripteur inotify sur des dossiers (non récursif)."""
+
+    def __init__(self, directories: Iterable[Path]):
+        self.fd = _LIBC.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._directories: Dict[int, Path] = {}
+        for directory in directories:
+            wd = _LIBC.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {directory}")
+            self._directories[wd] = directory
+
+    def read(self, timeout: float) -> Tuple[List[Path], bool]:
+        """Fichiers signalés pendant au plus `timeout` secondes, et débordement de la file."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+        paths, overflow, offset = [], False, 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            elif name and not mask & IN_ISDIR and wd in self._directories:
+                paths.append(self._directories[wd] / os.fsdecode(name))
+        return paths, overflow
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Boucle du démon : détection (inotify ou polling), anti-rebond, puis
+    `analyze(path)` dans le pool (analyse, ou dépôt dans une file de travaux).
+    `on_idle()` est appelé quand le pool se vide (flush des index, sauvegarde).
+    """
+
+    def __init__(self, directories: List[Path], analyze: Callable[[Path], Dict[str, Any]],
+                 manifest: Manifest, extensions: Iterable[str], workers: int = 1,
+                 on_idle: Optional[Callable[[], None]] = None, use_inotify: bool = True):
+        self.directories = [Path(directory).resolve() for directory in directories]
+        self.analyze = analyze
+        self.manifest = manifest
+        self.extensions = {extension.lower() for extension in extensions}
+        self.workers = max(1, workers)
+        self.on_idle = on_idle
+        self.use_inotify = use_inotify and INOTIFY_AVAILABLE
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}   # chemin -> (taille, mtime_ns, stable depuis)
+        self._in_flight: Dict[Future, Path] = {}
+        self._active_hashes: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self.stats = {'analyzed': 0, 'duplicates': 0, 'failed': 0}
+
+    # ------------------------------------------------------------------ détection
+
+    def _candidate(self, path: Path):
+        """Fichier signalé : suivi jusqu'à stabilisation, sauf s'il est inchangé ou en cours."""
+        if path.suffix.lower() not in self.extensions or path.name.startswith('.') \
+                or path in self._in_flight.values():
+            return
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self._pending.pop(path, None)
+            return
+        if self.manifest.unchanged(path, stat):
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self._pending.get(path, (None, None))[:2] != signature:
+            self._pending[path] = (*signature, time.monotonic())
+
+    def _scan(self):
+        """Parcours des dossiers (démarrage, polling, rattrapage)."""
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            self._candidate(Path(entry.path))
+            except FileNotFoundError:
+                print(f"{Fore.YELLOW}[WATCH] Dossier introuvable : {directory}")
+
+    # ------------------------------------------------------------------ traitement
+
+    def _dispatch_settled(self, executor: ThreadPoolExecutor):
+        now = time.monotonic()
+        for path, (size, mtime_ns, since) in list(self._pending.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                del self._pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self._pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif now - since >= WATCH_SETTLE_SECONDS:
+                del self._pending[path]
+                self._in_flight[executor.submit(self._process, path, stat)] = path
+
+    def _process(self, path: Path, stat: os.stat_result):
+        """Hachage (doublons), analyse, enregistrement dans le manifeste."""
+        check = self.manifest.check(path, stat)
+        sha256 = check['sha256']
+        with self._lock:
+            duplicate_of = check['duplicate_of'] or self._active_hashes.get(sha256)
+            if not duplicate_of:
+                self._active_hashes[sha256] = path
+        if duplicate_of:
+            if not check['duplicate_of']:
+                self.manifest.record(path, sha256, 'duplicate', stat, duplicate_of=str(duplicate_of))
+            print(f"{Fore.CYAN}[WATCH] {path.name} : contenu déjà analysé ({Path(duplicate_of).name})")
+            with self._lock:
+                self.stats['duplicates'] += 1
+            return
+        try:
+            print(f"\n{Fore.CYAN}[WATCH] Nouveau fichier : {path}")
+            results = self.analyze(path)
+            # analyze peut confier le fichier à une file de travaux (résultat None)
+            details = {'suspicion_level': results['summary']['suspicion_level']} if results else {}
+            self.manifest.record(path, sha256, 'done', stat, **details)
+            with self._lock:
+                self.stats['analyzed'] += 1
+        except Exception as e:
+            # Un fichier en échec n'est retenté que s'il est modifié
+            self.manifest.record(path, sha256, 'failed', stat, error=str(e))
+            print(f"{Fore.RED}[WATCH] {path.name} : {e}")
+            with self._lock:
+                self.stats['failed'] += 1
+        finally:
+            with self._lock:
+                self._active_hashes.pop(sha256, None)
+
+    def _collect_done(self):
+        done = [future for future in self._in_flight if future.done()]
+        for future in done:
+            del self._in_flight[future]
+        if done and not self._in_flight and not self._pending:
+            if self.on_idle:
+                self.on_idle()
+            self.manifest.save()
+
+    # ------------------------------------------------------------------ boucle
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Surveille jusqu'à `stop` (ou Ctrl+C); les analyses en cours sont terminées."""
+        stop = stop or threading.Event()
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = InotifyWatcher(self.directories)
+            except OSError as e:
+                print(f"{Fore.YELLOW}[WATCH] inotify indisponible ({e}), polling toutes les {WATCH_POLL_INTERVAL}s")
+        mode = 'inotify' if inotify else f"polling {WATCH_POLL_INTERVAL}s"
+        print(f"{Fore.CYAN}[WATCH] Surveillance ({mode}) : {', '.join(map(str, self.directories))}")
+        print(f"{Fore.CYAN}[WATCH] Manifeste : {self.manifest.path} ({len(self.manifest)} fichiers connus)")
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='watch')
+        scan_interval = WATCH_RESCAN_INTERVAL if inotify else WATCH_POLL_INTERVAL
+        self._scan()
+        last_scan = last_save = time.monotonic()
+        try:
+            while not stop.is_set():
+                if inotify:
+                    paths, overflow = inotify.read(_TICK)
+                    for path in paths:
+                        self._candidate(path)
+                    if overflow:
+                        self._scan()
+                else:
+                    stop.wait(_TICK)
+                now = time.monotonic()
+                if now - last_scan >= scan_interval:
+                    self._scan()
+                    last_scan = now
+                self._dispatch_settled(executor)
+                self._collect_done()
+                if now - last_save >= WATCH_SAVE_INTERVAL:
+                    self.manifest.save()
+                    last_save = now
+        except KeyboardInterrupt:
+            print(f"\n{Fore.YELLOW}[WATCH] Arrêt demandé, fin des analyses en cours...")
+        finally:
+            if inotify:
+                inotify.close()
+            executor.shutdown(wait=True)
+            self._in_flight.clear()
+            if self.on_idle:
+                self.on_idle()
+            self.manifest.save()
+            print(f"{Fore.GREEN}[WATCH] Arrêt : {self.stats['analyzed']} analysés, "
+                  f"{self.stats['duplicates']} doublons, {self.stats['failed']} échecs")